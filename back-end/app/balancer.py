@@ -0,0 +1,147 @@
+"""Client-side load balancing across the replicas of a rule engine endpoint.
+
+An endpoint may be served by several replicas, given as a comma-separated list of
+URLs. Each call goes to the replica with the fewest calls in flight, ties broken by
+the expected cost of a call on it: its latency average (EWMA) inflated by its error
+rate average. A replica failing RULE_ENGINE_REPLICA_FAILURE_THRESHOLD consecutive
+calls is ejected for RULE_ENGINE_REPLICA_EJECT_TIME seconds, or until a probe
+succeeds. The latencies of successful calls also give the delay after which a slow
+call is hedged, i.e. sent to a second replica (see AsyncRuleEngineClient).
+"""
+
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Collection, Dict, Iterator, List, Optional, Sequence
+
+# Weight of the last call in the latency and error rate averages of a replica
+RE_REPLICA_EWMA_ALPHA = float(os.environ.get("RULE_ENGINE_REPLICA_EWMA_ALPHA", "0.2"))
+# Consecutive failures ejecting a replica, and for how long (seconds)
+RE_REPLICA_FAILURE_THRESHOLD = int(os.environ.get("RULE_ENGINE_REPLICA_FAILURE_THRESHOLD", "3"))
+RE_REPLICA_EJECT_TIME = float(os.environ.get("RULE_ENGINE_REPLICA_EJECT_TIME", "10.0"))
+
+
+def split_urls(urls: str) -> List[str]:
+    """URLs of a comma-separated list, without trailing slashes."""
+    return [url.strip().rstrip("/") for url in urls.split(",") if url.strip()]
+
+
+class Replica:
+    """A replica of a rule engine endpoint and what was observed of its calls."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.latency: Optional[float] = None   # EWMA of the successful call durations, in seconds
+        self.error_rate = 0.0                  # EWMA of the failures (1) and successes (0)
+        self.consecutive_failures = 0
+        self.ejected_until: Optional[float] = None
+
+    def ejected(self, now: float) -> bool:
+        return self.ejected_until is not None and now < self.ejected_until
+
+    @property
+    def cost(self) -> float:
+        """Expected duration of a successful call, 0 until one has been observed."""
+        return (self.latency or 0.0) / max(1.0 - self.error_rate, 0.1)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "latency_ms": None if self.latency is None else round(self.latency * 1e3, 3),
+            "error_rate": round(self.error_rate, 3),
+            "ejected": self.ejected(now),
+        }
+
+
+class ReplicaPool:
+    """Least-outstanding-requests balancing with passive health tracking of the replicas."""
+
+    def __init__(self,
+                 urls: Sequence[str],
+                 alpha: float = RE_REPLICA_EWMA_ALPHA,
+                 failure_threshold: int = RE_REPLICA_FAILURE_THRESHOLD,
+                 eject_time: float = RE_REPLICA_EJECT_TIME,
+                 clock: Callable[[], float] = time.monotonic):
+        if not urls:
+            raise ValueError("at least one replica URL is required")
+        self.replicas = [Replica(url) for url in urls]
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.eject_time = eject_time
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def choose(self, exclude: Collection[Replica] = ()) -> Optional[Replica]:
+        """Replica for the next call, None if every replica is excluded.
+
+        Ejected replicas are only chosen when every other one is ejected too.
+        """
+        now = self._clock()
+        candidates = [replica for replica in self.replicas if replica not in exclude]
+        if not candidates:
+            return None
+        healthy = [replica for replica in candidates if not replica.ejected(now)]
+        if not healthy:
+            # All ejected: the one whose ejection ends first gets the trial
+            return min(candidates, key=lambda replica: replica.ejected_until)
+        return min(healthy, key=lambda replica: (replica.outstanding, replica.cost))
+
+    def any_available(self, exclude: Collection[Replica] = ()) -> bool:
+        """Whether a replica other than the excluded ones is not ejected."""
+        now = self._clock()
+        return any(not replica.ejected(now) for replica in self.replicas if replica not in exclude)
+
+    @contextmanager
+    def track(self, replica: Replica) -> Iterator[None]:
+        """Count a call in flight on the replica."""
+        replica.outstanding += 1
+        try:
+            yield
+        finally:
+            replica.outstanding -= 1
+
+    def record_success(self, replica: Replica, latency: Optional[float] = None) -> None:
+        """Report a successful call, with its duration, or a successful probe (no duration)."""
+        if latency is not None:
+            replica.latency = latency if replica.latency is None else \
+                replica.latency + self.alpha * (latency - replica.latency)
+        replica.error_rate -= self.alpha * replica.error_rate
+        replica.consecutive_failures = 0
+        replica.ejected_until = None
+
+    def record_failure(self, replica: Replica) -> None:
+        """Report a failed call or probe, ejecting the replica after too many consecutive failures."""
+        replica.error_rate += self.alpha * (1.0 - replica.error_rate)
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.failure_threshold:
+            replica.ejected_until = self._clock() + self.eject_time
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = self._clock()
+        return [replica.snapshot(now) for replica in self.replicas]
+
+
+class LatencyWindow:
+    """Durations of the last calls, for latency percentiles."""
+
+    def __init__(self, size: int = 256):
+        self._durations: deque = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._durations)
+
+    def observe(self, duration: float) -> None:
+        self._durations.append(duration)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """The p-th percentile (0-100) of the durations, None without any."""
+        if not self._durations:
+            return None
+        ordered = sorted(self._durations)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
@@ -0,0 +1,43 @@
+"""ETags and conditional request helpers for configuration reads and writes."""
+
+from typing import Any, List, Optional, Union
+
+from app.cache import canonical_json, content_hash
+from app.database import to_micros
+from app.models import Configuration
+from app.serialization import StoredConfiguration
+
+
+def configuration_etag(config: Union[Configuration, StoredConfiguration]) -> str:
+    """Strong ETag of a configuration version, from its id and updated_at."""
+    return f'"{config.id}-{to_micros(config.updated_at.replace(tzinfo=None))}"'
+
+
+def list_etag(store_version: int, **query: Any) -> str:
+    """Strong ETag of a list response, from the store version and the query parameters."""
+    return f'"l-{content_hash(canonical_json([store_version, query]))[:32]}"'
+
+
+def _parse(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether If-None-Match matches the current ETag, i.e. the client copy is current (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = _parse(if_none_match)
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def match(if_match: Optional[str], etag: Optional[str]) -> bool:
+    """Whether the If-Match precondition holds for the current ETag (strong comparison).
+
+    An absent header always holds; etag is None when the resource does not exist.
+    """
+    if if_match is None:
+        return True
+    if etag is None:
+        return False
+    tags = _parse(if_match)
+    return "*" in tags or etag in tags
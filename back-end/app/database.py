@@ -1,94 +1,924 @@
-"""In-memory database simulation for the SaaS Configurator application."""
+"""Configuration storage for the SaaS Configurator application.
 
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+ConfigurationStore defines the storage contract used by the API handlers;
+InMemoryDatabase implements it in process memory, and SQLiteDatabase
+(app/sqlite_database.py) persists configurations on disk.
+"""
+
+import base64
+import json
+import os
+import secrets
+import sys
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right, insort
+from collections import defaultdict
+from contextlib import AbstractContextManager, ExitStack, nullcontext
+from datetime import datetime, timedelta
+from itertools import count
+from typing import (Optional, List, Dict, Any, Set, Tuple, Literal, Iterable, Iterator, Sequence, MutableSequence,
+                    Callable, TypeVar, Union)
+from app.log import get_logger
+from app.metrics import STORE_SCANNED_KEYS
 from app.models import Configuration, ConfigurationCreate, ConfigurationUpdate, ConfigurationStatus
+from app.serialization import (DecodedConfiguration, StoredConfiguration, configuration_bytes_with_data, dumps,
+                               loads)
+
+
+OrderBy = Literal["id", "updated_at"]
+T = TypeVar("T")
+
+logger = get_logger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value: datetime) -> int:
+    """Microseconds since the epoch of a naive datetime."""
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def from_micros(value: int) -> datetime:
+    """Naive datetime from microseconds since the epoch."""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def encode_cursor(order_by: OrderBy, key: Tuple) -> str:
+    """Encode the sort key of the last returned configuration into an opaque cursor."""
+    if order_by == "updated_at":
+        raw = {"o": order_by, "k": [key[0].isoformat(), key[1]]}
+    else:
+        raw = {"o": order_by, "k": [key[0]]}
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _cursor_id(value: Any) -> int:
+    config_id = int(value)
+    # Ids are SQLite integers
+    if not 0 <= config_id < 2 ** 63:
+        raise ValueError("cursor id out of range")
+    return config_id
+
+
+def decode_cursor(cursor: str, order_by: OrderBy) -> Tuple:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if raw["o"] != order_by:
+            raise ValueError(f"cursor was issued for order_by={raw['o']}")
+        if order_by == "updated_at":
+            updated_at, config_id = datetime.fromisoformat(raw["k"][0]), _cursor_id(raw["k"][1])
+            # Stored timestamps are naive, an aware one cannot be compared with them
+            if updated_at.tzinfo is not None:
+                raise ValueError("cursor timestamp has a timezone")
+            return (updated_at, config_id)
+        return (_cursor_id(raw["k"][0]),)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"malformed cursor: {e}") from e
+
+
+class ConfigurationConflictError(Exception):
+    """Raised when a write expects a configuration version that is no longer the current one."""
+
+
+class ConfigurationStoreBusyError(Exception):
+    """Raised when a write could not get the store within its busy timeout, e.g. while another worker writes."""
+
+
+class ConfigurationStore(ABC):
+    """Storage contract for configurations, shared by every backend."""
+
+    # Whether several processes can use the store at once (see app/workers.py)
+    shared: bool = False
+
+    @property
+    @abstractmethod
+    def version(self) -> int:
+        """Counter changed by every write, so that list results can be revalidated cheaply."""
+
+    @abstractmethod
+    def create_configuration(self, config_data: ConfigurationCreate) -> Configuration:
+        """Create a new configuration."""
+
+    def create_configurations(self, configs: Iterable[ConfigurationCreate]) -> List[Configuration]:
+        """Create several configurations at once.
+
+        Backends override this to apply the writes in one batch, all or none of them.
+        """
+        return [self.create_configuration(config) for config in configs]
+
+    @abstractmethod
+    def get_configuration(self, config_id: int) -> Optional[Configuration]:
+        """Get a configuration by ID."""
+
+    @abstractmethod
+    def get_configurations(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None,
+        order_by: OrderBy = "id"
+    ) -> List[Configuration]:
+        """Get a list of configurations with optional filtering."""
+
+    @abstractmethod
+    def get_configurations_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order_by: OrderBy = "id",
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> Tuple[List[Configuration], Optional[str]]:
+        """Get the page of configurations following the cursor (keyset pagination).
+
+        Returns the configurations and the cursor of the next page, or None on the
+        last page. Raises ValueError if the cursor is invalid.
+        """
+
+    def get_stored_configuration(self, config_id: int) -> Optional[StoredConfiguration]:
+        """Get a configuration by ID, decoded only when needed. Backends override this to defer decoding."""
+        config = self.get_configuration(config_id)
+        return DecodedConfiguration(config) if config is not None else None
+
+    def get_stored_configurations(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None,
+        order_by: OrderBy = "id"
+    ) -> List[StoredConfiguration]:
+        """get_configurations, decoded only when needed. Backends override this to defer decoding."""
+        return [DecodedConfiguration(config) for config in self.get_configurations(
+            skip=skip, limit=limit, status=status, cluster_type=cluster_type, tag=tag, order_by=order_by)]
+
+    def get_stored_configurations_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order_by: OrderBy = "id",
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> Tuple[List[StoredConfiguration], Optional[str]]:
+        """get_configurations_page, decoded only when needed. Backends override this to defer decoding."""
+        configs, next_cursor = self.get_configurations_page(
+            limit=limit, cursor=cursor, order_by=order_by, status=status, cluster_type=cluster_type, tag=tag)
+        return [DecodedConfiguration(config) for config in configs], next_cursor
+
+    @abstractmethod
+    def update_configuration(
+        self,
+        config_id: int,
+        config_update: ConfigurationUpdate,
+        expected_updated_at: Optional[datetime] = None
+    ) -> Optional[Configuration]:
+        """Update an existing configuration.
+
+        When expected_updated_at is given and the configuration was updated since,
+        raises ConfigurationConflictError instead of writing.
+        """
+
+    def update_configurations(
+        self, updates: Iterable[Tuple[int, ConfigurationUpdate]]
+    ) -> List[Optional[Configuration]]:
+        """Update several configurations at once, None for missing ones.
+
+        Backends override this to apply the writes in one batch, all or none of them.
+        """
+        return [self.update_configuration(config_id, config_update) for config_id, config_update in updates]
+
+    @abstractmethod
+    def delete_configuration(self, config_id: int, expected_updated_at: Optional[datetime] = None) -> bool:
+        """Delete a configuration by ID.
+
+        When expected_updated_at is given and the configuration was updated since,
+        raises ConfigurationConflictError instead of deleting.
+        """
+
+    def delete_configurations(self, config_ids: Iterable[int]) -> List[bool]:
+        """Delete several configurations at once.
+
+        Backends override this to apply the writes in one batch.
+        """
+        return [self.delete_configuration(config_id) for config_id in config_ids]
+
+    @abstractmethod
+    def count_configurations(
+        self,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> int:
+        """Count configurations with optional filtering."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all configurations."""
+
+    @staticmethod
+    def sort_key(config: Union[Configuration, StoredConfiguration], order_by: OrderBy = "id") -> Tuple:
+        """Sort key of a configuration for the given ordering, ids break ties."""
+        if order_by == "updated_at":
+            return (config.updated_at, config.id)
+        return (config.id,)
+
+    def cursor_after(self, config: Union[Configuration, StoredConfiguration], order_by: OrderBy = "id") -> str:
+        """Cursor resuming right after the given configuration."""
+        return encode_cursor(order_by, self.sort_key(config, order_by))
+
+    def batch(self) -> AbstractContextManager:
+        """Group the operations issued inside the block into one transaction, when the backend has them."""
+        return nullcontext()
+
+    def publish_event(self, kind: str, params: Dict[str, Any]) -> Optional[int]:
+        """Record an event for the other processes sharing the store, returning its id. Process-local stores ignore it."""
+        return None
+
+    def events_after(self, event_id: int) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Events published after event_id, as (id, kind, params), oldest first."""
+        return []
+
+    def last_event_id(self) -> int:
+        """Id of the latest published event, 0 if none."""
+        return 0
+
+    def iter_configurations(
+        self,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None,
+        batch_size: int = 500
+    ) -> Iterator[List[Configuration]]:
+        """
+        Yield every matching configuration in id order, batch_size at a time.
+
+        Batches are read with keyset pagination, so memory does not grow with the
+        store size and configurations written during the iteration do not shift it.
+        """
+        return self._iter_pages(self.get_configurations_page, status, cluster_type, tag, batch_size)
+
+    def iter_stored_configurations(
+        self,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None,
+        batch_size: int = 500
+    ) -> Iterator[List[StoredConfiguration]]:
+        """iter_configurations, decoded only when needed."""
+        return self._iter_pages(self.get_stored_configurations_page, status, cluster_type, tag, batch_size)
+
+    @staticmethod
+    def _iter_pages(
+        get_page: Callable[..., Tuple[List[T], Optional[str]]],
+        status: Optional[ConfigurationStatus],
+        cluster_type: Optional[str],
+        tag: Optional[str],
+        batch_size: int
+    ) -> Iterator[List[T]]:
+        cursor = None
+        while True:
+            configs, cursor = get_page(
+                limit=batch_size, cursor=cursor, status=status, cluster_type=cluster_type, tag=tag)
+            if configs:
+                yield configs
+            if cursor is None:
+                return
+
+
+class _Record:
+    """Compact form of a stored configuration.
+
+    Strings shared between configurations (cluster type, version, tags) are interned,
+    status is kept as an ordinal, timestamps as epoch microseconds, and
+    configuration_data as compact JSON bytes decoded only when a Configuration is built.
+    """
+    __slots__ = ("id", "name", "description", "cluster_type", "version", "status",
+                 "data", "tags", "created_at", "updated_at")
+
+    def __init__(self, id: int, name: str, description: Optional[str], cluster_type: Optional[str],
+                 version: Optional[str], status: int, data: bytes, tags: Tuple[str, ...],
+                 created_at: int, updated_at: int):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.cluster_type = cluster_type
+        self.version = version
+        self.status = status
+        self.data = data
+        self.tags = tags
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    def replace(self, **changes: Any) -> "_Record":
+        """Copy of the record with some fields changed; published records are never modified."""
+        values = {field: getattr(self, field) for field in self.__slots__}
+        values.update(changes)
+        return _Record(**values)
+
+
+_STATUSES = tuple(ConfigurationStatus)
+_STATUS_ORDINALS = {status: ordinal for ordinal, status in enumerate(_STATUSES)}
+_NO_STATUS = -1
+_EMPTY_DATA = dumps({})
+# updated_at sort keys pack (updated_at, id) into one int: updated_at * _ID_SPACE + id
+_ID_SPACE = 1 << 40
+# Number of locks guarding record writes, a configuration uses lock id % LOCK_STRIPES
+LOCK_STRIPES = int(os.environ.get("CONFIG_STORE_LOCK_STRIPES", "64"))
+# Sort keys read at a time by list scans
+_SCAN_CHUNK = 256
+
+
+class _IndexEntry:
+    """Configurations having one value of a secondary index: their ids, and their sort keys in both orders."""
+    __slots__ = ("ids", "keys_by_id", "keys_by_updated_at")
+
+    def __init__(self):
+        self.ids: Set[int] = set()
+        self.keys_by_id = array("q")
+        self.keys_by_updated_at: List[int] = []
+
+    def keys(self, order_by: OrderBy) -> Sequence[int]:
+        return self.keys_by_updated_at if order_by == "updated_at" else self.keys_by_id
 
 
-class InMemoryDatabase:
-    """Simple in-memory database for storing configurations."""
+# Entry of the index values no configuration has
+_NO_ENTRY = _IndexEntry()
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def _status_ordinal(status: Optional[ConfigurationStatus]) -> int:
+    return _STATUS_ORDINALS[ConfigurationStatus(status)] if status is not None else _NO_STATUS
+
+
+def _intern_tags(tags: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    return tuple(sys.intern(tag) for tag in dict.fromkeys(tags or ()))
+
+
+def _encode_data(data: Any) -> bytes:
+    if not data:
+        return _EMPTY_DATA
+    # Copy into an exactly sized object, encoders may return over-allocated buffers
+    return bytes(memoryview(dumps(data)))
+
+
+class InMemoryDatabase(ConfigurationStore):
+    """Simple in-memory database for storing configurations.
+
+    Configurations are held as compact slotted records (see _Record), and pydantic
+    models are only built when configurations leave the store, so the per-configuration
+    overhead stays low enough for millions of them per process.
+
+    Besides the primary store, the database maintains secondary indexes mapping
+    status, lower-cased cluster type and tag to the matching ids, so that filtering
+    and counting only touch the matching configurations. Sorted arrays of sort keys
+    per ordering, for the whole store and for each index value, let pagination seek
+    directly to the next page; with several filters, the keys of the most selective
+    one are walked and the others checked by id.
+
+    The store is safe to use from several threads:
+
+    - ids come from an atomic counter;
+    - records are immutable once stored, an update stores a new record in place of the
+      old one, so readers see either version and never a half-updated one;
+    - writes to a configuration are serialized by one of LOCK_STRIPES striped locks, and
+      the encoding of the new record happens before any lock is taken; the indexes are
+      then updated under a short index lock;
+    - batch writes encode every item first, then take the stripe locks of their
+      configurations, in stripe order, and apply all the records under one index lock:
+      a batch that fails does so before writing anything;
+    - readers take no lock, except the index lock around the bisect and bounded slice
+      that read sort keys, and rely on single dict and set operations being atomic.
+      Scans seek by key rather than by position, so concurrent writes never make
+      them skip or repeat a configuration. A list sees the writes committed while it
+      runs, one record at a time.
+    """
     
     def __init__(self):
-        self.configurations: Dict[int, Configuration] = {}
-        self.next_id: int = 1
-        
+        self.configurations: Dict[int, _Record] = {}
+        self._ids = count(1)
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._index_lock = threading.Lock()
+        self._by_status: Dict[int, _IndexEntry] = defaultdict(_IndexEntry)
+        self._by_cluster_type: Dict[str, _IndexEntry] = defaultdict(_IndexEntry)
+        self._by_tag: Dict[str, _IndexEntry] = defaultdict(_IndexEntry)
+        self._keys_by_id = array("q")
+        self._keys_by_updated_at: List[int] = []
+        # Starts from a random value, so that a restarted process does not reuse the versions, and
+        # list ETags, of its previous run for different data
+        self._version = secrets.randbits(48)
+
+    @property
+    def version(self) -> int:
+        """Counter changed by every write."""
+        return self._version
+
+    def _stripe(self, config_id: int) -> threading.Lock:
+        return self._stripes[config_id % len(self._stripes)]
+
+    def _lock_stripes(self, config_ids: Iterable[int]) -> ExitStack:
+        """Hold the stripe locks of several configurations, taken in stripe order so that batches cannot deadlock."""
+        stack = ExitStack()
+        for stripe in sorted({config_id % len(self._stripes) for config_id in config_ids}):
+            stack.enter_context(self._stripes[stripe])
+        return stack
+
+    @staticmethod
+    def _check_expected(record: _Record, expected_updated_at: Optional[datetime]) -> None:
+        if expected_updated_at is not None and record.updated_at != to_micros(expected_updated_at):
+            raise ConfigurationConflictError(f"Configuration {record.id} was modified")
+
+    @staticmethod
+    def _to_configuration(record: _Record) -> Configuration:
+        # Records were validated when they were written, skip validation when building the model
+        return Configuration.model_construct(
+            id=record.id,
+            name=record.name,
+            description=record.description,
+            cluster_type=record.cluster_type,
+            version=record.version,
+            status=_STATUSES[record.status] if record.status != _NO_STATUS else None,
+            configuration_data=loads(record.data),
+            tags=list(record.tags),
+            created_at=from_micros(record.created_at),
+            updated_at=from_micros(record.updated_at),
+        )
+
+    def clear(self) -> None:
+        """Remove all configurations and reset the indexes."""
+        with self._index_lock:
+            self._version += 1
+            self.configurations.clear()
+            self._by_status.clear()
+            self._by_cluster_type.clear()
+            self._by_tag.clear()
+            del self._keys_by_id[:]
+            self._keys_by_updated_at.clear()
+
+    @staticmethod
+    def _updated_at_key(record: _Record) -> int:
+        return record.updated_at * _ID_SPACE + record.id
+
+    @staticmethod
+    def _seek_key(after: Tuple, order_by: OrderBy) -> int:
+        """Packed sort key of a decoded cursor."""
+        if order_by == "updated_at":
+            return to_micros(after[0]) * _ID_SPACE + after[1]
+        return after[0]
+
+    def _cursor(self, key: int, order_by: OrderBy) -> str:
+        if order_by == "updated_at":
+            return encode_cursor(order_by, (from_micros(key // _ID_SPACE), key % _ID_SPACE))
+        return encode_cursor(order_by, (key,))
+
+    def _ordered_keys(self, order_by: OrderBy) -> Sequence[int]:
+        return self._keys_by_updated_at if order_by == "updated_at" else self._keys_by_id
+
+    @staticmethod
+    def _insert_keys(keys: MutableSequence[int], new_keys: Sequence[int]) -> None:
+        """Insert sorted keys, appending them when they all follow the stored ones."""
+        if not new_keys:
+            return
+        if not keys or keys[-1] < new_keys[0]:
+            keys.extend(new_keys)
+        else:
+            for key in new_keys:
+                insort(keys, key)
+
+    @staticmethod
+    def _remove_key(keys: MutableSequence[int], key: int) -> None:
+        index = bisect_right(keys, key) - 1
+        if index >= 0 and keys[index] == key:
+            del keys[index]
+
+    def _index_values(self, record: _Record) -> List[Tuple[Dict[Any, _IndexEntry], Any]]:
+        """(index, value) pairs of a record in the secondary indexes."""
+        values: List[Tuple[Dict[Any, _IndexEntry], Any]] = []
+        if record.status != _NO_STATUS:
+            values.append((self._by_status, record.status))
+        if record.cluster_type is not None:
+            values.append((self._by_cluster_type, sys.intern(record.cluster_type.lower())))
+        values.extend((self._by_tag, tag) for tag in record.tags)
+        return values
+
+    def _index(self, record: _Record) -> None:
+        """Add a record to the secondary indexes."""
+        updated_at_key = self._updated_at_key(record)
+        for index, value in self._index_values(record):
+            entry = index[value]
+            entry.ids.add(record.id)
+            insort(entry.keys_by_id, record.id)
+            insort(entry.keys_by_updated_at, updated_at_key)
+
+    def _unindex(self, record: _Record) -> None:
+        """Remove a record from the secondary indexes."""
+        updated_at_key = self._updated_at_key(record)
+        for index, value in self._index_values(record):
+            entry = index.get(value)
+            if entry is None:
+                continue
+            entry.ids.discard(record.id)
+            self._remove_key(entry.keys_by_id, record.id)
+            self._remove_key(entry.keys_by_updated_at, updated_at_key)
+            if not entry.ids:
+                del index[value]
+
+    def _filter_entries(
+        self,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> Optional[List[_IndexEntry]]:
+        """Index entries of the filters, smallest first; None when no filter is given."""
+        entries = []
+        if status:
+            entries.append(self._by_status.get(_status_ordinal(status), _NO_ENTRY))
+        if cluster_type:
+            entries.append(self._by_cluster_type.get(cluster_type.lower(), _NO_ENTRY))
+        if tag:
+            entries.append(self._by_tag.get(tag, _NO_ENTRY))
+        if not entries:
+            return None
+        entries.sort(key=lambda entry: len(entry.ids))
+        return entries
+
+    def _filtered_keys(
+        self,
+        order_by: OrderBy,
+        status: Optional[ConfigurationStatus],
+        cluster_type: Optional[str],
+        tag: Optional[str]
+    ) -> Tuple[Sequence[int], List[Set[int]]]:
+        """Sorted keys to walk for a list, and the id sets of the other filters that its ids must be in.
+
+        The keys are those of the most selective filter, or of the whole store without filter.
+        """
+        entries = self._filter_entries(status=status, cluster_type=cluster_type, tag=tag)
+        if entries is None:
+            return self._ordered_keys(order_by), []
+        return entries[0].keys(order_by), [entry.ids for entry in entries[1:]]
     
-    def create_configuration(self, config_data: ConfigurationCreate) -> Configuration:
-        """Create a new configuration."""
-        now = datetime.now()
-        config = Configuration(
-            id=self.next_id,
-            **config_data.model_dump(),
+    @staticmethod
+    def _new_record(config_id: int, config_data: ConfigurationCreate, data: bytes, now: int) -> _Record:
+        return _Record(
+            id=config_id,
+            name=config_data.name,
+            description=config_data.description,
+            cluster_type=_intern(config_data.cluster_type),
+            version=_intern(config_data.version),
+            status=_status_ordinal(config_data.status),
+            data=data,
+            tags=_intern_tags(config_data.tags),
             created_at=now,
             updated_at=now
         )
-        self.configurations[self.next_id] = config
-        self.next_id += 1
-        return config
+
+    def create_configuration(self, config_data: ConfigurationCreate) -> Configuration:
+        """Create a new configuration."""
+        data = _encode_data(config_data.configuration_data)
+        record = self._new_record(next(self._ids), config_data, data, to_micros(datetime.now()))
+        with self._index_lock:
+            self.configurations[record.id] = record
+            self._index(record)
+            # Concurrent creates may finish out of id order
+            insort(self._keys_by_id, record.id)
+            insort(self._keys_by_updated_at, self._updated_at_key(record))
+            self._version += 1
+        return self._to_configuration(record)
+
+    def create_configurations(self, configs: Iterable[ConfigurationCreate]) -> List[Configuration]:
+        """Create several configurations at once, all or none of them."""
+        configs = list(configs)
+        # Encode everything before allocating ids or taking the lock
+        encoded = [_encode_data(config.configuration_data) for config in configs]
+        if not configs:
+            return []
+        now = to_micros(datetime.now())
+        records = [self._new_record(next(self._ids), config, data, now) for config, data in zip(configs, encoded)]
+        with self._index_lock:
+            for record in records:
+                self.configurations[record.id] = record
+                self._index(record)
+            # ids increase within the batch and all records share updated_at, so both key lists are sorted
+            self._insert_keys(self._keys_by_id, [record.id for record in records])
+            self._insert_keys(self._keys_by_updated_at, [self._updated_at_key(record) for record in records])
+            self._version += 1
+        return [self._to_configuration(record) for record in records]
     
     def get_configuration(self, config_id: int) -> Optional[Configuration]:
         """Get a configuration by ID."""
-        return self.configurations.get(config_id)
+        record = self.configurations.get(config_id)
+        return self._to_configuration(record) if record is not None else None
+
+    def get_stored_configuration(self, config_id: int) -> Optional[StoredConfiguration]:
+        """Get a configuration by ID, decoded only when needed."""
+        record = self.configurations.get(config_id)
+        return _StoredRecord(record) if record is not None else None
+
+    def _records(self, keys: Iterable[int], wrap: Callable[[_Record], T]) -> List[T]:
+        """Configurations of the given sort keys, skipping those deleted meanwhile."""
+        configs = []
+        for key in keys:
+            record = self.configurations.get(key % _ID_SPACE)
+            if record is not None:
+                configs.append(wrap(record))
+        return configs
+
+    def _list_keys(
+        self,
+        skip: int,
+        limit: int,
+        status: Optional[ConfigurationStatus],
+        cluster_type: Optional[str],
+        tag: Optional[str],
+        order_by: OrderBy
+    ) -> Sequence[int]:
+        """Sort keys of a get_configurations result."""
+        keys, others = self._filtered_keys(order_by, status, cluster_type, tag)
+        if not others:
+            # A single filter or none: slice the sorted keys
+            with self._index_lock:
+                page_keys = keys[skip:skip + limit]
+            STORE_SCANNED_KEYS.inc(amount=len(page_keys))
+            return page_keys
+        return self._scan(keys, None, others, skip + limit)[skip:]
     
     def get_configurations(
         self, 
         skip: int = 0, 
         limit: int = 10,
         status: Optional[ConfigurationStatus] = None,
-        cluster_type: Optional[str] = None
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None,
+        order_by: OrderBy = "id"
     ) -> List[Configuration]:
         """Get a list of configurations with optional filtering."""
-        configs = list(self.configurations.values())
-        
-        # Apply filters
-        if status:
-            configs = [c for c in configs if c.status == status]
-        if cluster_type:
-            configs = [c for c in configs if c.cluster_type.lower() == cluster_type.lower()]
-        
-        # Apply pagination
-        return configs[skip:skip + limit]
+        return self._records(self._list_keys(skip, limit, status, cluster_type, tag, order_by), self._to_configuration)
+
+    def get_stored_configurations(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None,
+        order_by: OrderBy = "id"
+    ) -> List[StoredConfiguration]:
+        """get_configurations, decoded only when needed."""
+        return self._records(self._list_keys(skip, limit, status, cluster_type, tag, order_by), _StoredRecord)
+
+    def _scan(self, keys: Sequence[int], after: Optional[int], others: Sequence[Set[int]], limit: int) -> List[int]:
+        """Collect up to limit keys greater than after whose id is in every set of others.
+
+        Keys are read a slice at a time, each slice found by bisecting on the last key
+        seen, so that keys inserted or removed meanwhile do not shift the scan.
+        """
+        found = []
+        scanned = 0
+        while len(found) < limit:
+            size = limit - len(found) if not others else _SCAN_CHUNK
+            with self._index_lock:
+                start = bisect_right(keys, after) if after is not None else 0
+                chunk = keys[start:start + size]
+            if not chunk:
+                break
+            scanned += len(chunk)
+            if not others:
+                found.extend(chunk)
+            else:
+                for key in chunk:
+                    config_id = key % _ID_SPACE
+                    if all(config_id in ids for ids in others):
+                        found.append(key)
+                        if len(found) == limit:
+                            break
+            after = chunk[-1]
+        STORE_SCANNED_KEYS.inc(amount=scanned)
+        return found
+
+    def get_configurations_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order_by: OrderBy = "id",
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> Tuple[List[Configuration], Optional[str]]:
+        """Get the page of configurations following the cursor (keyset pagination)."""
+        page_keys, next_cursor = self._page_keys(limit, cursor, order_by, status, cluster_type, tag)
+        return self._records(page_keys, self._to_configuration), next_cursor
+
+    def get_stored_configurations_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order_by: OrderBy = "id",
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> Tuple[List[StoredConfiguration], Optional[str]]:
+        """get_configurations_page, decoded only when needed."""
+        page_keys, next_cursor = self._page_keys(limit, cursor, order_by, status, cluster_type, tag)
+        return self._records(page_keys, _StoredRecord), next_cursor
+
+    def _page_keys(
+        self,
+        limit: int,
+        cursor: Optional[str],
+        order_by: OrderBy,
+        status: Optional[ConfigurationStatus],
+        cluster_type: Optional[str],
+        tag: Optional[str]
+    ) -> Tuple[Sequence[int], Optional[str]]:
+        """Sort keys of a page and the cursor of the next one."""
+        after = self._seek_key(decode_cursor(cursor, order_by), order_by) if cursor else None
+        keys, others = self._filtered_keys(order_by, status, cluster_type, tag)
+        page_keys = self._scan(keys, after, others, limit + 1)
+
+        next_cursor = self._cursor(page_keys[limit - 1], order_by) if len(page_keys) > limit else None
+        return page_keys[:limit], next_cursor
+
+    def _swap(self, old: _Record, new: Optional[_Record]) -> bool:
+        """Swap a stored record for its new version (None deletes it), unless it was removed meanwhile.
+
+        The index lock must be held.
+        """
+        if self.configurations.get(old.id) is not old:
+            return False
+        self._unindex(old)
+        self._remove_key(self._keys_by_updated_at, self._updated_at_key(old))
+        if new is None:
+            del self.configurations[old.id]
+            self._remove_key(self._keys_by_id, old.id)
+        else:
+            self.configurations[new.id] = new
+            self._index(new)
+            insort(self._keys_by_updated_at, self._updated_at_key(new))
+        return True
+
+    def _replace_record(self, old: _Record, new: Optional[_Record]) -> bool:
+        """Swap a stored record for its new version (None deletes it), unless it was removed meanwhile."""
+        with self._index_lock:
+            if not self._swap(old, new):
+                return False
+            self._version += 1
+            return True
+
+    @staticmethod
+    def _encode_changes(config_update: ConfigurationUpdate) -> Dict[str, Any]:
+        """Record fields changed by an update, encoded."""
+        update_data = config_update.model_dump(exclude_unset=True)
+        changes: Dict[str, Any] = {}
+        for field in ("name", "description"):
+            if field in update_data:
+                changes[field] = update_data[field]
+        for field in ("cluster_type", "version"):
+            if field in update_data:
+                changes[field] = _intern(update_data[field])
+        if "status" in update_data:
+            changes["status"] = _status_ordinal(update_data["status"])
+        if "configuration_data" in update_data:
+            changes["data"] = _encode_data(update_data["configuration_data"])
+        if "tags" in update_data:
+            changes["tags"] = _intern_tags(update_data["tags"])
+        return changes
     
-    def update_configuration(self, config_id: int, config_update: ConfigurationUpdate) -> Optional[Configuration]:
+    def update_configuration(
+        self,
+        config_id: int,
+        config_update: ConfigurationUpdate,
+        expected_updated_at: Optional[datetime] = None
+    ) -> Optional[Configuration]:
         """Update an existing configuration."""
-        config = self.configurations.get(config_id)
-        if not config:
+        if config_id not in self.configurations:
             return None
-        
-        # Update only provided fields
-        update_data = config_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(config, field, value)
-        
-        config.updated_at = datetime.now()
-        return config
+
+        # Encode the changes before taking any lock
+        changes = self._encode_changes(config_update)
+        with self._stripe(config_id):
+            record = self.configurations.get(config_id)
+            if record is None:
+                return None
+            self._check_expected(record, expected_updated_at)
+            # Strictly increasing, so (id, updated_at) identifies a version of the configuration
+            updated = record.replace(updated_at=max(to_micros(datetime.now()), record.updated_at + 1), **changes)
+            if not self._replace_record(record, updated):
+                return None
+        return self._to_configuration(updated)
+
+    def update_configurations(
+        self, updates: Iterable[Tuple[int, ConfigurationUpdate]]
+    ) -> List[Optional[Configuration]]:
+        """Update several configurations at once, all or none of them; None for missing ones."""
+        changes = [(config_id, self._encode_changes(config_update)) for config_id, config_update in updates]
+        results: List[Optional[_Record]] = []
+        with self._lock_stripes(config_id for config_id, _ in changes):
+            now = to_micros(datetime.now())
+            stored: Dict[int, _Record] = {}
+            latest: Dict[int, _Record] = {}
+            for config_id, fields in changes:
+                # An id given twice gets both updates, in order
+                record = latest.get(config_id) or self.configurations.get(config_id)
+                if record is None:
+                    results.append(None)
+                    continue
+                stored.setdefault(config_id, record)
+                latest[config_id] = record.replace(updated_at=max(now, record.updated_at + 1), **fields)
+                results.append(latest[config_id])
+            with self._index_lock:
+                # Configurations removed meanwhile (clear) are reported missing
+                missing = {config_id for config_id, record in latest.items()
+                           if not self._swap(stored[config_id], record)}
+                if len(missing) < len(latest):
+                    self._version += 1
+        return [self._to_configuration(record) if record is not None and record.id not in missing else None
+                for record in results]
     
-    def delete_configuration(self, config_id: int) -> bool:
+    def delete_configuration(self, config_id: int, expected_updated_at: Optional[datetime] = None) -> bool:
         """Delete a configuration by ID."""
-        if config_id in self.configurations:
-            del self.configurations[config_id]
-            return True
-        return False
+        with self._stripe(config_id):
+            record = self.configurations.get(config_id)
+            if record is None:
+                return False
+            self._check_expected(record, expected_updated_at)
+            return self._replace_record(record, None)
+
+    def delete_configurations(self, config_ids: Iterable[int]) -> List[bool]:
+        """Delete several configurations at once."""
+        config_ids = list(config_ids)
+        deleted = []
+        with self._lock_stripes(config_ids), self._index_lock:
+            for config_id in config_ids:
+                record = self.configurations.get(config_id)
+                deleted.append(record is not None and self._swap(record, None))
+            if any(deleted):
+                self._version += 1
+        return deleted
     
     def count_configurations(
         self, 
         status: Optional[ConfigurationStatus] = None,
-        cluster_type: Optional[str] = None
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
     ) -> int:
         """Count configurations with optional filtering."""
-        configs = list(self.configurations.values())
-        
-        # Apply filters
-        if status:
-            configs = [c for c in configs if c.status == status]
-        if cluster_type:
-            configs = [c for c in configs if c.cluster_type.lower() == cluster_type.lower()]
-            
-        return len(configs)
+        entries = self._filter_entries(status=status, cluster_type=cluster_type, tag=tag)
+        if entries is None:
+            return len(self.configurations)
+        if len(entries) == 1:
+            return len(entries[0].ids)
+        return len(entries[0].ids.intersection(*(entry.ids for entry in entries[1:])))
+
 
+class _StoredRecord(StoredConfiguration):
+    """StoredConfiguration of an InMemoryDatabase record."""
+    __slots__ = ("id", "updated_at", "_record")
 
-def seed_test_data(database: InMemoryDatabase) -> None:
-    """Seed the database with test configuration data."""
+    def __init__(self, record: _Record):
+        self.id = record.id
+        self.updated_at = from_micros(record.updated_at)
+        self._record = record
+
+    def configuration(self) -> Configuration:
+        return InMemoryDatabase._to_configuration(self._record)
+
+    def encode(self) -> bytes:
+        # configuration_data is spliced in as stored, without decoding and encoding it again
+        record = self._record
+        return configuration_bytes_with_data(
+            {"name": record.name, "description": record.description, "cluster_type": record.cluster_type,
+             "version": record.version, "status": _STATUSES[record.status] if record.status != _NO_STATUS else None},
+            record.data,
+            {"tags": list(record.tags), "id": record.id, "created_at": from_micros(record.created_at),
+             "updated_at": self.updated_at})
+
+
+def seed_test_data(database: ConfigurationStore) -> None:
+    """Seed the database with test configuration data, unless it already holds configurations."""
+    with database.batch():
+        # Checked in the same transaction as the inserts, so concurrent workers seed only once
+        if database.count_configurations() > 0:
+            logger.info("Database already holds configurations, skipping test data")
+            return
+        _seed_test_data(database)
+
+
+def _seed_test_data(database: ConfigurationStore) -> None:
     
     # Test Configuration 1: Production Kafka Cluster
     config1 = ConfigurationCreate(
@@ -151,10 +981,26 @@ def seed_test_data(database: InMemoryDatabase) -> None:
     database.create_configuration(config1)
     database.create_configuration(config2)
     
-    print("✅ Test data seeded successfully!")
-    print(f"   - Created configuration: {config1.name} (Status: {config1.status})")
-    print(f"   - Created configuration: {config2.name} (Status: {config2.status})")
+    logger.info("Test data seeded: %s (%s), %s (%s)",
+                config1.name, config1.status.value, config2.name, config2.status.value)
+
+
+# Storage backend selection: "memory" (default) or "sqlite"
+CONFIG_STORE = os.environ.get("CONFIG_STORE", "memory")
+CONFIG_DB_PATH = os.environ.get("CONFIG_DB_PATH", "configurations.db")
+# Seconds a SQLite write waits for the write lock held by another worker
+CONFIG_DB_BUSY_TIMEOUT = float(os.environ.get("CONFIG_DB_BUSY_TIMEOUT", "0.25"))
+
+
+def create_database(store: str = CONFIG_STORE, path: str = CONFIG_DB_PATH) -> ConfigurationStore:
+    """Create the storage backend selected by name."""
+    if store == "memory":
+        return InMemoryDatabase()
+    if store == "sqlite":
+        from app.sqlite_database import SQLiteDatabase
+        return SQLiteDatabase(path, busy_timeout=CONFIG_DB_BUSY_TIMEOUT)
+    raise ValueError(f"Unknown configuration store: {store}")
 
 
 # Global database instance
-db = InMemoryDatabase()
+db = create_database()
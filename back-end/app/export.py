@@ -0,0 +1,29 @@
+"""Streaming export of configurations as newline-delimited JSON (NDJSON)."""
+
+import zlib
+from typing import Iterable, Iterator, List, Union
+
+from app.models import Configuration
+from app.serialization import StoredConfiguration, configuration_bytes
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson_chunks(batches: Iterable[List[Union[Configuration, StoredConfiguration]]]) -> Iterator[bytes]:
+    """Encode each batch of configurations as one chunk of NDJSON lines, as the API returns them.
+
+    The encodings are not cached: an export reads each configuration once, and would
+    evict the hot entries of GET and list responses.
+    """
+    for batch in batches:
+        yield b"".join(configuration_bytes(config, use_cache=False) + b"\n" for config in batch)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a stream of chunks incrementally, without holding the whole output."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
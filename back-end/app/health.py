@@ -0,0 +1,146 @@
+"""Background health monitoring and circuit breaking for the rule engine."""
+
+import asyncio
+import os
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.log import get_logger
+
+# Seconds between two background probes of the rule engine
+RE_HEALTH_INTERVAL = float(os.environ.get("RULE_ENGINE_HEALTH_INTERVAL", "5.0"))
+# Consecutive failures (probes or real calls) opening the circuit
+RE_FAILURE_THRESHOLD = int(os.environ.get("RULE_ENGINE_FAILURE_THRESHOLD", "3"))
+# Seconds the circuit stays open before letting a trial call through
+RE_RESET_TIMEOUT = float(os.environ.get("RULE_ENGINE_RESET_TIMEOUT", "10.0"))
+
+logger = get_logger(__name__)
+
+
+class CircuitState(str, Enum):
+    """State of the circuit breaker in front of the rule engine."""
+    CLOSED = "closed"         # calls go through
+    OPEN = "open"             # calls fail fast
+    HALF_OPEN = "half_open"   # one trial call is let through
+
+
+class RuleEngineHealthMonitor:
+    """
+    Tracks rule engine availability without adding a status call to each request.
+
+    Availability is learnt from periodic probes run by a background task and from
+    passive signals reported by the client after each real call. Consecutive failures
+    open a circuit breaker so that handlers fail fast while the engine is down; once
+    the reset timeout has elapsed a single trial call is let through, and any success
+    (trial call or probe) closes the circuit again.
+    """
+
+    def __init__(self,
+                 probe: Callable[[], Awaitable[bool]],
+                 interval: float = RE_HEALTH_INTERVAL,
+                 failure_threshold: int = RE_FAILURE_THRESHOLD,
+                 reset_timeout: float = RE_RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self._probe = probe
+        self.interval = interval
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def available(self) -> bool:
+        """Whether the rule engine is believed to be up."""
+        return self.state == CircuitState.CLOSED
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently rejected, without consuming the half-open trial."""
+        if self.state == CircuitState.OPEN:
+            return self._clock() - self._opened_at < self.reset_timeout
+        if self.state == CircuitState.HALF_OPEN:
+            return self._trial_in_flight
+        return False
+
+    def allow_request(self) -> bool:
+        """Decide whether a call may go to the rule engine."""
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.OPEN:
+            if self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._trial_in_flight = False
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Report a successful call or probe."""
+        self.last_success = self._clock()
+        self.consecutive_failures = 0
+        self.state = CircuitState.CLOSED
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Report a failed call or probe (transport error, timeout or server error)."""
+        self.last_failure = self._clock()
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning("Rule Engine unavailable after %d failures, opening circuit", self.consecutive_failures)
+            self.state = CircuitState.OPEN
+            self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    async def probe_once(self) -> bool:
+        """Probe the rule engine now and record the outcome."""
+        try:
+            ok = await self._probe()
+        except Exception:
+            ok = False
+        if ok:
+            self.record_success()
+        else:
+            self.record_failure()
+        return ok
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.probe_once()
+
+    def start(self) -> None:
+        """Start the background probes. Calling it when already started is a no-op."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background probes."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state, as exposed by the health endpoint."""
+        now = self._clock()
+        return {
+            "available": self.available,
+            "circuit": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "seconds_since_success": None if self.last_success is None else round(now - self.last_success, 3),
+            "seconds_since_failure": None if self.last_failure is None else round(now - self.last_failure, 3),
+        }
@@ -0,0 +1,237 @@
+"""Streaming import of configurations from NDJSON or JSON array input."""
+
+import codecs
+import json
+import re
+from typing import Any, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.database import ConfigurationStore
+from app.models import ConfigurationCreate, ImportLineError, ImportResponse
+
+# Records validated before being inserted in one batch
+IMPORT_BATCH_SIZE = 500
+# Errors kept in the report, the following ones are only counted
+IMPORT_MAX_ERRORS = 100
+
+# Size in characters past which an array record that does not parse is reported as invalid
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+
+_SKIP_WHITESPACE = re.compile(r"[ \t\r\n]*").match
+# Bytes that are not valid UTF-8, as decoded by the surrogateescape error handler
+_INVALID_BYTES = re.compile("[\udc80-\udcff]").search
+
+
+class InvalidEncodingError(ValueError):
+    """Returned in place of a record whose text is not valid UTF-8."""
+
+
+class RecordParser:
+    """
+    Incremental parser yielding (line, record) pairs from chunks of NDJSON or of a JSON array.
+
+    The format is detected from the first non-whitespace character: '[' starts a JSON
+    array, anything else is read as one JSON document per line. Only the text of the
+    record being parsed is buffered. A record that is not valid JSON is returned as a
+    JSONDecodeError in place of the record; in an array there is no way to find the
+    next record after it, so parsing stops there. A record that is not valid UTF-8 is
+    returned as an InvalidEncodingError, and parsing goes on with the next one.
+    """
+
+    def __init__(self):
+        # Invalid bytes are kept as lone surrogates, to be reported with their record
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="surrogateescape")
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._line = 1          # line number of the start of the buffer
+        self._array: Optional[bool] = None
+        self._after_value = False
+        self._done = False
+
+    def feed(self, data: bytes) -> List[Tuple[int, Any]]:
+        """Parse a chunk and return the records it completes."""
+        self._buffer += self._decoder.decode(data)
+        return self._parse(final=False)
+
+    def close(self) -> List[Tuple[int, Any]]:
+        """Parse what remains once the input is exhausted."""
+        self._buffer += self._decoder.decode(b"", final=True)
+        return self._parse(final=True)
+
+    def _parse(self, final: bool) -> List[Tuple[int, Any]]:
+        if self._done:
+            return []
+        if self._array is None:
+            start = _SKIP_WHITESPACE(self._buffer).end()
+            if start == len(self._buffer):
+                return []
+            self._array = self._buffer[start] == "["
+            if self._array:
+                self._line += self._buffer.count("\n", 0, start)
+                self._buffer = self._buffer[start + 1:]
+        return self._parse_array(final) if self._array else self._parse_lines(final)
+
+    def _parse_lines(self, final: bool) -> List[Tuple[int, Any]]:
+        records = []
+        lines = self._buffer.split("\n")
+        # The last piece is an incomplete line until the input ends
+        self._buffer = "" if final else lines.pop()
+        for line in lines:
+            if line.strip():
+                if _INVALID_BYTES(line):
+                    records.append((self._line, InvalidEncodingError("Invalid UTF-8")))
+                    self._line += 1
+                    continue
+                try:
+                    records.append((self._line, json.loads(line)))
+                except json.JSONDecodeError as e:
+                    records.append((self._line, e))
+            self._line += 1
+        return records
+
+    def _parse_array(self, final: bool) -> List[Tuple[int, Any]]:
+        records = []
+        buffer, pos = self._buffer, 0
+        line, counted = self._line, 0
+        while True:
+            pos = _SKIP_WHITESPACE(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._done = True
+                break
+            if buffer[pos] == "," and self._after_value:
+                pos += 1
+                self._after_value = False
+                continue
+            line += buffer.count("\n", counted, pos)
+            counted = pos
+            try:
+                record, end = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Incomplete until more input arrives, unless it can no longer be a record
+                if final or len(buffer) - pos > MAX_RECORD_SIZE:
+                    records.append((self._line + e.lineno - 1, e))
+                    self._done = True
+                break
+            if end == len(buffer) and not final and not isinstance(record, (dict, list)):
+                # A scalar at the end of the buffer may continue in the next chunk
+                break
+            if _INVALID_BYTES(buffer, pos, end):
+                record = InvalidEncodingError("Invalid UTF-8")
+            records.append((line, record))
+            pos = end
+            self._after_value = True
+        self._line = line + buffer.count("\n", counted, pos)
+        self._buffer = buffer[pos:]
+        if final and not self._done:
+            records.append((self._line, json.JSONDecodeError("Unterminated JSON array", buffer, pos)))
+            self._done = True
+        return records
+
+
+class ConfigurationImporter:
+    """
+    Validates records against ConfigurationCreate as they are parsed and inserts them in batches.
+
+    Feed it the input chunk by chunk, then call finish() to flush the last batch and
+    get the report. Invalid records are reported with their line number and skipped.
+
+    Callers on an event loop split the work instead: parse() each chunk, then close(),
+    and insert() the batches returned by take_batches() off the loop; report() gives
+    the result.
+    """
+
+    def __init__(self,
+                 database: ConfigurationStore,
+                 batch_size: int = IMPORT_BATCH_SIZE,
+                 max_errors: int = IMPORT_MAX_ERRORS):
+        self.database = database
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self._parser = RecordParser()
+        self._pending: List[ConfigurationCreate] = []
+        self._batches: List[List[ConfigurationCreate]] = []
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[ImportLineError] = []
+
+    def feed(self, data: bytes) -> None:
+        """Import the records completed by a chunk of input."""
+        self.parse(data)
+        self._insert_batches()
+
+    def finish(self) -> ImportResponse:
+        """Import the remaining records and return the report."""
+        self.close()
+        self._insert_batches()
+        return self.report()
+
+    def parse(self, data: bytes) -> None:
+        """Validate the records completed by a chunk of input, without inserting them."""
+        self._add(self._parser.feed(data))
+
+    def close(self) -> None:
+        """Validate the remaining records once the input is exhausted, the last batch becomes ready."""
+        self._add(self._parser.close())
+        if self._pending:
+            self._batches.append(self._pending)
+            self._pending = []
+
+    def take_batches(self) -> List[List[ConfigurationCreate]]:
+        """The batches ready to be inserted, removed from the importer."""
+        batches, self._batches = self._batches, []
+        return batches
+
+    def insert(self, batch: List[ConfigurationCreate]) -> None:
+        """Insert a batch returned by take_batches()."""
+        self.database.create_configurations(batch)
+        self.imported += len(batch)
+
+    def report(self) -> ImportResponse:
+        """The report of the import."""
+        return ImportResponse(
+            imported=self.imported,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors)
+        )
+
+    def _add(self, records: List[Tuple[int, Any]]) -> None:
+        for line, record in records:
+            if isinstance(record, json.JSONDecodeError):
+                self._error(line, f"Invalid JSON: {record.msg}")
+                continue
+            if isinstance(record, InvalidEncodingError):
+                self._error(line, str(record))
+                continue
+            try:
+                self._pending.append(ConfigurationCreate.model_validate(record))
+            except ValidationError as e:
+                self._error(line, "; ".join(
+                    f"{'.'.join(str(loc) for loc in error['loc']) or 'record'}: {error['msg']}" for error in e.errors()))
+                continue
+            if len(self._pending) >= self.batch_size:
+                self._batches.append(self._pending)
+                self._pending = []
+
+    def _error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(ImportLineError(line=line, error=message))
+
+    def _insert_batches(self) -> None:
+        for batch in self.take_batches():
+            self.insert(batch)
+
+
+def import_configurations(database: ConfigurationStore,
+                          chunks: Iterable[bytes],
+                          batch_size: int = IMPORT_BATCH_SIZE,
+                          max_errors: int = IMPORT_MAX_ERRORS) -> ImportResponse:
+    """Import configurations from an iterable of byte chunks."""
+    importer = ConfigurationImporter(database, batch_size=batch_size, max_errors=max_errors)
+    for chunk in chunks:
+        importer.feed(chunk)
+    return importer.finish()
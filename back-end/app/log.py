@@ -0,0 +1,128 @@
+"""Logging for the application: level-gated, request-correlated and cheap when disabled.
+
+Every module logs through get_logger(__name__), under the "app" logger configured by
+configure_logging(). Messages use %-style arguments, which are only formatted when
+the level is enabled. Payload dumps go through debug_payload(), which skips the
+encoding entirely unless debug logging is on, samples them with LOG_PAYLOAD_SAMPLE_RATE
+and truncates them to LOG_PAYLOAD_MAX_CHARS.
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Optional
+
+# Level of the application loggers, e.g. DEBUG to log the rule engine payloads
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# "text" for people, "json" for log collectors (one JSON object per line)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+# Share of the debug payload dumps that are actually logged
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+# Characters of a payload dump kept in the log, the rest is elided
+LOG_PAYLOAD_MAX_CHARS = int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", "4096"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Correlation id of the request being handled, "-" outside of requests
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger of an application module."""
+    return logging.getLogger(name)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the correlation id of the current request to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = LOG_LEVEL, format: str = LOG_FORMAT) -> None:
+    """Set up the handler of the application loggers. Calling it again replaces the previous setup."""
+    handler = logging.StreamHandler(sys.stderr)
+    handler.addFilter(RequestIdFilter())
+    if format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+    logger = logging.getLogger("app")
+    for previous in list(logger.handlers):
+        logger.removeHandler(previous)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def debug_payload(logger: logging.Logger, message: str, payload: Any) -> None:
+    """Log a payload at debug level, encoding it only if the record is going to be emitted."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if LOG_PAYLOAD_SAMPLE_RATE < 1.0 and random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    # Imported on use, app.serialization depends on modules that log
+    from app.serialization import dumps
+    text = dumps(payload).decode()
+    if len(text) > LOG_PAYLOAD_MAX_CHARS:
+        text = f"{text[:LOG_PAYLOAD_MAX_CHARS]}... ({len(text) - LOG_PAYLOAD_MAX_CHARS} more characters)"
+    logger.debug("%s: %s", message, text)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware giving each request a correlation id, taken from X-Request-ID or generated.
+
+    The id is available to the loggers for the duration of the request and echoed in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = _header(scope, b"x-request-id") or uuid.uuid4().hex
+        header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [header]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            # Keep ids printable and bounded, they end up in every log line of the request
+            text = value.decode("latin-1")[:128]
+            return text if text.isprintable() and text.strip() else None
+    return None
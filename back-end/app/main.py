@@ -1,11 +1,16 @@
 """FastAPI application for SaaS Configurator."""
 
-from fastapi import FastAPI, HTTPException, Query, Path
+from fastapi import FastAPI, HTTPException, Query, Path, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, Optional, List, Literal, Awaitable, Tuple, TypeVar
+import asyncio
 import math
+import os
+import zlib
+from datetime import datetime
 from contextlib import asynccontextmanager
-import requests
 
 from app.models import (
     Configuration, 
@@ -13,38 +18,126 @@ from app.models import (
     ConfigurationUpdate, 
     ConfigurationResponse,
     ConfigurationListResponse,
-    ConfigurationStatus
+    ConfigurationStatus,
+    ConfigurationBulkCreate,
+    ConfigurationBulkUpdate,
+    ConfigurationBulkDelete,
+    BulkItemResult,
+    BulkResponse,
+    ImportResponse,
+    AnswersRequest,
+    AnswersResponse
 )
-from app.database import db, seed_test_data
-from app.re_client import RuleEngineClient, OPERATION_PAYLOAD_API_URL
+from app.database import db, seed_test_data, ConfigurationConflictError, ConfigurationStoreBusyError
+from app.conditional import configuration_etag, list_etag, none_match, match
+from app.export import NDJSON_MEDIA_TYPE, ndjson_chunks, gzip_chunks
+from app.importer import ConfigurationImporter, IMPORT_BATCH_SIZE
+from app.log import RequestIdMiddleware, REQUEST_ID_HEADER, configure_logging, debug_payload, get_logger
+from app.metrics import (REGISTRY, PROMETHEUS_MEDIA_TYPE, MetricsMiddleware, STORE_QUERY_DURATION,
+                         SERIALIZATION_DURATION)
+from app.serialization import configuration_bytes, configuration_list_bytes, dumps
+from app.sessions import AnswerError, apply_answers, merge_patch
+from app.operations import Operation
+from app.offload import offloader
+from app.re_client import (AsyncRuleEngineClient, ConfigResponse, RuleEngineUnavailableError,
+                           invalidate_initial_payloads, operation_registry)
+from app.workers import StoreEventFollower, WEB_CONCURRENCY
+
+# Maximum number of rule engine configurations run concurrently by one bulk request
+BULK_CONCURRENCY = int(os.environ.get("BULK_CONCURRENCY", "16"))
+
+T = TypeVar("T")
+
+configure_logging()
+logger = get_logger(__name__)
+
+# Propagates per-worker cache invalidations to the other workers sharing the store
+store_events = StoreEventFollower(db, {"invalidate_initial_payloads": invalidate_initial_payloads})
+
+# Values computed when the metrics are scraped
+REGISTRY.collect("configurations", "Configurations in the store.", "gauge",
+                 lambda: [({}, db.count_configurations())])
+REGISTRY.collect("configuration_store_version", "Write counter of the store.", "gauge",
+                 lambda: [({}, db.version)])
+REGISTRY.collect("rule_engine_available", "Whether a rule engine endpoint is considered available (1) or not (0).",
+                 "gauge", lambda: [({"endpoint": client.url}, int(client.health.available))
+                                   for client in AsyncRuleEngineClient.instances()])
+REGISTRY.collect("rule_engine_coalesced_calls", "Rule engine calls that joined an identical call in flight.",
+                 "counter", lambda: [({"endpoint": client.url}, client.coalesced_calls)
+                                     for client in AsyncRuleEngineClient.instances()])
+
+
+def _replica_samples(value):
+    def collect():
+        return [({"endpoint": client.url, "replica": replica["url"]}, value(replica))
+                for client in AsyncRuleEngineClient.instances() for replica in client.pool.snapshot()]
+    return collect
+
+
+REGISTRY.collect("rule_engine_replica_outstanding", "Calls in flight on each rule engine replica.", "gauge",
+                 _replica_samples(lambda replica: replica["outstanding"]))
+REGISTRY.collect("rule_engine_replica_latency_seconds", "Average (EWMA) call latency of each rule engine replica.",
+                 "gauge", _replica_samples(lambda replica: (replica["latency_ms"] or 0) / 1e3))
+REGISTRY.collect("rule_engine_replica_ejected", "Whether a rule engine replica is ejected after consecutive failures.",
+                 "gauge", _replica_samples(lambda replica: int(replica["ejected"])))
+
+
+async def _store(call: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Result of a store call, made in the threadpool when the store is shared with other workers.
+
+    A write to a shared store may wait for the lock of another worker, which must not block the
+    event loop. A store still busy after its timeout is answered with 503.
+    """
+    try:
+        if db.shared:
+            return await run_in_threadpool(call, *args, **kwargs)
+        return call(*args, **kwargs)
+    except ConfigurationStoreBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+def _rule_engine(cluster_type: Optional[str]) -> Tuple[AsyncRuleEngineClient, Operation]:
+    """Operation configuring a cluster type, and the client of the endpoint serving it."""
+    operation = operation_registry.resolve(cluster_type)
+    return AsyncRuleEngineClient.get_instance(operation.url), operation
 
 
 @asynccontextmanager
 async def lifespan(app):
     """Initialize the database and rule engine client on startup, using the FastAPI lifespan context."""
-    print("\nStarting SaaS Configurator API...")
+    logger.info("Starting SaaS Configurator API...")
 
     # Initialize database
+    if WEB_CONCURRENCY > 1 and not db.shared:
+        logger.warning("Several workers with a process-local store, each worker has its own configurations! "
+                       "Use CONFIG_STORE=sqlite")
     seed_test_data(db)
-    print("Database initialized and ready!")
+    store_events.start()
+    logger.info("Database initialized and ready!")
 
-    # Initialize Rule Engine Client
-    #APP_PATH1= "/Configuration/apps/cluster-config-demo/1.0.0"
-    #OPERATION1 = "demo.config.configureKafkaCluster"
+    # Initialize a Rule Engine Client per endpoint serving the registered operations
+    re_clients = [AsyncRuleEngineClient.get_instance(url) for url in operation_registry.urls]
+    for re_client in re_clients:
+        try:
+            await re_client.open()
+            if await re_client.health.probe_once():
+                logger.info("Rule Engine %s connected and ready!", re_client.url)
+            else:
+                logger.warning("Rule Engine server %s is not responding!", re_client.url)
+        except Exception as e:
+            logger.warning("Failed to initialize Rule Engine client %s: %s", re_client.url, e)
 
-    #APP_PATH2= "/Insurance/apps/accident-claim-declaration/1.0.0"
-    #OPERATION2 = "smartinsure.claimdeclaration.refreshQuestionnaire"
-    try:
-        RuleEngineClient.initialize()
-        re_client = RuleEngineClient.get_instance()
-        if re_client.check_server_status():
-            print("Rule Engine connected and ready!")
-        else:
-            print("Warning: Rule Engine server is not responding!")
-    except Exception as e:
-        print(f"Warning: Failed to initialize Rule Engine client: {e}")
+        # Keep track of the rule engine availability in the background
+        re_client.health.start()
     yield
 
+    # Stop the health monitors and release the rule engine connection pools
+    for re_client in re_clients:
+        await re_client.health.stop()
+    await AsyncRuleEngineClient.close_instance()
+    await store_events.stop()
+    offloader.shutdown()
+
 # Create FastAPI application
 app = FastAPI(
     title="SaaS Configurator",
@@ -77,7 +170,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", REQUEST_ID_HEADER],
 )
+app.add_middleware(RequestIdMiddleware)
+# Outermost, so that the timings include the other middlewares
+app.add_middleware(MetricsMiddleware)
+
+# Clients keep responses but revalidate them with If-None-Match on each use
+REVALIDATE = "no-cache"
 
 
 @app.get("/", summary="Root endpoint")
@@ -93,26 +193,91 @@ async def root():
     "/configurations/",
     response_model=ConfigurationListResponse,
     summary="List configurations",
-    description="Retrieve a paginated list of configurations with optional filtering."
+    description="Retrieve a paginated list of configurations with optional filtering. "
+                "Pages are addressed either by offset (skip) or by the opaque next_cursor of the previous page."
 )
 async def list_configurations(
     skip: int = Query(0, ge=0, description="Number of configurations to skip"),
     limit: int = Query(10, ge=1, le=100, description="Maximum number of configurations to return"),
     status: Optional[ConfigurationStatus] = Query(None, description="Filter by configuration status"),
     cluster_type: Optional[str] = Query(None, description="Filter by cluster type"),
+    tag: Optional[str] = Query(None, description="Filter by tag"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page, replaces skip"),
+    order_by: Literal["id", "updated_at"] = Query("id", description="Ordering of the configurations"),
+    include_total: bool = Query(True, description="Compute total and pages, disable when only scrolling"),
+    if_none_match: Optional[str] = Header(None, description="ETag of the copy held by the client"),
 ):
     """List all cluster configurations with pagination and filtering."""
-    configurations = db.get_configurations(skip=skip, limit=limit, status=status, cluster_type=cluster_type)
-    total = db.count_configurations(status=status, cluster_type=cluster_type)
-    pages = math.ceil(total / limit) if total > 0 else 1
+    # Unchanged as long as the store has not been written to
+    version = await _store(lambda: db.version)
+    etag = list_etag(version, skip=skip, limit=limit, status=status, cluster_type=cluster_type, tag=tag,
+                     cursor=cursor, order_by=order_by, include_total=include_total)
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+    if none_match(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if cursor:
+        try:
+            with STORE_QUERY_DURATION.time("page"):
+                configurations, next_cursor = await _store(
+                    db.get_stored_configurations_page,
+                    limit=limit, cursor=cursor, order_by=order_by, status=status, cluster_type=cluster_type, tag=tag)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+        page = None
+    else:
+        # Fetch one extra configuration to know whether there is a next page
+        with STORE_QUERY_DURATION.time("list"):
+            configurations = await _store(
+                db.get_stored_configurations,
+                skip=skip, limit=limit + 1, status=status, cluster_type=cluster_type, tag=tag, order_by=order_by)
+        next_cursor = None
+        if len(configurations) > limit:
+            configurations = configurations[:limit]
+            next_cursor = db.cursor_after(configurations[-1], order_by)
+        page = (skip // limit) + 1
+
+    total = None
+    pages = None
+    if include_total:
+        with STORE_QUERY_DURATION.time("count"):
+            total = await _store(db.count_configurations, status=status, cluster_type=cluster_type, tag=tag)
+        pages = math.ceil(total / limit) if total > 0 else 1
     
-    return ConfigurationListResponse(
-        items=configurations,
-        total=total,
-        page=(skip // limit) + 1,
-        size=limit,
-        pages=pages
-    )
+    # Stored configurations are already valid, encode them directly instead of through the response model
+    with SERIALIZATION_DURATION.time("list"):
+        content = configuration_list_bytes(
+            configurations,
+            total=total,
+            page=page,
+            size=limit,
+            pages=pages,
+            next_cursor=next_cursor
+        )
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+@app.get(
+    "/configurations/export",
+    summary="Export configurations",
+    description="Stream every configuration matching the filters as newline-delimited JSON, "
+                "one configuration per line, optionally gzip compressed."
+)
+def export_configurations(
+    status: Optional[ConfigurationStatus] = Query(None, description="Filter by configuration status"),
+    cluster_type: Optional[str] = Query(None, description="Filter by cluster type"),
+    tag: Optional[str] = Query(None, description="Filter by tag"),
+    gzip: bool = Query(False, description="Gzip compress the stream"),
+    batch_size: int = Query(500, ge=1, le=10000, description="Configurations read from the store at a time"),
+) -> StreamingResponse:
+    """Export cluster configurations as NDJSON."""
+    chunks = ndjson_chunks(db.iter_stored_configurations(
+        status=status, cluster_type=cluster_type, tag=tag, batch_size=batch_size))
+    headers = {"Content-Disposition": 'attachment; filename="configurations.ndjson"'}
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE, headers=headers)
 
 
 @app.get(
@@ -122,42 +287,65 @@ async def list_configurations(
     description="Retrieve a specific configuration by its ID."
 )
 async def get_configuration(
-    config_id: int = Path(..., gt=0, description="The ID of the configuration to retrieve")
+    config_id: int = Path(..., gt=0, description="The ID of the configuration to retrieve"),
+    if_none_match: Optional[str] = Header(None, description="ETag of the copy held by the client"),
 ):
     """Get a specific cluster configuration by ID."""
-    config = db.get_configuration(config_id)
+    # Not decoded: the ETag and a cached encoding only need its id and updated_at
+    config = await _store(db.get_stored_configuration, config_id)
     if not config:
         raise HTTPException(status_code=404, detail="Configuration not found")
-    return config
+    headers = {"ETag": configuration_etag(config), "Cache-Control": REVALIDATE}
+    if none_match(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    with SERIALIZATION_DURATION.time("get"):
+        content = configuration_bytes(config)
+    return Response(content=content, media_type="application/json", headers=headers)
 
 
 
-@app.post(
-    "/configurations/",
-    response_model=ConfigurationResponse,
-    status_code=201,
-    summary="Create a new configuration",
-    description="Create a new cluster configuration with the provided data."
-)
-async def create_configuration(config: ConfigurationCreate) -> ConfigurationResponse:
-    """Create a new cluster configuration. this is to trigger the rule engine configuration process."""
+async def _stored_data(rule_response: Any) -> Any:
+    """The rule engine response as the plain JSON data stored in configuration_data.
+
+    Large responses are converted by the offload executor rather than by the store encoder on the event loop.
+    """
+    if not isinstance(rule_response, ConfigResponse):
+        return rule_response
+    return await offloader.run("dump_config_response", rule_response.source_size,
+                               rule_response.model_dump, mode="json")
+
+
+def _response_size(rule_response: Any) -> int:
+    return rule_response.source_size if isinstance(rule_response, ConfigResponse) else 0
+
+
+async def _configuration_response(config: Configuration, size: int, status_code: int = 200,
+                                  headers: Optional[Dict[str, str]] = None):
+    """The configuration itself, or its encoding by the offload executor when its rule engine response was large."""
+    if not offloader.should_offload(size):
+        return config
+    content = await offloader.run("serialize_configuration", size, configuration_bytes, config)
+    return Response(content=content, status_code=status_code, media_type="application/json", headers=headers)
+
+
+async def _configure_new_configuration(config: ConfigurationCreate) -> int:
+    """Run the rule engine configuration process of a new configuration, with the operation of its cluster type.
+
+    The rule engine response is stored in config.configuration_data, and its size in bytes (0 if unknown) returned.
+    Failures are raised as HTTPException.
+    """
     try:
 
-        # Get rule engine instance
-        re_client = RuleEngineClient.get_instance()
+        # Get the rule engine instance serving the operation of the cluster type
+        re_client, operation = _rule_engine(config.cluster_type)
 
-        
-        payload_url = OPERATION_PAYLOAD_API_URL
-         
-        # Make request to inference engine
-        response = requests.get(payload_url) #, headers=self.headers)
-        if not response.ok:
-            raise Exception(f"get initial_payload request failed: {response.status_code}")
-            
-        resp_json = response.json()        
-        input_dict = resp_json.get('payload')
-        print("input_dict: ", input_dict)
-        #print("input_dict: ", input_dict.model_dump_json(indent=2))
+        # Fail fast while the rule engine is known to be down
+        if re_client.health.is_open:
+            raise HTTPException(status_code=503, detail="Rule Engine service is unavailable")
+
+        # Get the starting payload of the operation from the inference engine
+        input_dict = await re_client.initial_payload(operation=operation)
+        debug_payload(logger, "Initial payload", input_dict)
 
         # input_dict = {
         #     "the customer request": {
@@ -170,28 +358,233 @@ async def create_configuration(config: ConfigurationCreate) -> ConfigurationResp
             
         try:
             # Configure through rule engine
-            rule_response = re_client.configure(
+            rule_response = await re_client.configure(
                 input_dict=input_dict,
                 lang="en",
+                operation=operation,
             )
             
             # Update config with rule engine results
-            config.configuration_data = rule_response
+            config.configuration_data = await _stored_data(rule_response)
+            return _response_size(rule_response)
             
+        except RuleEngineUnavailableError as re_error:
+            raise HTTPException(status_code=503, detail=str(re_error))
         except Exception as re_error:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Rule Engine configuration failed: {str(re_error)}"
             )
         
-        # Create configuration in database
-        created_config = db.create_configuration(config)
-        return created_config
+    except HTTPException:
+        raise
+    except RuleEngineUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error creating configuration: {str(e)}")
+
+
+async def _configure_configuration_update(config_update: ConfigurationUpdate, lang: str = "en",
+                                          cluster_type: Optional[str] = None) -> int:
+    """Run the rule engine on the payload of a configuration update, with the operation of the cluster type.
+
+    The rule engine response replaces config_update.configuration_data, and its size in bytes (0 if unknown) is
+    returned. Failures are raised as HTTPException.
+    """
+    # Get the rule engine instance serving the operation of the cluster type
+    re_client, operation = _rule_engine(config_update.cluster_type or cluster_type)
+    
+    # Fail fast while the rule engine is known to be down
+    if re_client.health.is_open:
+        raise HTTPException(status_code=503, detail="Rule Engine service is unavailable")
+        
+    try:
+        # Configure through rule engine
+        rule_config = await re_client.configure(
+            input_dict=config_update.configuration_data['payload'],
+            lang=lang,
+            operation=operation,
+        )
+        
+        # Update config with rule engine results
+        config_update.configuration_data = await _stored_data(rule_config)
+        return _response_size(rule_config)
         
+    except RuleEngineUnavailableError as re_error:
+        raise HTTPException(status_code=503, detail=str(re_error))
+    except Exception as re_error:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Rule Engine configuration failed: {str(re_error)}"
+        )
+
+
+async def _gather_bounded(coros: List[Awaitable[None]]) -> List[Optional[BaseException]]:
+    """Run the coroutines with at most BULK_CONCURRENCY at a time, returning the exception of each (None on success)."""
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def run(coro: Awaitable[None]) -> None:
+        async with semaphore:
+            await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=True)
+
+
+def _failed_item(index: int, config_id: Optional[int], error: BaseException) -> BulkItemResult:
+    if isinstance(error, HTTPException):
+        return BulkItemResult(index=index, id=config_id, status_code=error.status_code, error=str(error.detail))
+    return BulkItemResult(index=index, id=config_id, status_code=400, error=str(error))
+
+
+def _bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    succeeded = sum(1 for result in results if result.status_code < 400)
+    return BulkResponse(items=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
+@app.post(
+    "/configurations/import",
+    response_model=ImportResponse,
+    summary="Import configurations",
+    description="Create configurations from a request body holding NDJSON (one configuration per line) "
+                "or a JSON array. The body is parsed as it is received, each record is validated on its own "
+                "and valid records are inserted in batches; invalid records are reported with their line."
+)
+async def import_configurations(
+    request: Request,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000, description="Configurations inserted at a time"),
+) -> ImportResponse:
+    """Import cluster configurations without rule engine processing."""
+    importer = ConfigurationImporter(db, batch_size=batch_size)
+
+    async def insert_batches() -> None:
+        # Batch inserts may wait for the store lock, run them off the event loop
+        for batch in importer.take_batches():
+            try:
+                await run_in_threadpool(importer.insert, batch)
+            except ConfigurationStoreBusyError as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    # Accept the gzip stream produced by the export endpoint
+    decompressor = None
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        async for chunk in request.stream():
+            importer.parse(decompressor.decompress(chunk) if decompressor else chunk)
+            await insert_batches()
+        if decompressor:
+            importer.parse(decompressor.flush())
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid gzip body: {str(e)}")
+    importer.close()
+    await insert_batches()
+    return importer.report()
+
+
+@app.post(
+    "/configurations/bulk",
+    response_model=BulkResponse,
+    summary="Create configurations in bulk",
+    description="Create several configurations in one request. Rule engine configuration runs concurrently "
+                "and the successful configurations are stored in one batch; each item gets its own result."
+)
+async def bulk_create_configurations(request: ConfigurationBulkCreate) -> BulkResponse:
+    """Create several cluster configurations."""
+    errors = await _gather_bounded([_configure_new_configuration(config) for config in request.items])
+
+    results: List[Optional[BulkItemResult]] = [
+        _failed_item(index, None, error) if error is not None else None for index, error in enumerate(errors)
+    ]
+    pending = [index for index, result in enumerate(results) if result is None]
+    try:
+        created = await _store(db.create_configurations, [request.items[index] for index in pending])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error creating configurations: {str(e)}")
+    for index, config in zip(pending, created):
+        results[index] = BulkItemResult(index=index, id=config.id, status_code=201, configuration=config)
+    return _bulk_response(results)
+
+
+@app.patch(
+    "/configurations/bulk",
+    response_model=BulkResponse,
+    summary="Update configurations in bulk",
+    description="Update several configurations in one request. Rule engine configuration runs concurrently "
+                "and the successful updates are applied in one batch; each item gets its own result."
+)
+async def bulk_update_configurations(request: ConfigurationBulkUpdate) -> BulkResponse:
+    """Update several cluster configurations."""
+    results: List[Optional[BulkItemResult]] = [None] * len(request.items)
+    updates = {}
+    cluster_types = {}
+    existing_configs = await _store(lambda: [db.get_configuration(item.id) for item in request.items])
+    for index, (item, existing_config) in enumerate(zip(request.items, existing_configs)):
+        if existing_config is None:
+            results[index] = BulkItemResult(index=index, id=item.id, status_code=404, error="Configuration not found")
+        else:
+            updates[index] = ConfigurationUpdate(**item.model_dump(exclude_unset=True, exclude={"id"}))
+            cluster_types[index] = existing_config.cluster_type
+
+    errors = await _gather_bounded([_configure_configuration_update(update, cluster_type=cluster_types[index])
+                                    for index, update in updates.items()])
+    for (index, _), error in zip(list(updates.items()), errors):
+        if error is not None:
+            results[index] = _failed_item(index, request.items[index].id, error)
+            del updates[index]
+
+    try:
+        updated = await _store(db.update_configurations,
+                               [(request.items[index].id, update) for index, update in updates.items()])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error updating configurations: {str(e)}")
+    for index, config in zip(updates, updated):
+        if config is None:
+            results[index] = BulkItemResult(index=index, id=request.items[index].id, status_code=404,
+                                            error="Configuration not found")
+        else:
+            results[index] = BulkItemResult(index=index, id=config.id, status_code=200, configuration=config)
+    return _bulk_response(results)
+
+
+@app.delete(
+    "/configurations/bulk",
+    response_model=BulkResponse,
+    summary="Delete configurations in bulk",
+    description="Delete several configurations in one request; each ID gets its own result."
+)
+async def bulk_delete_configurations(request: ConfigurationBulkDelete) -> BulkResponse:
+    """Delete several cluster configurations."""
+    deleted = await _store(db.delete_configurations, request.ids)
+    return _bulk_response([
+        BulkItemResult(index=index, id=config_id, status_code=204)
+        if success else
+        BulkItemResult(index=index, id=config_id, status_code=404, error="Configuration not found")
+        for index, (config_id, success) in enumerate(zip(request.ids, deleted))
+    ])
+
+
+@app.post(
+    "/configurations/",
+    response_model=ConfigurationResponse,
+    status_code=201,
+    summary="Create a new configuration",
+    description="Create a new cluster configuration with the provided data."
+)
+async def create_configuration(config: ConfigurationCreate) -> ConfigurationResponse:
+    """Create a new cluster configuration. this is to trigger the rule engine configuration process."""
+    size = await _configure_new_configuration(config)
+    try:
+        # Create configuration in database
+        created_config = await _store(db.create_configuration, config)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating configuration: {str(e)}")
+    return await _configuration_response(created_config, size, status_code=201)
 
 
 @app.put(
@@ -202,53 +595,102 @@ async def create_configuration(config: ConfigurationCreate) -> ConfigurationResp
 )
 async def update_configuration(
     config_update: ConfigurationUpdate,
-    config_id: int = Path(..., gt=0, description="The ID of the configuration to update")) -> ConfigurationResponse:
+    response: Response,
+    config_id: int = Path(..., gt=0, description="The ID of the configuration to update"),
+    if_match: Optional[str] = Header(None, description="Only update if the configuration still has this ETag")) -> ConfigurationResponse:
 
     """Update an existing cluster configuration."""
     try:
-        print("About to update configuration " + str(config_id))
-        print(config_update.model_dump_json(indent=2))
+        logger.info("Updating configuration %s", config_id)
+        debug_payload(logger, "Configuration update", config_update)
 
         # Check if configuration exists
-        existing_config = db.get_configuration(config_id)
+        existing_config = await _store(db.get_configuration, config_id)
         if not existing_config:
             raise HTTPException(status_code=404, detail="Configuration not found")
+        if not match(if_match, configuration_etag(existing_config)):
+            raise HTTPException(status_code=412, detail="Configuration was modified")
+        # The store checks the version again when writing, after the rule engine call
+        expected_updated_at = existing_config.updated_at if if_match else None
             
-        # Get rule engine instance
-        re_client = RuleEngineClient.get_instance()
-        
-        # Validate configuration through rule engine
-        if not re_client.check_server_status():
-            raise HTTPException(status_code=503, detail="Rule Engine service is unavailable")
-            
-        try:
-            # Configure through rule engine
-            rule_config = re_client.configure(
-                input_dict=config_update.configuration_data['payload'],
-                lang="en",
-            )
-            
-            # Update config with rule engine results
-            config_update.configuration_data = rule_config
-            
-        except Exception as re_error:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Rule Engine configuration failed: {str(re_error)}"
-            )
+        size = await _configure_configuration_update(config_update, cluster_type=existing_config.cluster_type)
         
         # Update configuration in database
-        updated_config = db.update_configuration(config_id, config_update)
+        updated_config = await _store(db.update_configuration, config_id, config_update,
+                                      expected_updated_at=expected_updated_at)
         if not updated_config:
             raise HTTPException(status_code=404, detail="Configuration not found")
-        return updated_config
+        response.headers["ETag"] = configuration_etag(updated_config)
+        return await _configuration_response(updated_config, size, headers={"ETag": response.headers["ETag"]})
         
+    except ConfigurationConflictError:
+        raise HTTPException(status_code=412, detail="Configuration was modified")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error updating configuration: {str(e)}")
 
 
+def _answers_content(payload: Dict[str, Any], session: Dict[str, Any], updated_at: datetime) -> bytes:
+    """Encoded answers response: the changes from payload to the new session payload and the new questions."""
+    questions = session["questions"]
+    return dumps({
+        "payload_diff": merge_patch(payload, session["payload"]),
+        "questions": questions,
+        "complete": not questions,
+        "updated_at": updated_at,
+    })
+
+
+@app.post(
+    "/configurations/{config_id}/answers",
+    response_model=AnswersResponse,
+    summary="Answer configuration questions",
+    description="Run one step of the interactive configuration: the answers, keyed by question path, are applied "
+                "to the stored payload and submitted to the rule engine. Only the payload changes, as a JSON merge "
+                "patch, and the new questions are returned."
+)
+async def answer_configuration_questions(
+    request: AnswersRequest,
+    config_id: int = Path(..., gt=0, description="The ID of the configuration being configured"),
+    if_match: Optional[str] = Header(None, description="Only apply the answers if the configuration still has this ETag"),
+):
+    """Apply answers to the pending questions of a configuration session."""
+    existing_config = await _store(db.get_configuration, config_id)
+    if not existing_config:
+        raise HTTPException(status_code=404, detail="Configuration not found")
+    if not match(if_match, configuration_etag(existing_config)):
+        raise HTTPException(status_code=412, detail="Configuration was modified")
+
+    session = existing_config.configuration_data or {}
+    payload = session.get("payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=409, detail="Configuration has no configuration session")
+    try:
+        answered = apply_answers(payload, session.get("questions") or [], request.answers,
+                                 app_name=session.get("appName"), app_version=session.get("appVersion"))
+    except AnswerError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    config_update = ConfigurationUpdate(configuration_data={"payload": answered})
+    size = await _configure_configuration_update(config_update, lang=request.lang,
+                                                 cluster_type=existing_config.cluster_type)
+
+    try:
+        # The answers were applied to this version, fail rather than overwrite a concurrent step
+        updated_config = await _store(db.update_configuration, config_id, config_update,
+                                      expected_updated_at=existing_config.updated_at)
+    except ConfigurationConflictError:
+        raise HTTPException(status_code=409, detail="Configuration was modified during the step, retry")
+    if not updated_config:
+        raise HTTPException(status_code=404, detail="Configuration not found")
+
+    content = await offloader.run("answers_response", size, _answers_content,
+                                  payload, config_update.configuration_data, updated_config.updated_at)
+    return Response(content=content, media_type="application/json",
+                    headers={"ETag": configuration_etag(updated_config)})
+
+
 @app.delete(
     "/configurations/{config_id}",
     status_code=204,
@@ -256,22 +698,74 @@ async def update_configuration(
     description="Delete a configuration by its ID."
 )
 async def delete_configuration(
-    config_id: int = Path(..., gt=0, description="The ID of the configuration to delete")
+    config_id: int = Path(..., gt=0, description="The ID of the configuration to delete"),
+    if_match: Optional[str] = Header(None, description="Only delete if the configuration still has this ETag"),
 ):
     """Delete a cluster configuration."""
-    success = db.delete_configuration(config_id)
+    expected_updated_at = None
+    if if_match is not None:
+        config = await _store(db.get_configuration, config_id)
+        if not config:
+            raise HTTPException(status_code=404, detail="Configuration not found")
+        if not match(if_match, configuration_etag(config)):
+            raise HTTPException(status_code=412, detail="Configuration was modified")
+        expected_updated_at = config.updated_at
+    try:
+        success = await _store(db.delete_configuration, config_id, expected_updated_at=expected_updated_at)
+    except ConfigurationConflictError:
+        raise HTTPException(status_code=412, detail="Configuration was modified")
     if not success:
         raise HTTPException(status_code=404, detail="Configuration not found")
 
 
+@app.delete(
+    "/rule-engine/cache/initial-payloads",
+    summary="Invalidate cached initial payloads",
+    description="Drop the cached initial payloads of the rule engine operations, e.g. after deploying a new app version."
+)
+async def invalidate_initial_payload_cache(
+    app_path: Optional[str] = Query(None, description="App path without version, e.g. Configuration/apps/cluster-config-demo"),
+    app_version: Optional[str] = Query(None, description="App version, e.g. 1.0.0"),
+):
+    """Invalidate cached initial payloads, in every worker."""
+    return {"invalidated": store_events.broadcast(
+        "invalidate_initial_payloads", app_path=app_path, app_version=app_version)}
+
+
+@app.get(
+    "/rule-engine/operations",
+    summary="Rule engine operations",
+    description="The rule engine operation configuring each cluster type, and the default operation for the others."
+)
+async def list_rule_engine_operations():
+    """Operations configurations are routed to."""
+    return operation_registry.describe()
+
+
 @app.get(
     "/health",
     summary="Health check",
     description="Check the health status of the API."
 )
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "service": "saas-configurator"}
+    """Health check endpoint, including the last known state of the rule engine endpoints."""
+    return {
+        "status": "healthy",
+        "service": "saas-configurator",
+        "rule_engine": AsyncRuleEngineClient.get_instance(operation_registry.default.url).health.snapshot(),
+        "rule_engines": {client.url: {**client.health.snapshot(), "replicas": client.pool.snapshot()}
+                         for client in AsyncRuleEngineClient.instances()}
+    }
+
+
+@app.get(
+    "/metrics",
+    summary="Metrics",
+    description="Request, rule engine, cache and store metrics of this worker, in the Prometheus text format."
+)
+def metrics() -> Response:
+    """Prometheus metrics endpoint."""
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_MEDIA_TYPE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+Counters and histograms are updated on the hot paths with a lock and a bisect, and
+collectors compute the remaining values (cache statistics, store size) only when
+the metrics are scraped. Each worker process exposes its own metrics.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.log import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds, from a cache hit to a slow rule engine call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (suffix, label values, value) samples produced by a metric or a collector
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """Base class of the metrics, holding one value set per combination of label values."""
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, values))
+
+    @abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """Current (suffix, labels, value) samples of the metric."""
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield "_total", self._labels(labelvalues), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets, with their count and sum."""
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        """Observe the duration of the block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def count(self, *labelvalues: str) -> int:
+        entry = self._values.get(labelvalues)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self._values.items()]
+        for labelvalues, counts, total in values:
+            labels = self._labels(labelvalues)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield "_bucket", labels + (("le", _format_value(bound)),), cumulative
+            yield "_count", labels, cumulative
+            yield "_sum", labels, total
+
+
+class Collected(Metric):
+    """Metric whose samples are computed by a callback at scrape time, e.g. a gauge."""
+
+    def __init__(self, name: str, help: str, type: str,
+                 collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        super().__init__(name, help)
+        self.type = type
+        self._collect = collect
+
+    def samples(self) -> Iterable[Sample]:
+        suffix = "_total" if self.type == "counter" else ""
+        for labels, value in self._collect():
+            yield suffix, tuple(labels.items()), value
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collect(self, name: str, help: str, type: str = "gauge",
+                collect: Optional[Callable[[], Iterable[Tuple[Dict[str, str], float]]]] = None) -> Collected:
+        return self.register(Collected(name, help, type, collect))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                logger.warning("Failed to collect metric %s: %s", metric.name, e)
+                continue
+            # Counter families are named after their samples, as the Prometheus client libraries do
+            family = metric.name + "_total" if metric.type == "counter" else metric.name
+            lines.append(f"# HELP {family} {metric.help}")
+            lines.append(f"# TYPE {family} {metric.type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{name}="{_escape(str(label))}"' for name, label in labels)
+                lines.append(f"{metric.name}{suffix}{{{label_text}}} {_format_value(value)}" if label_text
+                             else f"{metric.name}{suffix} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metrics updated on the hot paths
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests by route template.",
+    ("method", "route", "status"))
+RULE_ENGINE_REQUEST_DURATION = REGISTRY.histogram(
+    "rule_engine_request_duration_seconds", "Duration of the calls sent to the rule engine.",
+    ("call", "operation"))
+RULE_ENGINE_ERRORS = REGISTRY.counter(
+    "rule_engine_errors", "Rule engine calls that failed, by reason (transport, server_error, circuit_open).",
+    ("call", "operation", "reason"))
+RULE_ENGINE_HEDGED_REQUESTS = REGISTRY.counter(
+    "rule_engine_hedged_requests", "Rule engine calls also sent to a second replica, by the request answering first.",
+    ("call", "operation", "winner"))
+STORE_QUERY_DURATION = REGISTRY.histogram(
+    "configuration_store_query_duration_seconds", "Duration of the store queries issued by the list endpoints.",
+    ("query",))
+STORE_SCANNED_KEYS = REGISTRY.counter(
+    "configuration_store_scanned_keys", "Sort keys read by the in-memory store list scans.")
+SERIALIZATION_DURATION = REGISTRY.histogram(
+    "response_serialization_duration_seconds", "Duration of the encoding of configuration responses.",
+    ("route",))
+
+
+# Caches whose statistics are exported, by name
+_caches: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """Export the hit, miss and eviction counts and the size of an LRUCache under the given name."""
+    _caches[name] = cache
+
+
+def _cache_samples(field: str) -> Callable[[], Iterable[Tuple[Dict[str, str], float]]]:
+    def collect():
+        for name, cache in list(_caches.items()):
+            yield {"cache": name}, getattr(cache.stats, field)
+    return collect
+
+
+REGISTRY.collect("cache_hits", "Cache lookups answered from the cache.", "counter", _cache_samples("hits"))
+REGISTRY.collect("cache_misses", "Cache lookups not answered from the cache.", "counter", _cache_samples("misses"))
+REGISTRY.collect("cache_evictions", "Entries evicted to keep the caches within bounds.", "counter",
+                 _cache_samples("evictions"))
+REGISTRY.collect("cache_entries", "Entries held by the caches.", "gauge", _cache_samples("entries"))
+REGISTRY.collect("cache_size_bytes", "Size of the entries held by the caches, as given on put.", "gauge",
+                 _cache_samples("size_bytes"))
+REGISTRY.collect("cache_hit_ratio", "Share of the cache lookups answered from the cache.", "gauge",
+                 _cache_samples("hit_ratio"))
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request, labelled with its route template rather than its path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route in the scope
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, scope["method"],
+                                          getattr(route, "path", "unmatched"), str(status))
@@ -58,7 +58,73 @@ class ConfigurationResponse(Configuration):
 class ConfigurationListResponse(BaseModel):
     """Model for paginated Configuration list responses."""
     items: list[ConfigurationResponse]
-    total: int
-    page: int = Field(default=1, ge=1)
+    total: Optional[int] = Field(None, description="Number of matching configurations, omitted when include_total is false")
+    page: Optional[int] = Field(default=1, ge=1, description="Page number, omitted in cursor mode")
     size: int = Field(default=10, ge=1, le=100)
-    pages: int
+    pages: Optional[int] = Field(None, description="Number of pages, omitted when include_total is false")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, null on the last page")
+
+
+class ConfigurationBulkCreate(BaseModel):
+    """Model for creating several configurations in one request."""
+    items: list[ConfigurationCreate] = Field(..., min_length=1, max_length=1000, description="Configurations to create")
+
+
+class ConfigurationBulkUpdateItem(ConfigurationUpdate):
+    """Model for one update of a bulk update request."""
+    id: int = Field(..., gt=0, description="ID of the configuration to update")
+
+
+class ConfigurationBulkUpdate(BaseModel):
+    """Model for updating several configurations in one request."""
+    items: list[ConfigurationBulkUpdateItem] = Field(..., min_length=1, max_length=1000, description="Updates to apply")
+
+
+class ConfigurationBulkDelete(BaseModel):
+    """Model for deleting several configurations in one request."""
+    ids: list[int] = Field(..., min_length=1, max_length=1000, description="IDs of the configurations to delete")
+
+
+class BulkItemResult(BaseModel):
+    """Outcome of one item of a bulk request."""
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[int] = Field(None, description="Configuration ID, when known")
+    status_code: int = Field(..., description="HTTP status the item would have had as a single request")
+    configuration: Optional[ConfigurationResponse] = None
+    error: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    """Model for bulk request responses, with one result per item in request order."""
+    items: list[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
+class ImportLineError(BaseModel):
+    """A record rejected by an import."""
+    line: int = Field(..., description="Line of the input where the record starts")
+    error: str
+
+
+class ImportResponse(BaseModel):
+    """Model for import reports."""
+    imported: int = Field(..., description="Number of configurations created")
+    failed: int = Field(..., description="Number of records rejected")
+    errors: list[ImportLineError] = Field(default_factory=list, description="Rejected records, capped")
+    errors_truncated: bool = Field(False, description="Whether some rejected records are not listed in errors")
+
+
+class AnswersRequest(BaseModel):
+    """Model for one step of an interactive configuration session."""
+    answers: Dict[str, Any] = Field(..., min_length=1,
+                                    description="Answers keyed by the path of the pending questions they answer")
+    lang: str = Field("en", description="Language of the next questions")
+
+
+class AnswersResponse(BaseModel):
+    """Model for the outcome of a session step, carrying only what changed."""
+    payload_diff: Dict[str, Any] = Field(..., description="JSON merge patch (RFC 7386) of the payload")
+    questions: list[Dict[str, Any]] = Field(..., description="Pending questions, replacing the previous ones")
+    complete: bool = Field(..., description="Whether every question has been answered")
+    updated_at: datetime = Field(..., description="Last update timestamp of the configuration")
@@ -0,0 +1,91 @@
+"""Offloading of CPU-bound post-processing of large rule engine responses.
+
+JSON decoding, question mapping and validation of a configure response, and the
+encoding of the resulting configuration, take time proportional to the size of
+the response and run without awaiting: on the event loop, a large response stalls
+every other request. Work on inputs of at least OFFLOAD_THRESHOLD_BYTES is sent
+to an executor instead, other work runs inline as the hop costs more than it saves.
+
+With the thread executor (default) the work still holds the GIL but the event loop
+gets it back at every switch interval, so other requests keep being served. The
+process executor runs the work in parallel, at the cost of pickling its arguments
+and result; the functions given must then be importable and their arguments picklable.
+
+Work sent to threads runs in a copy of the caller's context, so that its logs keep
+the request id. Child processes have their own context, logging and metrics: their
+logs carry no request id, and what they record (question_type_cache hits, ...) is
+not part of the parent's /metrics.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.metrics import REGISTRY
+
+T = TypeVar("T")
+
+# Executor of the offloaded work: thread, process, or none to run everything inline
+OFFLOAD_EXECUTOR = os.environ.get("OFFLOAD_EXECUTOR", "thread")
+OFFLOAD_MAX_WORKERS = int(os.environ.get("OFFLOAD_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Size, in bytes, from which the work on an input is offloaded
+OFFLOAD_THRESHOLD_BYTES = int(os.environ.get("OFFLOAD_THRESHOLD_BYTES", str(64 * 1024)))
+
+OFFLOAD_DURATION = REGISTRY.histogram(
+    "offload_task_duration_seconds", "Duration of the work sent to the offload executor, queueing included.",
+    ("task",))
+
+
+class Offloader:
+    """Runs functions in an executor when their input is large, inline otherwise."""
+
+    def __init__(self,
+                 kind: str = OFFLOAD_EXECUTOR,
+                 max_workers: int = OFFLOAD_MAX_WORKERS,
+                 threshold_bytes: int = OFFLOAD_THRESHOLD_BYTES):
+        if kind not in ("thread", "process", "none"):
+            raise ValueError(f"Unknown offload executor {kind!r}, expected thread, process or none")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.threshold_bytes = threshold_bytes
+        self._executor: Optional[Executor] = None
+
+    def should_offload(self, size: int) -> bool:
+        return self.kind != "none" and size >= self.threshold_bytes
+
+    def _get_executor(self) -> Executor:
+        # Created on first use, so that idle workers do not fork a process pool
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="offload")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def run(self, task: str, size: int, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Result of func(*args, **kwargs), computed in the executor if size reaches the threshold."""
+        if not self.should_offload(size):
+            return func(*args, **kwargs)
+        call = functools.partial(func, *args, **kwargs)
+        if self.kind == "thread":
+            # Contexts cannot be pickled, only threads get the caller's one
+            call = functools.partial(contextvars.copy_context().run, call)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+        finally:
+            OFFLOAD_DURATION.observe(time.perf_counter() - start, task)
+
+    def shutdown(self) -> None:
+        """Stop the executor, waiting for the work in progress."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Process-wide offloader, configured by the environment
+offloader = Offloader()
@@ -0,0 +1,151 @@
+"""Registry of the rule engine operations configurations are routed to.
+
+Each configuration is configured by the operation registered for its cluster type.
+Operations are discovered from the openapi-spec.yaml of the apps deployed to the
+rule engine (the configure<Type>Cluster operations become cluster types basic,
+dedicated, ...), then completed or overridden by RULE_ENGINE_OPERATIONS, a JSON
+object, inline or in a file, mapping a cluster type to its operation:
+
+    {"freight": {"app_path": "Configuration/apps/cluster-config-demo", "app_version": "1.0.0",
+                 "operation": "demo.config.configureFreightCluster", "url": "http://rule-engine-2:9000"}}
+
+An operation without url is served by the default rule engine endpoint; a url may list
+the comma-separated URLs of several replicas.
+"""
+
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.log import get_logger
+
+# Operations by cluster type, as a JSON object or the path of a JSON file
+RULE_ENGINE_OPERATIONS = os.environ.get("RULE_ENGINE_OPERATIONS", "")
+# Directory of the app artefacts deployed to the rule engine, searched for openapi-spec.yaml files
+RULE_ENGINE_ARTEFACTS_DIR = os.environ.get(
+    "RULE_ENGINE_ARTEFACTS_DIR", str(Path(__file__).resolve().parent.parent / "luego-config-service" / "artefacts"))
+# Cluster type whose operation serves configurations without a cluster type or with an unknown one
+RULE_ENGINE_DEFAULT_CLUSTER_TYPE = os.environ.get("RULE_ENGINE_DEFAULT_CLUSTER_TYPE", "kafka")
+
+# A path of the spec, e.g. /v1/domains/Configuration/apps/cluster-config-demo/1.0.0/models/<operation>/configure:
+_SPEC_PATH = re.compile(r"^\s+/v1/domains/(?P<app_path>.+)/(?P<app_version>[^/]+)/models/(?P<operation>[^/]+)"
+                        r"/(?P<endpoint>configure|initial_payload):\s*$")
+_CLUSTER_OPERATION = re.compile(r"configure(\w+)Cluster$")
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Operation:
+    """A configuration operation of a rule engine app, and the endpoint serving it (default one if None)."""
+    app_path: str       # without version, e.g. Configuration/apps/cluster-config-demo
+    operation: str      # e.g. demo.config.configureKafkaCluster
+    app_version: str
+    url: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        """(app path, operation, app version), the key of its cached initial payload."""
+        return (self.app_path, self.operation, self.app_version)
+
+    @property
+    def path(self) -> str:
+        return f"/v1/domains/{self.app_path}/{self.app_version}/models/{self.operation}"
+
+    @property
+    def configure_path(self) -> str:
+        return self.path + "/configure"
+
+    @property
+    def payload_path(self) -> str:
+        return self.path + "/initial_payload"
+
+
+def route_name(operation: str) -> str:
+    """Name an operation is routed by: the cluster type of configure<Type>Cluster operations, else its own name."""
+    name = operation.rpartition(".")[2]
+    matched = _CLUSTER_OPERATION.match(name)
+    return (matched.group(1) if matched else name).lower()
+
+
+def discover_operations(artefacts_dir: str) -> Dict[str, Operation]:
+    """Operations of the openapi-spec.yaml files under a directory that have both configure and initial_payload.
+
+    Only the path keys of the specs are read, line by line.
+    """
+    endpoints: Dict[Tuple[str, str, str], Set[str]] = {}
+    for spec in sorted(Path(artefacts_dir).glob("**/openapi-spec.yaml")):
+        with open(spec, encoding="utf-8") as f:
+            for line in f:
+                matched = _SPEC_PATH.match(line)
+                if matched:
+                    key = (matched.group("app_path"), matched.group("operation"), matched.group("app_version"))
+                    endpoints.setdefault(key, set()).add(matched.group("endpoint"))
+    operations = {}
+    for key, found in endpoints.items():
+        if found == {"configure", "initial_payload"}:
+            operations[route_name(key[1])] = Operation(*key)
+    return operations
+
+
+def parse_operations(config: str) -> Dict[str, Operation]:
+    """Operations by cluster type of a RULE_ENGINE_OPERATIONS value, inline JSON or a JSON file path."""
+    if not config.lstrip().startswith("{"):
+        with open(config, encoding="utf-8") as f:
+            config = f.read()
+    try:
+        return {cluster_type.lower(): Operation(**{**entry, "app_path": entry["app_path"].strip("/")})
+                for cluster_type, entry in json.loads(config).items()}
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid RULE_ENGINE_OPERATIONS: {e!r}")
+
+
+class OperationRegistry:
+    """Operations by cluster type, with a default operation for the other configurations."""
+
+    def __init__(self, default: Operation, operations: Optional[Dict[str, Operation]] = None):
+        self.default = default
+        self._operations: Dict[str, Operation] = {}
+        for cluster_type, operation in (operations or {}).items():
+            self.register(cluster_type, operation)
+
+    @classmethod
+    def load(cls, default: Operation,
+             config: str = RULE_ENGINE_OPERATIONS,
+             artefacts_dir: Optional[str] = RULE_ENGINE_ARTEFACTS_DIR,
+             default_cluster_type: str = RULE_ENGINE_DEFAULT_CLUSTER_TYPE) -> 'OperationRegistry':
+        """Registry of the discovered operations overridden by the configured ones."""
+        operations: Dict[str, Operation] = {}
+        if artefacts_dir and os.path.isdir(artefacts_dir):
+            operations.update(discover_operations(artefacts_dir))
+        if config:
+            operations.update(parse_operations(config))
+        registry = cls(operations.get(default_cluster_type.lower(), default), operations)
+        logger.info("Rule engine operations for cluster types: %s", ", ".join(sorted(operations)) or "none")
+        return registry
+
+    def register(self, cluster_type: str, operation: Operation) -> None:
+        self._operations[cluster_type.lower()] = operation
+
+    def resolve(self, cluster_type: Optional[str]) -> Operation:
+        """Operation of a cluster type, the default operation if none is registered for it."""
+        if cluster_type is None:
+            return self.default
+        return self._operations.get(cluster_type.lower(), self.default)
+
+    @property
+    def operations(self) -> Dict[str, Operation]:
+        return dict(self._operations)
+
+    @property
+    def urls(self) -> List[Optional[str]]:
+        """Distinct endpoints of the operations, None standing for the default endpoint."""
+        return list(dict.fromkeys(op.url for op in [self.default, *self._operations.values()]))
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON-ready description of the registry."""
+        return {"default": asdict(self.default),
+                "operations": {cluster_type: asdict(op) for cluster_type, op in sorted(self._operations.items())}}
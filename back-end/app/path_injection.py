@@ -0,0 +1,166 @@
+"""Injection of answers into rule engine payloads through precompiled paths.
+
+A path such as 'the configuration.clusters[1].size' names a member of the payload:
+legs are separated by dots and may index list elements, either as 'clusters[1]'
+or as 'clusters.1'. Paths are parsed once into accessor tuples and cached per app
+version. A batch of answers is applied in a single walk of the payload: the paths
+are merged into a tree by their common prefixes, so that each container is looked
+up once whatever the number of answers below it, and the total work is bounded by
+the total length of the paths.
+"""
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from app.cache import LRUCache
+from app.metrics import register_cache
+
+Accessor = Union[str, int]
+
+# Compiled paths kept, by (app name, app version, path)
+COMPILED_PATH_CACHE_SIZE = int(os.environ.get("COMPILED_PATH_CACHE_SIZE", "8192"))
+
+_LEG = re.compile(r"([^\[\]]*)((?:\[\d+\])*)$")
+_INDEX = re.compile(r"\[(\d+)\]")
+_COLLECTION_TYPE = re.compile(r"^(?:NE)?List\[(.+)\]$|^Option\[(.+)\]$")
+
+_TRUE = ("true", "t", "y", "yes")
+
+
+class PathInjectionError(ValueError):
+    """Raised when a path is malformed or does not lead to a member of the payload."""
+
+
+class CompiledPath:
+    """Accessors of the containers leading to a member, and the accessor of the member itself."""
+    __slots__ = ("text", "parents", "member")
+
+    def __init__(self, text: str, parents: Tuple[Accessor, ...], member: Accessor):
+        self.text = text
+        self.parents = parents
+        self.member = member
+
+    def __repr__(self) -> str:
+        return f"CompiledPath({self.text!r})"
+
+
+def parse_path(path: str) -> Tuple[Accessor, ...]:
+    """Accessors of a path: member names as str, list indices as int."""
+    accessors: List[Accessor] = []
+    for leg in path.split("."):
+        if leg.isdigit():
+            accessors.append(int(leg))
+            continue
+        matched = _LEG.match(leg)
+        if not matched or not matched.group(1):
+            raise PathInjectionError(f"{path}: malformed leg {leg!r}")
+        accessors.append(matched.group(1))
+        accessors.extend(int(index) for index in _INDEX.findall(matched.group(2)))
+    return tuple(accessors)
+
+
+compiled_path_cache: LRUCache[tuple, CompiledPath] = LRUCache(max_entries=COMPILED_PATH_CACHE_SIZE)
+register_cache("compiled_path", compiled_path_cache)
+
+
+def compile_path(path: str, app_name: Optional[str] = None, app_version: Optional[str] = None) -> CompiledPath:
+    """Compiled form of a path, cached per app version."""
+    key = (app_name, app_version, path)
+    compiled = compiled_path_cache.get(key)
+    if compiled is None:
+        accessors = parse_path(path)
+        compiled = CompiledPath(path, accessors[:-1], accessors[-1])
+        compiled_path_cache.put(key, compiled)
+    return compiled
+
+
+def element_type(member_type: str) -> Optional[str]:
+    """Type of the elements of a collection type such as 'List[demo.config.Cluster]', None for other types."""
+    matched = _COLLECTION_TYPE.match(member_type)
+    return (matched.group(1) or matched.group(2)) if matched else None
+
+
+def new_collection(element_types: Sequence[str]) -> List[Dict[str, str]]:
+    """Collection of new elements of the given types, as the rule engine expects them."""
+    return [{"LGType_": element} for element in element_types]
+
+
+def _step(container: Any, accessor: Accessor, path: CompiledPath) -> Any:
+    try:
+        if isinstance(container, list):
+            return container[accessor]
+        if isinstance(accessor, int):
+            raise TypeError("an index on a member")
+        return container[accessor]
+    except (KeyError, IndexError, TypeError):
+        raise PathInjectionError(f"{path.text}: not found in the payload")
+
+
+def _set(container: Any, accessor: Accessor, value: Any, path: CompiledPath) -> None:
+    if isinstance(container, list) and isinstance(accessor, int):
+        if accessor < len(container):
+            container[accessor] = value
+            return
+    elif isinstance(container, dict) and isinstance(accessor, str):
+        container[accessor] = value
+        return
+    raise PathInjectionError(f"{path.text}: not found in the payload")
+
+
+def apply_values(payload: Any, assignments: Iterable[Tuple[CompiledPath, Any]]) -> Any:
+    """Set each value at its path in the payload, in place, walking the payload once. Returns the payload."""
+    # Accessor tree: node = [children by accessor, assignments ending at this container, a path through it]
+    root: list = [{}, [], None]
+    for path, value in assignments:
+        node = root
+        for accessor in path.parents:
+            child = node[0].get(accessor)
+            if child is None:
+                child = node[0][accessor] = [{}, [], path]
+            node = child
+        node[1].append((path, value))
+
+    stack = [(payload, root)]
+    while stack:
+        container, (children, leaves, _) = stack.pop()
+        for path, value in leaves:
+            _set(container, path.member, value, path)
+        for accessor, child in children.items():
+            stack.append((_step(container, accessor, child[2]), child))
+    return payload
+
+
+def inject_value(payload: Any, path: str, value: Any,
+                 app_name: Optional[str] = None, app_version: Optional[str] = None) -> Any:
+    """Set a single value at a path of the payload, in place."""
+    return apply_values(payload, [(compile_path(path, app_name, app_version), value)])
+
+
+def value_from_input(missing_elt: Mapping[str, Any], input_value: str) -> Any:
+    """Value of a typed-in answer to a missing element of a configure response (richResults=true).
+
+    Collections are answered with their number of elements, created with the element
+    type of the member type or the first possible element type.
+    """
+    member_type = missing_elt["memberType"]
+    if member_type == "Boolean":
+        return input_value.strip().lower() in _TRUE
+    if member_type == "Integer":
+        return int(input_value)
+    if member_type == "Number":
+        return float(input_value)
+    collection = missing_elt.get("details", {}).get("collection")
+    element = element_type(member_type)
+    if collection or element or member_type == "ObjectCollection":
+        if collection and collection.get("possibleElementTypes"):
+            element = collection["possibleElementTypes"][0]
+        if element is None:
+            raise ValueError(f"no element type known for {member_type}")
+        return new_collection([element] * int(input_value))
+    return input_value
+
+
+def missing_element_path(missing_elt: Mapping[str, Any]) -> str:
+    """Path of the member a missing element of a configure response asks for."""
+    return f"{missing_elt['target']}.{missing_elt['member']}"
@@ -3,18 +3,32 @@ Rule Engine Client that provides interactive configuration capabilities
 through the Provingly rule engine API.
 """
 
+import asyncio
+import copy
+import os
+import time
 import requests
-from typing import Dict, Any, List, Optional, Literal, Union
+import httpx
+from typing import Dict, Any, List, Optional, Literal, Set, Union
 import json
 from functools import lru_cache
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from enum import Enum
 
-# Rule Engine Configuration
-BASE_RULE_ENGINE_URL = "http://localhost:9000"  # This should come from environment variables in production
-SERVER_STATUS_URL = BASE_RULE_ENGINE_URL + "/v1/serverStatus"
-SERVER_API_URL = BASE_RULE_ENGINE_URL + "/v1/domains/"
+from app.balancer import LatencyWindow, Replica, ReplicaPool, split_urls
+from app.cache import LRUCache, SingleFlight, canonical_json, content_hash
+from app.health import RuleEngineHealthMonitor
+from app.log import debug_payload, get_logger
+from app.metrics import RULE_ENGINE_ERRORS, RULE_ENGINE_HEDGED_REQUESTS, RULE_ENGINE_REQUEST_DURATION, register_cache
+from app.offload import offloader
+from app.operations import Operation, OperationRegistry
+from app.serialization import loads
+
+# Rule Engine Configuration: its URL, or the comma-separated URLs of its replicas
+BASE_RULE_ENGINE_URL = os.environ.get("RULE_ENGINE_URL", "http://localhost:9000")
+SERVER_STATUS_URL = split_urls(BASE_RULE_ENGINE_URL)[0] + "/v1/serverStatus"
+SERVER_API_URL = split_urls(BASE_RULE_ENGINE_URL)[0] + "/v1/domains/"
 
 APP_PATH1= "Configuration/apps/cluster-config-demo/1.0.0"
 OPERATION1 = "demo.config.configureKafkaCluster"
@@ -25,24 +39,77 @@ OPERATION2 = "smartinsure.claimdeclaration.refreshQuestionnaire"
 OPERATION1_PATH = APP_PATH1 + "/models/" + OPERATION1
 OPERATION2_PATH = APP_PATH2 + "/models/" + OPERATION2
 
+# Operation of the configurations whose cluster type has no operation of its own, see operation_registry
 OPERATION_PATH = OPERATION1_PATH
 #OPERATION_PATH = OPERATION2_PATH
 
+def operation_key(app_path: str, operation: str) -> tuple:
+    """Splits an app path ending with the app version into an (app path, operation, app version) key."""
+    path, _, version = app_path.rpartition("/")
+    return (path, operation, version)
+
+OPERATION_KEY = operation_key(APP_PATH1, OPERATION1)
+#OPERATION_KEY = operation_key(APP_PATH2, OPERATION2)
+DEFAULT_OPERATION = Operation(*OPERATION_KEY)
+
 OPERATION_CONFIG_API_URL = SERVER_API_URL + OPERATION_PATH + "/configure?richResults=true"
 OPERATION_PAYLOAD_API_URL = SERVER_API_URL + OPERATION_PATH + "/initial_payload"
 
+# Paths relative to the rule engine base URL, used by the pooled async client
+SERVER_STATUS_PATH = "/v1/serverStatus"
+OPERATION_CONFIG_PATH = "/v1/domains/" + OPERATION_PATH + "/configure"
+OPERATION_PAYLOAD_PATH = "/v1/domains/" + OPERATION_PATH + "/initial_payload"
+
+# Connection pool, timeouts (in seconds) and concurrency limits of the async client
+RE_CONNECT_TIMEOUT = float(os.environ.get("RULE_ENGINE_CONNECT_TIMEOUT", "2.0"))
+RE_STATUS_TIMEOUT = float(os.environ.get("RULE_ENGINE_STATUS_TIMEOUT", "2.0"))
+RE_PAYLOAD_TIMEOUT = float(os.environ.get("RULE_ENGINE_PAYLOAD_TIMEOUT", "5.0"))
+RE_CONFIGURE_TIMEOUT = float(os.environ.get("RULE_ENGINE_CONFIGURE_TIMEOUT", "30.0"))
+RE_MAX_CONNECTIONS = int(os.environ.get("RULE_ENGINE_MAX_CONNECTIONS", "50"))
+RE_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("RULE_ENGINE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+RE_KEEPALIVE_EXPIRY = float(os.environ.get("RULE_ENGINE_KEEPALIVE_EXPIRY", "30.0"))
+RE_MAX_CONCURRENCY = int(os.environ.get("RULE_ENGINE_MAX_CONCURRENCY", "50"))
+
+# Percentile (0-100) of the configure latency after which a call is also sent to another replica, 0 disables
+RE_HEDGE_PERCENTILE = float(os.environ.get("RULE_ENGINE_HEDGE_PERCENTILE", "0"))
+# Lower bound of the hedge delay, in seconds, and configure calls observed before hedging starts
+RE_HEDGE_MIN_DELAY = float(os.environ.get("RULE_ENGINE_HEDGE_MIN_DELAY", "0.01"))
+RE_HEDGE_MIN_SAMPLES = int(os.environ.get("RULE_ENGINE_HEDGE_MIN_SAMPLES", "20"))
+
+# Maximum number of memoized question type descriptors
+QUESTION_TYPE_CACHE_SIZE = int(os.environ.get("QUESTION_TYPE_CACHE_SIZE", "4096"))
+
+# Initial payloads only change when a new app version is deployed
+INITIAL_PAYLOAD_CACHE_SIZE = int(os.environ.get("INITIAL_PAYLOAD_CACHE_SIZE", "64"))
+INITIAL_PAYLOAD_CACHE_TTL = float(os.environ.get("INITIAL_PAYLOAD_CACHE_TTL", "300.0"))
+
+# Results of configure, keyed by the hash of the canonical payload
+CONFIGURE_CACHE_SIZE = int(os.environ.get("CONFIGURE_CACHE_SIZE", "1024"))
+CONFIGURE_CACHE_TTL = float(os.environ.get("CONFIGURE_CACHE_TTL", "60.0"))
+CONFIGURE_CACHE_MAX_BYTES = int(os.environ.get("CONFIGURE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+logger = get_logger(__name__)
+
+# Operation of each cluster type, discovered from the deployed artefacts and RULE_ENGINE_OPERATIONS
+operation_registry = OperationRegistry.load(DEFAULT_OPERATION)
+
 
 class LabelValuePair(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     v: str
     l: str  
 
 class Range(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     min: Optional[str] = None         # min string will be converted to integer, floating point number, date or datetime depending on the data_type
     max: Optional[str] = None         # max string will be converted to integer, floating point number, date or datetime depending on the data_type
     step: Optional[str] = None        # 1 for integers, 0.01 typical value for numbers  
 
 class TypeInfo(BaseModel):   
-    pass
+    # type descriptors are memoized and shared between questions, see question_type_cache
+    model_config = ConfigDict(frozen=True)
 
 class NumberType(TypeInfo): 
     type: Literal['Number'] = 'Number'
@@ -85,6 +152,9 @@ class SimpleCollectionType(TypeInfo):
 
 
 class QuestionInfo(BaseModel):
+    # questions are never modified once mapped, so copies of a ConfigResponse share them
+    model_config = ConfigDict(frozen=True)
+
     path: str                               # path indicating where to inject back the answer into the payload
     text: str                               # text to be presented to the user
     type_info: Union[EnumType, NumberType, BooleanType, TextType, DateType, DateTimeType, ObjectCollectionType, SimpleCollectionType]   # field used to create the right type of widget in the UI
@@ -99,88 +169,88 @@ class ConfigResponse(BaseModel):
     appName: str
     appVersion: str
     operation: str
+    # Size in bytes of the rule engine response it was built from, 0 if unknown
+    _source_size: int = PrivateAttr(default=0)
 
-def simple_type_name(type_name: str) -> str:
-    if not '.' in type_name:
-        return type_name
-    else:
-        return type_name[type_name.rindex('.')+1:]
+    @property
+    def source_size(self) -> int:
+        return self._source_size
 
-class RuleEngineClient:
-    _instance = None
+# (appName, appVersion, target, member, memberType, restriction fingerprint) -> TypeInfo
+question_type_cache: LRUCache[tuple, TypeInfo] = LRUCache(max_entries=QUESTION_TYPE_CACHE_SIZE)
 
-    def __new__(cls, url: str = None):
-        if cls._instance is None:
-            if url is None:
-                raise ValueError("URL must be provided when creating the first instance")
-            cls._instance = super(RuleEngineClient, cls).__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
 
-    def __init__(self, url: str = None):
-        if not self._initialized:
-            self.url = url
-            self.headers = {"Content-Type": "application/json"}
-            self._initialized = True
+# (app path, operation, app version) -> initial payload, never handed out without copying
+initial_payload_cache: LRUCache[tuple, Dict[str, Any]] = LRUCache(max_entries=INITIAL_PAYLOAD_CACHE_SIZE,
+                                                                  ttl=INITIAL_PAYLOAD_CACHE_TTL)
 
-    @classmethod
-    def get_instance(cls) -> 'RuleEngineClient':
-        """Get the singleton instance of RuleEngineClient."""
-        if cls._instance is None:
-            cls.initialize()
-            response = requests.get(SERVER_STATUS_URL)
-            if not response.ok:
-                raise RuntimeError("Make sure the Provingly server is running. See README and script to start a Docker container")
-            else:
-                print("Provingly server is up and running")
-  
-        return cls._instance
 
-    @classmethod
-    def initialize(cls) -> 'RuleEngineClient':
-        """Initialize the singleton instance with the given URL."""
-        return cls(BASE_RULE_ENGINE_URL)
+def invalidate_initial_payloads(app_path: Optional[str] = None, app_version: Optional[str] = None) -> int:
+    """
+    Drops cached initial payloads, e.g. after a new app version has been deployed.
 
+    Args:
+        app_path: Only drop the payloads of this app (path without version), all apps if None
+        app_version: Only drop the payloads of this app version, all versions if None
 
-    # TODO: this logic needs to move to the frontend
-    def _inject_value(self, dictionary: dict, missing_elt: dict, input_value: str) -> dict:
-        """Injects a value into the configuration dictionary based on missing element details."""
-        target = missing_elt['target']
-        legs = target.split(".")
-        member = missing_elt['member']
-        member_type = missing_elt['memberType']
+    Returns:
+        The number of dropped payloads
+    """
+    return initial_payload_cache.invalidate_where(
+        lambda key: (app_path is None or key[0] == app_path.strip("/"))
+                    and (app_version is None or key[2] == app_version))
 
-        dictionary_target = dictionary
-        for leg in legs:
-            dictionary_target = dictionary_target[leg]
 
-        if member_type == "Boolean":
-            dictionary_target[member] = input_value.lower() in ['true', 't', 'y', 'yes']
+# sha256(canonical payload, lang, operation path) -> ConfigResponse, sized by the rule engine response
+configure_cache: LRUCache[str, 'ConfigResponse'] = LRUCache(max_entries=CONFIGURE_CACHE_SIZE,
+                                                             ttl=CONFIGURE_CACHE_TTL,
+                                                             max_bytes=CONFIGURE_CACHE_MAX_BYTES)
 
-        elif member_type == "Integer":
-            dictionary_target[member] = int(input_value)
+register_cache("question_type", question_type_cache)
+register_cache("initial_payload", initial_payload_cache)
+register_cache("configure", configure_cache)
 
-        elif member_type == "ObjectCollection":
-            list_element_type = "list_element_type"  #TODO: compute this properly
-            dictionary_target[member] = [{ "LGType_": list_element_type } for x in range(1..int(input_value))]
 
-            #if input_value.lower in ['no']:
-            #    dictionary_target[member] = []
-            #else:
-            #    dictionary_target[member] = [{ "LGType_": input_value}]
+def restriction_fingerprint(details: Dict[str, Any]) -> str:
+    """Canonical form of the parts of missing element details that determine the question type."""
+    return json.dumps([details.get('restriction'), details.get('collection')], sort_keys=True, separators=(',', ':'))
 
-        else:  # String
-            dictionary_target[member] = input_value
 
-        return dictionary
+def simple_type_name(type_name: str) -> str:
+    if not '.' in type_name:
+        return type_name
+    else:
+        return type_name[type_name.rindex('.')+1:]
 
+class BaseRuleEngineClient:
+    """Transport independent logic shared by the sync and async rule engine clients."""
 
+    # TODO: replace hard-coded question by mapping logic
+    def map_question(self, missing_elt: dict, app_name: Optional[str] = None, app_version: Optional[str] = None) -> QuestionInfo:
+        debug_payload(logger, "Mapping question", missing_elt)
+
+        # The type descriptor only depends on the member and its restriction, so it is
+        # shared by every session of a given app version
+        key = (app_name, app_version, missing_elt['target'], missing_elt['member'], missing_elt['memberType'],
+               restriction_fingerprint(missing_elt['details']))
+        type_info = question_type_cache.get(key)
+        if type_info is None:
+            type_info = self._map_type_info(missing_elt)
+            question_type_cache.put(key, type_info)
 
+        question_info = QuestionInfo(path = missing_elt['target'] + '.' + missing_elt['member'],
+                            text = missing_elt['details']['question'],
+                            info = missing_elt['details']['info'],
+                            default_value = None,
+                            type_info = type_info,
+                            common_type_name=missing_elt['memberType'])
         
-    # TODO: replace hard-coded question by mapping logic
-    def map_question(self, missing_elt: dict) -> QuestionInfo:
-        print("mapping question...")
-        print(json.dumps(missing_elt, indent=4))
+        debug_payload(logger, "Mapped question", question_info)
+
+        return question_info
+
+    def _map_type_info(self, missing_elt: dict) -> TypeInfo:
+        """Maps the member type and restriction of a missing element to a type descriptor."""
         memberType = missing_elt['memberType']
 
         type_info = TextType(type='Text')  # we provide a default...
@@ -221,36 +291,107 @@ class RuleEngineClient:
                     step = '0.01' if not missing_elt['details']['restriction']['step'] else missing_elt['details']['restriction']['step']
                     type_info = NumberType(type='Number', range=Range(min=lower_bound, max=upper_bound, step=step))
 
-        question_info = QuestionInfo(path = missing_elt['target'] + '.' + missing_elt['member'],
-                            text = missing_elt['details']['question'],
-                            info = missing_elt['details']['info'],
-                            default_value = None,
-                            type_info = type_info,
-                            common_type_name=missing_elt['memberType'])
+        return type_info
+
+    def _to_config_response(self, resp_json: Dict[str, Any]) -> ConfigResponse:
+        """Builds a ConfigResponse from the JSON returned by the configure API."""
+        # get inferred payload
+        inferred_payload = resp_json.get('output')
+
+        missing_elements = resp_json.get('missingData')
+
+        # TODO: this is the place where we could check if some missing data can be fetched by using some data API
         
-        print("output of question mapping")
-        print(question_info.model_dump_json(indent=4))
+        computation_details = resp_json.get("computationDetails")
+        app_name = computation_details["appName"]
+        app_version = computation_details["appVersion"]
+
+        # Transform each missing element into a QuestionInfo
+        questions = [self.map_question(missing_elt, app_name, app_version) for missing_elt in missing_elements]
+        
+        config_response = ConfigResponse(payload = inferred_payload, 
+                              questions=questions, 
+                              appName=app_name,
+                              appVersion=app_version,
+                              operation=computation_details["operation"]                              
+                              )
+
+        debug_payload(logger, "Configure response", config_response)
+        
+        return config_response
+
+
+def build_config_response(content: bytes) -> ConfigResponse:
+    """ConfigResponse of the body of a configure response: JSON decoding, question mapping and validation."""
+    config_response = BaseRuleEngineClient()._to_config_response(loads(content))
+    config_response._source_size = len(content)
+    return config_response
+
+
+def copy_config_response(config_response: ConfigResponse) -> ConfigResponse:
+    """Copy of a ConfigResponse that may be modified freely, sharing the immutable questions."""
+    return config_response.model_copy(update={"payload": copy.deepcopy(config_response.payload),
+                                              "questions": list(config_response.questions)})
+
+
+class RuleEngineClient(BaseRuleEngineClient):
+    _instance = None
+
+    def __new__(cls, url: str = None):
+        if cls._instance is None:
+            if url is None:
+                raise ValueError("URL must be provided when creating the first instance")
+            cls._instance = super(RuleEngineClient, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, url: str = None):
+        if not self._initialized:
+            self.url = url
+            self.headers = {"Content-Type": "application/json"}
+            self._initialized = True
+
+    @classmethod
+    def get_instance(cls) -> 'RuleEngineClient':
+        """Get the singleton instance of RuleEngineClient."""
+        if cls._instance is None:
+            cls.initialize()
+            response = requests.get(SERVER_STATUS_URL)
+            if not response.ok:
+                raise RuntimeError("Make sure the Provingly server is running. See README and script to start a Docker container")
+            else:
+                logger.info("Provingly server is up and running")
+  
+        return cls._instance
+
+    @classmethod
+    def initialize(cls) -> 'RuleEngineClient':
+        """Initialize the singleton instance with the URL of the first rule engine replica."""
+        return cls(split_urls(BASE_RULE_ENGINE_URL)[0])
 
-        return question_info
 
     def configure(self, 
                  input_dict: str,
                  lang: str = "en", 
-                 input_handler: Optional[callable] = None) -> ConfigResponse:
+                 input_handler: Optional[callable] = None,
+                 operation: Optional[Operation] = None) -> ConfigResponse:
         """
         Performs an interactive configuration session with the rule engine.
         
         Args:
             app_path: Path to the application in the rule engine
-            operation: Operation to perform
             lang: Language for responses (default: "en")
             input_handler: Optional callback for handling input prompts
                          If None, uses input() function
+            operation: Operation to run, the default operation if None
         
         Returns:
             ConfigResponse containing the payload and the questions
         """
-        api_url = OPERATION_CONFIG_API_URL + "&lang=" + lang
+        if operation is None:
+            api_url = OPERATION_CONFIG_API_URL + "&lang=" + lang
+        else:
+            api_url = (operation.url or self.url) + operation.configure_path + "?richResults=true&lang=" + lang
          
         # Make request to inference engine
         response = requests.post(api_url, 
@@ -260,29 +401,7 @@ class RuleEngineClient:
         if not response.ok:
             raise Exception(f"Inference engine request failed: {response.status_code}")
             
-        resp_json = response.json()
-        
-        # get inferred payload
-        inferred_payload = resp_json.get('output')
-
-        missing_elements = resp_json.get('missingData')
-
-        # TODO: this is the place where we could check if some missing data can be fetched by using some data API
-        
-        # Transform each missing element into a QuestionInfo
-        questions = [self.map_question(missing_elt) for missing_elt in missing_elements]
-        
-        config_response = ConfigResponse(payload = inferred_payload, 
-                              questions=questions, 
-                              appName=resp_json.get("computationDetails")["appName"],
-                              appVersion=resp_json.get("computationDetails")["appVersion"],
-                              operation=resp_json.get("computationDetails")["operation"]                              
-                              )
-
-        print("Output of configure method in RuleEngineClient")
-        print(config_response.model_dump_json(indent=2))
-        
-        return config_response
+        return self._to_config_response(response.json())
     
 
     def get_rule_engine_config(self) -> Dict[str, Any]:
@@ -296,4 +415,282 @@ class RuleEngineClient:
             response = requests.get(f"{self.url}/v1/serverStatus")
             return response.ok
         except requests.RequestException:
-            return False
\ No newline at end of file
+            return False
+
+class RuleEngineUnavailableError(Exception):
+    """Raised without calling the rule engine while the circuit breaker is open."""
+
+
+class AsyncRuleEngineClient(BaseRuleEngineClient):
+    """
+    Asyncio-native rule engine client of one rule engine endpoint.
+
+    All calls go through a single httpx.AsyncClient so that connections to the rule
+    engine are kept alive and reused, and a semaphore caps the number of in-flight
+    calls so that a burst of requests queues here instead of overloading the engine.
+    Concurrent identical initial_payload and configure calls share one upstream call.
+
+    The endpoint URL may list several replicas, separated by commas: calls are balanced
+    across them by the replica pool (see app/balancer.py), and with hedge_percentile set
+    a configure call still unanswered after that percentile of the configure latencies
+    is also sent to another replica, the first usable response winning.
+
+    The outcome of every call is reported to the health monitor, whose circuit breaker
+    makes calls fail fast with RuleEngineUnavailableError while the engine is down, i.e.
+    while no replica is left to take the calls.
+
+    The operation calls run the default operation unless given the operation to run,
+    see operation_registry. There is one process-wide instance per endpoint.
+    """
+    _instances: Dict[str, 'AsyncRuleEngineClient'] = {}
+
+    def __init__(self,
+                 url: str = BASE_RULE_ENGINE_URL,
+                 max_connections: int = RE_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = RE_MAX_KEEPALIVE_CONNECTIONS,
+                 max_concurrency: int = RE_MAX_CONCURRENCY,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 hedge_percentile: float = RE_HEDGE_PERCENTILE):
+        self.url = url
+        self.pool = ReplicaPool(split_urls(url))
+        self.hedge_percentile = hedge_percentile
+        self.configure_latencies = LatencyWindow()
+        self.headers = {"Content-Type": "application/json"}
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections,
+                                   keepalive_expiry=RE_KEEPALIVE_EXPIRY)
+        self.timeout = httpx.Timeout(RE_CONFIGURE_TIMEOUT, connect=RE_CONNECT_TIMEOUT)
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight = SingleFlight()
+        self._client: Optional[httpx.AsyncClient] = None
+        self.health = RuleEngineHealthMonitor(probe=self.check_server_status)
+
+    @classmethod
+    def get_instance(cls, url: Optional[str] = None) -> 'AsyncRuleEngineClient':
+        """Get the process-wide instance of an endpoint (the default one if None), creating it on first use."""
+        url = url or BASE_RULE_ENGINE_URL
+        if url not in cls._instances:
+            cls._instances[url] = cls(url)
+        return cls._instances[url]
+
+    @classmethod
+    def instances(cls) -> List['AsyncRuleEngineClient']:
+        """The process-wide instances created so far."""
+        return list(cls._instances.values())
+
+    @property
+    def coalesced_calls(self) -> int:
+        """Calls that joined an identical call in flight instead of reaching the rule engine."""
+        return self._inflight.coalesced
+
+    @classmethod
+    async def close_instance(cls) -> None:
+        """Close the process-wide instances and release their connection pools."""
+        instances, cls._instances = cls._instances, {}
+        for instance in instances.values():
+            await instance.aclose()
+
+    async def open(self) -> None:
+        """Open the shared connection pool. Calling it on an open client is a no-op."""
+        if self._client is None:
+            # Requests carry the absolute URL of their replica
+            self._client = httpx.AsyncClient(base_url=self.pool.replicas[0].url,
+                                             headers=self.headers,
+                                             limits=self.limits,
+                                             timeout=self.timeout,
+                                             transport=self._transport)
+
+    async def aclose(self) -> None:
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> 'AsyncRuleEngineClient':
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _request(self, method: str, path: str, timeout: float, guarded: bool = True,
+                       call: str = "other", operation: str = "", replica: Optional[Replica] = None,
+                       tried: Optional[Set[Replica]] = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request through the pool, waiting for a concurrency slot first.
+
+        The request goes to the given replica, else to the one chosen by the replica pool
+        among those not in tried, and the replica is added to tried. Guarded requests are
+        subject to the circuit breaker and report their outcome to the health monitor;
+        unguarded ones (the status probe) always go through. The duration and failures are
+        recorded in the metrics under the call and operation names.
+        """
+        if guarded and not self.health.allow_request():
+            RULE_ENGINE_ERRORS.inc(call, operation, "circuit_open")
+            raise RuleEngineUnavailableError("Rule Engine service is unavailable")
+        if self._client is None:
+            await self.open()
+        start = time.perf_counter()
+        async with self._semaphore:
+            if replica is None:
+                replica = self.pool.choose(tried or ())
+            if tried is not None:
+                tried.add(replica)
+            sent = time.perf_counter()
+            try:
+                with self.pool.track(replica):
+                    response = await self._client.request(method, replica.url + path,
+                                                          timeout=httpx.Timeout(timeout, connect=RE_CONNECT_TIMEOUT),
+                                                          **kwargs)
+            except httpx.TransportError:
+                RULE_ENGINE_REQUEST_DURATION.observe(time.perf_counter() - start, call, operation)
+                RULE_ENGINE_ERRORS.inc(call, operation, "transport")
+                self._record_failure(replica, guarded)
+                raise
+        RULE_ENGINE_REQUEST_DURATION.observe(time.perf_counter() - start, call, operation)
+        if response.status_code >= 500:
+            RULE_ENGINE_ERRORS.inc(call, operation, "server_error")
+            self._record_failure(replica, guarded)
+        else:
+            # Probe durations say little about the latency of the operation calls
+            self.pool.record_success(replica, time.perf_counter() - sent if guarded else None)
+            if guarded:
+                self.health.record_success()
+        return response
+
+    def _record_failure(self, replica: Replica, guarded: bool) -> None:
+        self.pool.record_failure(replica)
+        # The engine is only down for the circuit breaker when no other replica can take the calls
+        if guarded and not self.pool.any_available(exclude=(replica,)):
+            self.health.record_failure()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a configure call is also sent to another replica, None when not hedging."""
+        if self.hedge_percentile <= 0 or len(self.pool) < 2 or len(self.configure_latencies) < RE_HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.configure_latencies.percentile(self.hedge_percentile), RE_HEDGE_MIN_DELAY)
+
+    async def _hedged_request(self, method: str, path: str, timeout: float, call: str, operation: str,
+                              **kwargs) -> httpx.Response:
+        """
+        Sends a guarded request, and the same request to another replica if it is still
+        unanswered after the hedge delay. The first response without a server error wins
+        and the other request is cancelled.
+        """
+        start = time.perf_counter()
+        delay = self.hedge_delay()
+        tried: Set[Replica] = set()
+        first = asyncio.ensure_future(self._request(method, path, timeout, call=call, operation=operation,
+                                                    tried=tried, **kwargs))
+        hedge = None
+        pending = {first}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                # Not hedged while the first request still waits for a concurrency slot
+                if not done and tried and self.pool.any_available(exclude=tried):
+                    hedge = asyncio.ensure_future(self._request(method, path, timeout, call=call,
+                                                                operation=operation, tried=tried, **kwargs))
+                    pending.add(hedge)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                usable = [task for task in done if task.exception() is None and task.result().status_code < 500]
+                if usable:
+                    if hedge is not None:
+                        RULE_ENGINE_HEDGED_REQUESTS.inc(call, operation, "hedge" if usable[0] is hedge else "first")
+                    self.configure_latencies.observe(time.perf_counter() - start)
+                    return usable[0].result()
+                if not pending:
+                    # Both failed, or no hedge: the error of the last one
+                    return done.pop().result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def check_server_status(self, timeout: float = RE_STATUS_TIMEOUT) -> bool:
+        """Checks if the rule engine server is running, probing every replica: True if one of them is up."""
+        results = await asyncio.gather(*(self._probe_replica(replica, timeout) for replica in self.pool.replicas))
+        return any(results)
+
+    async def _probe_replica(self, replica: Replica, timeout: float) -> bool:
+        try:
+            response = await self._request("GET", SERVER_STATUS_PATH, timeout, guarded=False, call="status",
+                                           replica=replica)
+            return response.is_success
+        except httpx.HTTPError:
+            return False
+
+    async def initial_payload(self, timeout: float = RE_PAYLOAD_TIMEOUT, use_cache: bool = True,
+                              operation: Optional[Operation] = None) -> Dict[str, Any]:
+        """
+        Gets the starting payload of a configuration operation, the default operation if None.
+
+        Payloads are cached per (app path, operation, app version); callers always receive
+        their own copy and may mutate it freely.
+        """
+        operation = operation or DEFAULT_OPERATION
+        payload = initial_payload_cache.get(operation.key) if use_cache else None
+        if payload is None:
+            payload = await self._inflight.do(("initial_payload",) + operation.key,
+                                              lambda: self._fetch_initial_payload(operation, timeout))
+        return copy.deepcopy(payload)
+
+    async def _fetch_initial_payload(self, operation: Operation, timeout: float) -> Dict[str, Any]:
+        response = await self._request("GET", operation.payload_path, timeout, call="initial_payload",
+                                       operation=operation.operation)
+        if not response.is_success:
+            raise Exception(f"get initial_payload request failed: {response.status_code}")
+        payload = response.json().get('payload')
+        initial_payload_cache.put(operation.key, payload)
+        return payload
+
+    async def configure(self,
+                        input_dict: Dict[str, Any],
+                        lang: str = "en",
+                        timeout: float = RE_CONFIGURE_TIMEOUT,
+                        use_cache: bool = True,
+                        operation: Optional[Operation] = None) -> ConfigResponse:
+        """
+        Performs one step of an interactive configuration session with the rule engine.
+
+        Identical payloads (same content whatever the key order) submitted for the same
+        language and operation are answered from configure_cache, and concurrent identical
+        calls share a single upstream call (the timeout of the first caller applies).
+
+        Args:
+            input_dict: Payload to submit to the configuration operation
+            lang: Language for responses (default: "en")
+            timeout: Read timeout for this call, in seconds
+            use_cache: Whether the result may be served from the cache, fresh results are stored either way
+            operation: Operation to run, the default operation if None
+
+        Returns:
+            ConfigResponse containing the payload and the questions
+        """
+        operation = operation or DEFAULT_OPERATION
+        body = canonical_json(input_dict)
+        key = content_hash(body, lang.encode(), operation.path.encode())
+        config_response = configure_cache.get(key) if use_cache else None
+        if config_response is None:
+            config_response = await self._inflight.do(
+                ("configure", key), lambda: self._fetch_configure(operation, key, body, lang, timeout))
+        # the shared response is owned by the cache and the other waiters; its questions are
+        # immutable, only the payload needs copying
+        return await offloader.run("copy_config_response", config_response.source_size, copy_config_response,
+                                   config_response)
+
+    async def _fetch_configure(self, operation: Operation, key: str, body: bytes, lang: str,
+                               timeout: float) -> ConfigResponse:
+        response = await self._hedged_request("POST", operation.configure_path, timeout, call="configure",
+                                              operation=operation.operation, params={"richResults": "true", "lang": lang},
+                                       content=body)
+
+        if not response.is_success:
+            raise Exception(f"Inference engine request failed: {response.status_code}")
+
+        # Large responses are decoded and mapped off the event loop
+        config_response = await offloader.run("build_config_response", len(response.content),
+                                              build_config_response, response.content)
+        configure_cache.put(key, config_response, size=len(response.content))
+        return config_response
@@ -0,0 +1,143 @@
+"""Fast JSON encoding of stored configurations for API responses.
+
+Stored configurations were validated when they were written, so responses are
+encoded straight from their attributes to bytes instead of going through
+response_model validation and serialization. orjson is used when installed,
+with the standard json module as fallback. The encoded bytes of a configuration
+are cached per (id, updated_at), which identifies a version of it.
+
+Stores may also hand out StoredConfiguration versions instead of models: their id
+and updated_at are enough for ETags and cache hits, so such reads never decode
+the stored configuration.
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Union
+
+from pydantic import BaseModel
+
+from app.cache import LRUCache
+from app.metrics import register_cache
+from app.models import Configuration
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a declared dependency
+    orjson = None
+
+# Encoded configurations kept in memory, by count and by total size
+SERIALIZATION_CACHE_SIZE = int(os.environ.get("SERIALIZATION_CACHE_SIZE", "4096"))
+SERIALIZATION_CACHE_MAX_BYTES = int(os.environ.get("SERIALIZATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+configuration_bytes_cache: LRUCache = LRUCache(
+    max_entries=SERIALIZATION_CACHE_SIZE, max_bytes=SERIALIZATION_CACHE_MAX_BYTES)
+register_cache("configuration_bytes", configuration_bytes_cache)
+
+
+def _default(obj: Any) -> Any:
+    # Values the encoders do not know natively
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        """Encode obj as compact JSON bytes."""
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        """Encode obj as compact JSON bytes."""
+        return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    loads = json.loads
+
+
+def configuration_dict(config: Configuration) -> Dict[str, Any]:
+    """Fields of a configuration, in ConfigurationResponse order, without validation."""
+    return {
+        "name": config.name,
+        "description": config.description,
+        "cluster_type": config.cluster_type,
+        "version": config.version,
+        "status": config.status,
+        "configuration_data": config.configuration_data,
+        "tags": config.tags,
+        "id": config.id,
+        "created_at": config.created_at,
+        "updated_at": config.updated_at,
+    }
+
+
+def configuration_bytes_with_data(head: Dict[str, Any], data: bytes, tail: Dict[str, Any]) -> bytes:
+    """JSON encoding of a configuration whose configuration_data is already encoded.
+
+    head and tail are the fields before and after configuration_data, in configuration_dict order.
+    """
+    return dumps(head)[:-1] + b',"configuration_data":' + data + b"," + dumps(tail)[1:]
+
+
+class StoredConfiguration(ABC):
+    """A configuration version read from a store, decoded only when asked."""
+    __slots__ = ()
+
+    id: int
+    updated_at: datetime
+
+    @abstractmethod
+    def configuration(self) -> Configuration:
+        """The decoded configuration."""
+
+    def encode(self) -> bytes:
+        """JSON encoding of the configuration, as returned by the API."""
+        return dumps(configuration_dict(self.configuration()))
+
+
+class DecodedConfiguration(StoredConfiguration):
+    """StoredConfiguration of a configuration already decoded by its store."""
+    __slots__ = ("id", "updated_at", "_config")
+
+    def __init__(self, config: Configuration):
+        self.id = config.id
+        self.updated_at = config.updated_at
+        self._config = config
+
+    def configuration(self) -> Configuration:
+        return self._config
+
+
+def configuration_bytes(config: Union[Configuration, StoredConfiguration], use_cache: bool = True) -> bytes:
+    """JSON encoding of a configuration, as returned by the API."""
+    if not use_cache:
+        return _encode(config)
+    key = (config.id, config.updated_at)
+    encoded = configuration_bytes_cache.get(key)
+    if encoded is None:
+        # Copy into an exactly sized object before keeping it, encoders may over-allocate
+        encoded = bytes(memoryview(_encode(config)))
+        configuration_bytes_cache.put(key, encoded, size=len(encoded))
+    return encoded
+
+
+def _encode(config: Union[Configuration, StoredConfiguration]) -> bytes:
+    if isinstance(config, StoredConfiguration):
+        return config.encode()
+    return dumps(configuration_dict(config))
+
+
+def configuration_list_bytes(configs: Iterable[Union[Configuration, StoredConfiguration]], **fields: Any) -> bytes:
+    """JSON encoding of a configuration list response: the items followed by the other fields."""
+    items = b",".join(configuration_bytes(config) for config in configs)
+    rest = dumps(fields)
+    return b'{"items":[' + items + (b"]," + rest[1:] if len(rest) > 2 else b"]}")
+
@@ -0,0 +1,118 @@
+"""Interactive configuration sessions: answers applied server-side and payload deltas.
+
+The session of a configuration is the rule engine response stored in its
+configuration_data (payload and pending questions), so it is shared by every worker
+using the store. A step takes answers keyed by QuestionInfo.path, injects them into
+the stored payload in one pass (see app/path_injection.py), and returns to the
+client only the changes of the payload as a JSON merge patch (RFC 7386) along with
+the new questions.
+"""
+
+import copy
+from typing import Any, Dict, List, Mapping, Optional
+
+from app.path_injection import PathInjectionError, apply_values, compile_path, new_collection
+
+_TRUE = ("true", "t", "y", "yes")
+_FALSE = ("false", "f", "n", "no")
+
+
+class AnswerError(ValueError):
+    """Raised when an answer does not match a pending question."""
+
+
+def coerce_answer(question: Mapping[str, Any], value: Any) -> Any:
+    """Convert an answer to the type the question asks for, as described by its type_info."""
+    type_info = question.get("type_info") or {}
+    kind = type_info.get("type")
+    path = question["path"]
+    try:
+        if kind == "Boolean":
+            if isinstance(value, bool):
+                return value
+            text = str(value).lower()
+            if text not in _TRUE + _FALSE:
+                raise ValueError(value)
+            return text in _TRUE
+        if kind == "Number":
+            step = (type_info.get("range") or {}).get("step")
+            return int(value) if step == "1" else float(value)
+        if kind == "Enum":
+            allowed = [pv["v"] for pv in type_info.get("possible_values", [])]
+            if value not in allowed:
+                raise AnswerError(f"{path}: {value!r} is not one of {allowed}")
+            return value
+        if kind == "ObjectCollection":
+            # The element types chosen, or a number of elements of the only possible type
+            allowed = [pt["v"] for pt in type_info.get("possibleTypes", [])]
+            if isinstance(value, int) and len(allowed) == 1:
+                value = allowed * value
+            if not isinstance(value, list) or any(element not in allowed for element in value):
+                raise AnswerError(f"{path}: expected a list of element types among {allowed}")
+            return new_collection(value)
+        if kind == "SimpleCollection":
+            if not isinstance(value, list):
+                raise AnswerError(f"{path}: expected a list")
+            return value
+        return value if isinstance(value, str) else str(value)
+    except AnswerError:
+        raise
+    except (TypeError, ValueError):
+        raise AnswerError(f"{path}: {value!r} is not a valid {kind or 'value'}")
+
+
+def apply_answers(payload: Dict[str, Any],
+                  questions: List[Mapping[str, Any]],
+                  answers: Mapping[str, Any],
+                  app_name: Optional[str] = None,
+                  app_version: Optional[str] = None) -> Dict[str, Any]:
+    """Copy of the payload with the answers injected, each answer matching a pending question by path."""
+    pending = {question["path"]: question for question in questions}
+    assignments = []
+    for path, value in answers.items():
+        if path not in pending:
+            raise AnswerError(f"{path}: no pending question for this path")
+        try:
+            assignments.append((compile_path(path, app_name, app_version), coerce_answer(pending[path], value)))
+        except PathInjectionError as e:
+            raise AnswerError(str(e))
+    answered = copy.deepcopy(payload)
+    try:
+        apply_values(answered, assignments)
+    except PathInjectionError as e:
+        raise AnswerError(str(e))
+    return answered
+
+
+def merge_patch(before: Any, after: Any) -> Any:
+    """JSON merge patch turning before into after: changed members only, None for removed ones.
+
+    Lists are replaced as a whole. A member set to None cannot be told apart from a
+    removed one, as in any merge patch.
+    """
+    if not isinstance(before, dict) or not isinstance(after, dict):
+        return after
+    patch = {}
+    for key, value in after.items():
+        if key not in before:
+            patch[key] = value
+        elif before[key] != value:
+            patch[key] = merge_patch(before[key], value)
+    for key in before:
+        if key not in after:
+            patch[key] = None
+    return patch
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Apply a JSON merge patch, returning the patched document (dicts are updated in place)."""
+    if not isinstance(patch, dict):
+        return patch
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = apply_merge_patch(target.get(key), value)
+    return target
@@ -0,0 +1,375 @@
+"""SQLite storage backend for the SaaS Configurator application."""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Iterator
+
+from app.database import (ConfigurationConflictError, ConfigurationStore, ConfigurationStoreBusyError, OrderBy,
+                          decode_cursor, encode_cursor, from_micros, to_micros)
+from app.models import Configuration, ConfigurationCreate, ConfigurationUpdate, ConfigurationStatus
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configurations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    cluster_type TEXT,
+    cluster_type_key TEXT,              -- lower-cased cluster_type, used by the filter
+    version TEXT,
+    status TEXT,
+    configuration_data TEXT NOT NULL,   -- compact JSON
+    tags TEXT NOT NULL,                 -- compact JSON array, avoids a join when reading
+    created_at INTEGER NOT NULL,        -- microseconds since the epoch
+    updated_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS configuration_tags (
+    tag TEXT NOT NULL,
+    config_id INTEGER NOT NULL REFERENCES configurations(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, config_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_configurations_status ON configurations(status, id);
+CREATE INDEX IF NOT EXISTS idx_configurations_cluster_type ON configurations(cluster_type_key, id);
+CREATE INDEX IF NOT EXISTS idx_configurations_updated_at ON configurations(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_configuration_tags_config ON configuration_tags(config_id);
+CREATE TABLE IF NOT EXISTS store_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL            -- bumped by every write transaction
+);
+INSERT OR IGNORE INTO store_meta (id, version) VALUES (1, 0);
+CREATE TABLE IF NOT EXISTS store_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,               -- compact JSON object
+    created_at INTEGER NOT NULL         -- microseconds since the epoch
+);
+"""
+
+# Published events are kept this long for the workers to pick them up
+EVENT_RETENTION = 3600 * 1_000_000
+
+_COLUMNS = ("id, name, description, cluster_type, version, status, "
+            "configuration_data, tags, created_at, updated_at")
+
+_INSERT = ("INSERT INTO configurations (name, description, cluster_type, cluster_type_key, version, status, "
+           "configuration_data, tags, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_UPDATE = ("UPDATE configurations SET name = ?, description = ?, cluster_type = ?, cluster_type_key = ?, "
+           "version = ?, status = ?, configuration_data = ?, tags = ?, updated_at = ? WHERE id = ?")
+_SELECT_ONE = f"SELECT {_COLUMNS} FROM configurations WHERE id = ?"
+_INSERT_TAG = "INSERT OR IGNORE INTO configuration_tags (tag, config_id) VALUES (?, ?)"
+_DELETE_TAGS = "DELETE FROM configuration_tags WHERE config_id = ?"
+_DELETE = "DELETE FROM configurations WHERE id = ?"
+_BUMP_VERSION = "UPDATE store_meta SET version = version + 1 WHERE id = 1"
+_SELECT_VERSION = "SELECT version FROM store_meta WHERE id = 1"
+_INSERT_EVENT = "INSERT INTO store_events (kind, params, created_at) VALUES (?, ?, ?)"
+_PRUNE_EVENTS = "DELETE FROM store_events WHERE created_at < ?"
+_SELECT_EVENTS = "SELECT id, kind, params FROM store_events WHERE id > ? ORDER BY id"
+_SELECT_LAST_EVENT = "SELECT COALESCE(MAX(id), 0) FROM store_events"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class SQLiteDatabase(ConfigurationStore):
+    """
+    SQLite-backed configuration store.
+
+    The database runs in WAL mode so that readers do not block the writer, and has
+    one index per list filter (status, lower-cased cluster type, tag) plus one per
+    ordering. Statements are parameterized constants, so sqlite3 compiles each of
+    them once and reuses it from its statement cache. Writes issued inside batch()
+    share a single transaction, and create_configurations inserts with executemany.
+    Every write transaction bumps the version stored in the database, so the version
+    also reflects writes made through other connections to the same file.
+
+    Several processes can share the same file: ids come from AUTOINCREMENT, writes wait
+    up to busy_timeout seconds for the write lock of another process, then raise
+    ConfigurationStoreBusyError, and events published by one process are read by the
+    others from the store_events table. Calls block while they wait, callers on an
+    event loop run them in a thread.
+    """
+
+    shared = True
+
+    def __init__(self, path: str = "configurations.db", busy_timeout: float = 0.25):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None,
+                                     cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _begin(self) -> None:
+        """Start a write transaction, waiting at most busy_timeout for the write lock."""
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            if e.sqlite_errorcode in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED):
+                raise ConfigurationStoreBusyError(f"Configuration store is busy: {e}") from e
+            raise
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group the writes issued inside the block into one transaction (nestable)."""
+        with self._lock:
+            if self._batch_depth == 0:
+                self._begin()
+            self._batch_depth += 1
+            try:
+                yield
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.execute(_BUMP_VERSION)
+                    self._conn.execute("COMMIT")
+
+    @property
+    def version(self) -> int:
+        """Counter changed by every write transaction."""
+        with self._lock:
+            return self._conn.execute(_SELECT_VERSION).fetchone()[0]
+
+    @staticmethod
+    def _check_expected(row: sqlite3.Row, expected_updated_at: Optional[datetime]) -> None:
+        if expected_updated_at is not None and row["updated_at"] != to_micros(expected_updated_at):
+            raise ConfigurationConflictError(f"Configuration {row['id']} was modified")
+
+    @staticmethod
+    def _row_values(data: Dict[str, Any]) -> Tuple:
+        cluster_type = data.get("cluster_type")
+        status = data.get("status")
+        return (
+            data["name"],
+            data.get("description"),
+            cluster_type,
+            cluster_type.lower() if cluster_type is not None else None,
+            data.get("version"),
+            status.value if isinstance(status, ConfigurationStatus) else status,
+            _dumps(data.get("configuration_data") or {}),
+            _dumps(data.get("tags") or []),
+        )
+
+    @staticmethod
+    def _to_configuration(row: sqlite3.Row) -> Configuration:
+        # Rows were validated when they were written, skip validation when reading them back
+        return Configuration.model_construct(
+            id=row["id"],
+            name=row["name"],
+            description=row["description"],
+            cluster_type=row["cluster_type"],
+            version=row["version"],
+            status=ConfigurationStatus(row["status"]) if row["status"] is not None else None,
+            configuration_data=json.loads(row["configuration_data"]),
+            tags=json.loads(row["tags"]),
+            created_at=from_micros(row["created_at"]),
+            updated_at=from_micros(row["updated_at"]),
+        )
+
+    def create_configuration(self, config_data: ConfigurationCreate) -> Configuration:
+        """Create a new configuration."""
+        return self.create_configurations([config_data])[0]
+
+    def create_configurations(self, configs: Iterable[ConfigurationCreate]) -> List[Configuration]:
+        """Create several configurations in a single transaction."""
+        configs = list(configs)
+        now = to_micros(datetime.now())
+        dumps = [config.model_dump() for config in configs]
+        rows = [self._row_values(data) + (now, now) for data in dumps]
+        with self.batch():
+            first_id = None
+            if len(rows) == 1:
+                first_id = self._conn.execute(_INSERT, rows[0]).lastrowid
+            elif rows:
+                # ids are allocated consecutively inside the transaction
+                self._conn.executemany(_INSERT, rows)
+                first_id = self._conn.execute("SELECT last_insert_rowid()").fetchone()[0] - len(rows) + 1
+            ids = range(first_id, first_id + len(rows)) if rows else range(0)
+            self._conn.executemany(_INSERT_TAG, [(tag, config_id)
+                                                 for config_id, config in zip(ids, configs)
+                                                 for tag in set(config.tags or ())])
+        created_at = from_micros(now)
+        # The configurations were validated as ConfigurationCreate, skip validating them again
+        return [
+            Configuration.model_construct(id=config_id, **data, created_at=created_at, updated_at=created_at)
+            for config_id, data in zip(ids, dumps)
+        ]
+
+    def get_configuration(self, config_id: int) -> Optional[Configuration]:
+        """Get a configuration by ID."""
+        with self._lock:
+            row = self._conn.execute(_SELECT_ONE, (config_id,)).fetchone()
+        return self._to_configuration(row) if row else None
+
+    @staticmethod
+    def _where(
+        status: Optional[ConfigurationStatus],
+        cluster_type: Optional[str],
+        tag: Optional[str]
+    ) -> Tuple[List[str], List[Any]]:
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status.value)
+        if cluster_type:
+            clauses.append("cluster_type_key = ?")
+            params.append(cluster_type.lower())
+        if tag:
+            clauses.append("id IN (SELECT config_id FROM configuration_tags WHERE tag = ?)")
+            params.append(tag)
+        return clauses, params
+
+    @staticmethod
+    def _order(order_by: OrderBy) -> str:
+        return "updated_at, id" if order_by == "updated_at" else "id"
+
+    def _select(self, clauses: List[str], params: List[Any], order_by: OrderBy, limit: int, skip: int = 0) -> List[Configuration]:
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {_COLUMNS} FROM configurations{where} ORDER BY {self._order(order_by)} LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit, skip]).fetchall()
+        return [self._to_configuration(row) for row in rows]
+
+    def get_configurations(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None,
+        order_by: OrderBy = "id"
+    ) -> List[Configuration]:
+        """Get a list of configurations with optional filtering."""
+        clauses, params = self._where(status, cluster_type, tag)
+        return self._select(clauses, params, order_by, limit, skip)
+
+    def get_configurations_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order_by: OrderBy = "id",
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> Tuple[List[Configuration], Optional[str]]:
+        """Get the page of configurations following the cursor (keyset pagination)."""
+        clauses, params = self._where(status, cluster_type, tag)
+        if cursor:
+            after = decode_cursor(cursor, order_by)
+            if order_by == "updated_at":
+                clauses.append("(updated_at, id) > (?, ?)")
+                params.extend([to_micros(after[0]), after[1]])
+            else:
+                clauses.append("id > ?")
+                params.append(after[0])
+        configs = self._select(clauses, params, order_by, limit + 1)
+        next_cursor = None
+        if len(configs) > limit:
+            configs = configs[:limit]
+            next_cursor = encode_cursor(order_by, self.sort_key(configs[-1], order_by))
+        return configs, next_cursor
+
+    def update_configuration(
+        self,
+        config_id: int,
+        config_update: ConfigurationUpdate,
+        expected_updated_at: Optional[datetime] = None
+    ) -> Optional[Configuration]:
+        """Update an existing configuration."""
+        with self.batch():
+            row = self._conn.execute(_SELECT_ONE, (config_id,)).fetchone()
+            if row is None:
+                return None
+            self._check_expected(row, expected_updated_at)
+            current = self._to_configuration(row)
+            update_data = config_update.model_dump(exclude_unset=True)
+            data = {**current.model_dump(), **update_data}
+            updated_at = max(to_micros(datetime.now()), to_micros(current.updated_at) + 1)
+            self._conn.execute(_UPDATE, self._row_values(data) + (updated_at, config_id))
+            if "tags" in update_data:
+                self._conn.execute(_DELETE_TAGS, (config_id,))
+                self._conn.executemany(_INSERT_TAG, [(tag, config_id) for tag in set(data["tags"] or ())])
+        data.update(updated_at=from_micros(updated_at))
+        return Configuration.model_construct(**data)
+
+    def update_configurations(
+        self, updates: Iterable[Tuple[int, ConfigurationUpdate]]
+    ) -> List[Optional[Configuration]]:
+        """Update several configurations in a single transaction."""
+        with self.batch():
+            return [self.update_configuration(config_id, config_update) for config_id, config_update in updates]
+
+    def delete_configuration(self, config_id: int, expected_updated_at: Optional[datetime] = None) -> bool:
+        """Delete a configuration by ID."""
+        with self.batch():
+            if expected_updated_at is not None:
+                row = self._conn.execute(_SELECT_ONE, (config_id,)).fetchone()
+                if row is None:
+                    return False
+                self._check_expected(row, expected_updated_at)
+            return self._conn.execute(_DELETE, (config_id,)).rowcount > 0
+
+    def delete_configurations(self, config_ids: Iterable[int]) -> List[bool]:
+        """Delete several configurations in a single transaction."""
+        with self.batch():
+            return [self._conn.execute(_DELETE, (config_id,)).rowcount > 0 for config_id in config_ids]
+
+    def count_configurations(
+        self,
+        status: Optional[ConfigurationStatus] = None,
+        cluster_type: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> int:
+        """Count configurations with optional filtering."""
+        clauses, params = self._where(status, cluster_type, tag)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM configurations{where}", params).fetchone()[0]
+
+    def publish_event(self, kind: str, params: Dict[str, Any]) -> int:
+        """Record an event for the other processes sharing the database, returning its id."""
+        now = to_micros(datetime.now())
+        with self._lock:
+            # Outside batch(): events are not configuration writes and must not change the version
+            self._begin()
+            try:
+                event_id = self._conn.execute(_INSERT_EVENT, (kind, _dumps(params), now)).lastrowid
+                self._conn.execute(_PRUNE_EVENTS, (now - EVENT_RETENTION,))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return event_id
+
+    def events_after(self, event_id: int) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Events published after event_id, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(_SELECT_EVENTS, (event_id,)).fetchall()
+        return [(row["id"], row["kind"], json.loads(row["params"])) for row in rows]
+
+    def last_event_id(self) -> int:
+        """Id of the latest published event, 0 if none."""
+        with self._lock:
+            return self._conn.execute(_SELECT_LAST_EVENT).fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove all configurations."""
+        with self.batch():
+            self._conn.execute("DELETE FROM configuration_tags")
+            self._conn.execute("DELETE FROM configurations")
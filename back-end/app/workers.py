@@ -0,0 +1,93 @@
+"""Support for running the API in several worker processes sharing one store."""
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.database import ConfigurationStore
+from app.log import get_logger
+
+# Number of worker processes, as read by uvicorn and run.py
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+# Seconds between two reads of the events published by the other workers
+STORE_EVENTS_POLL_INTERVAL = float(os.environ.get("STORE_EVENTS_POLL_INTERVAL", "1.0"))
+
+logger = get_logger(__name__)
+
+
+class StoreEventFollower:
+    """
+    Keeps the per-worker state in line with the other workers sharing the store.
+
+    Configuration data lives in the shared store and the caches derived from it are
+    keyed by (id, updated_at) or by the store version, so they never serve another
+    worker's stale data. The remaining per-worker state (e.g. the rule engine caches)
+    is changed through broadcast(): the change is applied locally, published in the
+    store, and applied by the followers of the other workers on their next poll.
+    With a process-local store, broadcast() only applies the change locally.
+    """
+
+    def __init__(self,
+                 store: ConfigurationStore,
+                 handlers: Dict[str, Callable[..., Any]],
+                 interval: float = STORE_EVENTS_POLL_INTERVAL):
+        self.store = store
+        self.handlers = handlers
+        self.interval = interval
+        self._last_event_id: Optional[int] = None
+        self._own_events: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def broadcast(self, kind: str, **params: Any) -> Any:
+        """Apply a change in this worker and publish it to the others, returning the local result."""
+        result = self.handlers[kind](**params)
+        if self.store.shared:
+            self._own_events.add(self.store.publish_event(kind, params))
+        return result
+
+    def poll_once(self) -> int:
+        """Apply the events published since the last poll, returning how many were applied."""
+        if self._last_event_id is None:
+            # Start from now, earlier events are already reflected in a fresh worker
+            self._last_event_id = self.store.last_event_id()
+            return 0
+        applied = 0
+        for event_id, kind, params in self.store.events_after(self._last_event_id):
+            self._last_event_id = event_id
+            handler = self.handlers.get(kind)
+            if event_id in self._own_events or handler is None:
+                self._own_events.discard(event_id)
+                continue
+            try:
+                handler(**params)
+                applied += 1
+            except Exception as e:
+                logger.warning("Failed to apply store event %s %s: %s", kind, params, e)
+        return applied
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning("Failed to read store events: %s", e)
+
+    def start(self) -> None:
+        """Start following the events of a shared store. No-op for a process-local store or when started."""
+        if not self.store.shared:
+            return
+        if self._last_event_id is None:
+            self.poll_once()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop following the events."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Measure the API in-process: CRUD throughput, list latency against the store size, and
+create/update latency under concurrency, with the stub rule engine answering the rule engine calls.
+
+The API and the stub are called through httpx.ASGITransport, so the numbers exclude the network
+and the HTTP server but include routing, validation, middlewares, the store and serialization.
+Set CONFIG_STORE=sqlite to measure the SQLite store.
+
+Usage:
+    uv run python benchmarks/bench_api.py [--sizes 1000,10000,50000] [--concurrency 1,10,50]
+                                          [--engine-latency 0.0] [--save]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+
+from bench_database import make_config
+from common import latency_summary, print_results, save_results
+from stub_rule_engine import create_stub_app
+
+from app.log import configure_logging
+from app.main import app, db
+from app.re_client import AsyncRuleEngineClient, BASE_RULE_ENGINE_URL, configure_cache
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+DEFAULT_CONCURRENCY = [1, 10, 50]
+
+NEW_CONFIGURATION = {"name": "Benchmark cluster", "cluster_type": "kafka", "version": "1.0.0",
+                     "tags": ["benchmark"]}
+
+
+def update_body(i: int) -> dict:
+    # A distinct payload per update, so that the configure results are not served from the cache
+    return {"configuration_data": {"payload": {
+        "the customer request": {"LGType_": "demo.config.CustomerRequest", "cloudProvider": "AWS", "index": i},
+        "the configuration": {"LGType_": "demo.config.Configuration"}}}}
+
+
+async def bench_crud(api: httpx.AsyncClient, ops: int = 500) -> Dict[str, float]:
+    """Sequential requests per second of each CRUD operation."""
+    db.clear()
+    results = {}
+    ids = []
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        ids.append((await api.post("/configurations/", json=NEW_CONFIGURATION)).json()["id"])
+    results["create (req/s)"] = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for config_id in ids:
+        await api.get(f"/configurations/{config_id}")
+    results["get (req/s)"] = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i, config_id in enumerate(ids):
+        await api.put(f"/configurations/{config_id}", json=update_body(i))
+    results["update (req/s)"] = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for config_id in ids:
+        await api.delete(f"/configurations/{config_id}")
+    results["delete (req/s)"] = ops / (time.perf_counter() - start)
+    return results
+
+
+async def bench_list(api: httpx.AsyncClient, sizes: List[int], requests: int = 100) -> Dict[str, float]:
+    """Mean latency of list requests, unfiltered and filtered, for each store size."""
+    results = {}
+    queries = {
+        "first page": "/configurations/?limit=20",
+        "first page, no total": "/configurations/?limit=20&include_total=false",
+        "filtered by cluster type": "/configurations/?limit=20&cluster_type=dedicated",
+        "filtered by status and tag": "/configurations/?limit=20&status=active&tag=team-3",
+        "by updated_at": "/configurations/?limit=20&order_by=updated_at",
+    }
+    for size in sizes:
+        db.clear()
+        db.create_configurations([make_config(i) for i in range(size)])
+        middle = (await api.get(f"/configurations/?limit=1&skip={size // 2}")).json()["next_cursor"]
+        queries["cursor page, middle of the store"] = f"/configurations/?limit=20&include_total=false&cursor={middle}"
+        for name, url in queries.items():
+            start = time.perf_counter()
+            for _ in range(requests):
+                await api.get(url)
+            results[f"list {name}, {size} configurations (ms)"] = (time.perf_counter() - start) / requests * 1e3
+    db.clear()
+    return results
+
+
+async def bench_concurrency(api: httpx.AsyncClient, levels: List[int], requests: int = 400) -> Dict[str, float]:
+    """Latency percentiles and throughput of creates and updates issued by concurrent clients."""
+    results = {}
+    for concurrency in levels:
+        db.clear()
+        configure_cache.clear()
+        create_latencies: List[float] = []
+        update_latencies: List[float] = []
+
+        async def client(worker: int):
+            for i in range(worker, requests, concurrency):
+                start = time.perf_counter()
+                config_id = (await api.post("/configurations/", json=NEW_CONFIGURATION)).json()["id"]
+                create_latencies.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                await api.put(f"/configurations/{config_id}", json=update_body(i))
+                update_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(worker) for worker in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        latency_summary(f"create, {concurrency} concurrent", results, create_latencies)
+        latency_summary(f"update, {concurrency} concurrent", results, update_latencies)
+        results[f"create+update, {concurrency} concurrent (req/s)"] = 2 * requests / elapsed
+    db.clear()
+    return results
+
+
+async def run_async(sizes: List[int], levels: List[int], engine_latency: float) -> Dict[str, float]:
+    # The API calls the rule engine through the process-wide client of the default endpoint, point it at the stub
+    AsyncRuleEngineClient._instances[BASE_RULE_ENGINE_URL] = AsyncRuleEngineClient(
+        url="http://stub", transport=httpx.ASGITransport(app=create_stub_app(latency=engine_latency)))
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as api:
+            results = await bench_crud(api)
+            results.update(await bench_list(api, sizes))
+            results.update(await bench_concurrency(api, levels))
+    finally:
+        await AsyncRuleEngineClient.close_instance()
+    return results
+
+
+def run(sizes: List[int] = DEFAULT_SIZES, levels: List[int] = DEFAULT_CONCURRENCY,
+        engine_latency: float = 0.0) -> Dict[str, float]:
+    # Per-request info logs would dominate the measurements
+    configure_logging(level="WARNING")
+    return asyncio.run(run_async(sizes, levels, engine_latency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated store sizes for the list latencies")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)),
+                        help="comma-separated numbers of concurrent clients")
+    parser.add_argument("--engine-latency", type=float, default=0.0,
+                        help="seconds the stub rule engine takes per operation call")
+    parser.add_argument("--save", action="store_true", help="store the results under the current commit")
+    args = parser.parse_args()
+
+    results = run([int(size) for size in args.sizes.split(",")],
+                  [int(level) for level in args.concurrency.split(",")],
+                  args.engine_latency)
+    print_results(f"API ({db.__class__.__name__})", results)
+    if args.save:
+        print(f"\nSaved to {save_results('api', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Compare the in-memory and SQLite configuration stores.
+
+Usage:
+    uv run python benchmarks/bench_database.py [--size 10000] [--sqlite-path bench.db] [--save]
+"""
+
+import argparse
+import os
+import tempfile
+
+from common import save_results, timed
+
+from app.database import create_database
+from app.models import ConfigurationCreate, ConfigurationStatus, ConfigurationUpdate
+
+CLUSTER_TYPES = ["basic", "standard", "dedicated", "enterprise", "freight"]
+STATUSES = list(ConfigurationStatus)
+
+
+def make_config(i: int) -> ConfigurationCreate:
+    return ConfigurationCreate(
+        name=f"Cluster {i}",
+        cluster_type=CLUSTER_TYPES[i % len(CLUSTER_TYPES)],
+        version="1.0.0",
+        status=STATUSES[i % len(STATUSES)],
+        configuration_data={"payload": {"the customer request": {"LGType_": "demo.config.CustomerRequest",
+                                                                 "cloudProvider": "AWS", "index": i}}},
+        tags=[f"team-{i % 20}", "benchmark"],
+    )
+
+
+def bench(store: str, size: int, path: str) -> dict:
+    database = create_database(store, path)
+    configs = [make_config(i) for i in range(size)]
+    results = {}
+
+    half = size // 2
+    timed("create (single, us/op)", results, lambda: [database.create_configuration(c) for c in configs[:half]], half)
+    timed("create (batch, us/op)", results, lambda: database.create_configurations(configs[half:]), size - half)
+
+    ids = list(range(1, size + 1, max(1, size // 1000)))
+    timed("get by id (us/op)", results, lambda: [database.get_configuration(i) for i in ids], len(ids))
+    timed("list page, filtered (us/op)", results,
+          lambda: [database.get_configurations(skip=0, limit=10, cluster_type="Freight") for _ in range(100)], 100)
+    timed("list deep offset (us/op)", results,
+          lambda: [database.get_configurations(skip=size // 2, limit=10) for _ in range(100)], 100)
+    timed("count, filtered (us/op)", results,
+          lambda: [database.count_configurations(status=ConfigurationStatus.ACTIVE, tag="team-3") for _ in range(100)], 100)
+
+    def cursor_walk(**filters):
+        cursor, pages = None, 0
+        while True:
+            _, cursor = database.get_configurations_page(limit=100, cursor=cursor, **filters)
+            pages += 1
+            if cursor is None:
+                return pages
+
+    timed("cursor walk, 100/page (us/page)", results, cursor_walk, max(1, size // 100))
+    active = database.count_configurations(status=ConfigurationStatus.ACTIVE)
+    timed("cursor walk, filtered, 100/page (us/page)", results,
+          lambda: cursor_walk(status=ConfigurationStatus.ACTIVE), max(1, active // 100))
+    update = ConfigurationUpdate(status=ConfigurationStatus.ARCHIVED, tags=["archived"])
+    timed("update (us/op)", results, lambda: [database.update_configuration(i, update) for i in ids], len(ids))
+    return results
+
+
+def run(size: int = 10000, sqlite_path: str = None) -> dict:
+    """Results of both stores, labelled with the store name."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = sqlite_path or os.path.join(tmp, "bench.db")
+        memory = bench("memory", size, path)
+        sqlite = bench("sqlite", size, path)
+    results = {f"memory: {label}": value for label, value in memory.items()}
+    results.update({f"sqlite: {label}": value for label, value in sqlite.items()})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000, help="number of configurations to store")
+    parser.add_argument("--sqlite-path", default=None, help="SQLite file (a temporary file by default)")
+    parser.add_argument("--save", action="store_true", help="store the results under the current commit")
+    args = parser.parse_args()
+
+    results = run(args.size, args.sqlite_path)
+    labels = [label.removeprefix("memory: ") for label in results if label.startswith("memory: ")]
+    print(f"{'operation':<34}{'memory':>12}{'sqlite':>12}")
+    for label in labels:
+        print(f"{label:<34}{results['memory: ' + label]:>12.1f}{results['sqlite: ' + label]:>12.1f}")
+    if args.save:
+        print(f"\nSaved to {save_results('database', results)}")
+
+
+if __name__ == "__main__":
+    main()
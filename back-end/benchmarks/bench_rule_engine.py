@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Measure the rule engine client: question mapping and configure calls against the stub rule engine,
+and how long the event loop stalls while large configure responses are processed, inline or offloaded.
+
+Usage:
+    uv run python benchmarks/bench_rule_engine.py [--enum-sizes 10,100,1000,10000] [--save]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import httpx
+
+from common import percentile, print_results, save_results, timed
+from stub_rule_engine import INITIAL_PAYLOAD, configure_response, create_stub_app, enum_values, missing_element
+
+import app.re_client as re_client
+from app.offload import Offloader
+from app.re_client import AsyncRuleEngineClient, BaseRuleEngineClient, configure_cache, question_type_cache
+
+DEFAULT_ENUM_SIZES = [10, 100, 1000, 10000]
+
+
+def bench_map_question(enum_sizes: List[int], repeat: int = 200) -> Dict[str, float]:
+    """Cost of mapping a question whose restriction is an enum of each size, with a cold and a warm cache."""
+    client = BaseRuleEngineClient()
+    results = {}
+    for size in enum_sizes:
+        missing = configure_response(INITIAL_PAYLOAD, enum_size=size)["missingData"][0]
+
+        def cold():
+            for _ in range(repeat):
+                question_type_cache.clear()
+                client.map_question(missing, "cluster-config-demo", "1.0.0")
+
+        def warm():
+            for _ in range(repeat):
+                client.map_question(missing, "cluster-config-demo", "1.0.0")
+
+        timed(f"map_question, {size} enum values, uncached (us/op)", results, cold, repeat)
+        timed(f"map_question, {size} enum values, cached (us/op)", results, warm, repeat)
+
+    response = configure_response(INITIAL_PAYLOAD, questions=5)
+    timed("to_config_response, 5 questions (us/op)", results,
+          lambda: [client._to_config_response(response) for _ in range(repeat)], repeat)
+    return results
+
+
+async def bench_configure(calls: int = 500) -> Dict[str, float]:
+    """Round trip of configure through the pooled client, answered by the in-process stub."""
+    transport = httpx.ASGITransport(app=create_stub_app())
+    results = {}
+    async with AsyncRuleEngineClient(url="http://stub", transport=transport) as client:
+        payloads = [{"the customer request": {"LGType_": "demo.config.CustomerRequest", "index": i}}
+                    for i in range(calls)]
+
+        async def uncached():
+            for payload in payloads:
+                await client.configure(payload, use_cache=False)
+
+        async def cached():
+            for _ in range(calls):
+                await client.configure(payloads[0])
+
+        configure_cache.clear()
+        for label, run in (("configure, uncached (us/op)", uncached), ("configure, cached (us/op)", cached)):
+            start = time.perf_counter()
+            await run()
+            results[label] = (time.perf_counter() - start) / calls * 1e6
+    return results
+
+
+async def bench_offload(questions: int = 500, calls: int = 20) -> Dict[str, float]:
+    """Event loop stalls and mean duration of configure calls answered with many questions, for each
+    offload executor. The longest stalls include the garbage collections, which no executor avoids."""
+    response = configure_response(INITIAL_PAYLOAD, questions=0)
+    response["missingData"] = [missing_element(f"member{i}", "demo.config.Choice", f"Question {i}?", None,
+                                               {"type": "enum", "possibleValues": enum_values(20)})
+                               for i in range(questions)]
+    body = json.dumps(response).encode()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    results = {}
+    default_offloader = re_client.offloader
+    try:
+        for kind in ("none", "thread", "process"):
+            # Everything offloaded, except with "none"
+            re_client.offloader = Offloader(kind, threshold_bytes=0)
+            stalls = [0.0]
+            done = asyncio.Event()
+
+            async def ticker():
+                while not done.is_set():
+                    start = time.perf_counter()
+                    await asyncio.sleep(0.001)
+                    stalls.append(time.perf_counter() - start - 0.001)
+
+            async with AsyncRuleEngineClient(url="http://stub", transport=transport) as client:
+                await client.configure({"warm-up": True}, use_cache=False)
+                task = asyncio.create_task(ticker())
+                start = time.perf_counter()
+                for i in range(calls):
+                    question_type_cache.clear()
+                    await client.configure({"index": i}, use_cache=False)
+                elapsed = time.perf_counter() - start
+                done.set()
+                await task
+            re_client.offloader.shutdown()
+            results[f"configure, {questions} questions, {kind} executor: p90 loop stall (ms)"] = \
+                percentile(stalls, 90) * 1e3
+            results[f"configure, {questions} questions, {kind} executor: max loop stall (ms)"] = max(stalls) * 1e3
+            results[f"configure, {questions} questions, {kind} executor (ms/op)"] = elapsed / calls * 1e3
+    finally:
+        re_client.offloader = default_offloader
+    return results
+
+
+def run(enum_sizes: List[int] = DEFAULT_ENUM_SIZES) -> Dict[str, float]:
+    results = bench_map_question(enum_sizes)
+    results.update(asyncio.run(bench_configure()))
+    results.update(asyncio.run(bench_offload()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--enum-sizes", default=",".join(map(str, DEFAULT_ENUM_SIZES)),
+                        help="comma-separated numbers of enum values")
+    parser.add_argument("--save", action="store_true", help="store the results under the current commit")
+    args = parser.parse_args()
+
+    results = run([int(size) for size in args.enum_sizes.split(",")])
+    print_results("Rule engine client", results)
+    if args.save:
+        print(f"\nSaved to {save_results('rule_engine', results)}")
+
+
+if __name__ == "__main__":
+    main()
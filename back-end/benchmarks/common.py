@@ -0,0 +1,77 @@
+"""Timing helpers and result storage shared by the benchmarks.
+
+Results are saved as JSON in benchmarks/results/<commit>.json, one file per commit
+(suffixed with -dirty when the tree has uncommitted changes), so that two commits
+can be compared with compare_results.py.
+"""
+
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+# Make the app package importable when running a benchmark as a script
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def timed(label: str, results: dict, fn: Callable[[], object], ops: int = 1) -> float:
+    """Run fn once and record its duration per operation in microseconds under label."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    results[label] = elapsed / ops * 1e6
+    return elapsed
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def latency_summary(label: str, results: dict, samples: List[float]) -> None:
+    """Record the p50, p95 and p99 of latencies given in seconds, in milliseconds."""
+    for pct in (50, 95, 99):
+        results[f"{label} p{pct} (ms)"] = percentile(samples, pct) * 1e3
+
+
+def commit_id() -> str:
+    """Short id of the checked out commit, with -dirty when the back-end has uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--", ".", ":!benchmarks/results"],
+                                cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + "-dirty" if status.strip() else commit
+
+
+def save_results(suite: str, results: Dict[str, float], commit: Optional[str] = None) -> str:
+    """Merge the results of a suite into the result file of the commit, returning its path."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{commit or commit_id()}.json")
+    stored = load_results(path) if os.path.exists(path) else {}
+    stored[suite] = results
+    with open(path, "w") as f:
+        json.dump(stored, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_results(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_results(title: str, results: Dict[str, float]) -> None:
+    print(f"\n{title}")
+    for label, value in results.items():
+        print(f"  {label:<66}{value:>12.1f}")
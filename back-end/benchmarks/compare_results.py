@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Compare the benchmark results of two commits.
+
+Usage:
+    uv run python benchmarks/compare_results.py <baseline commit> <commit> [--threshold 10]
+
+Changes larger than the threshold (in percent) are flagged. Throughputs (req/s) are
+better when higher, every other measurement when lower.
+"""
+
+import argparse
+import os
+
+from common import RESULTS_DIR, load_results
+
+
+def _path(commit_or_path: str) -> str:
+    return commit_or_path if os.path.exists(commit_or_path) else os.path.join(RESULTS_DIR, f"{commit_or_path}.json")
+
+
+def compare(baseline: str, current: str, threshold: float = 10.0) -> int:
+    """Print the changes between two result files, returning the number of regressions."""
+    before, after = load_results(_path(baseline)), load_results(_path(current))
+    print(f"\n{os.path.basename(_path(baseline))} -> {os.path.basename(_path(current))}")
+    regressions = 0
+    for suite, results in after.items():
+        previous = before.get(suite, {})
+        print(f"\n{suite}")
+        for label, value in results.items():
+            if not previous.get(label):
+                continue
+            change = (value - previous[label]) / previous[label] * 100
+            worse = -change if "/s)" in label else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            elif worse < -threshold:
+                flag = "  improved"
+            print(f"  {label:<66}{previous[label]:>12.1f}{value:>12.1f}{change:>+9.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="baseline commit or result file")
+    parser.add_argument("current", help="commit or result file to compare with the baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percentage flagged as a change")
+    args = parser.parse_args()
+    compare(args.baseline, args.current, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
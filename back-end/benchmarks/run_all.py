@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Run every benchmark, store the results under the current commit and compare them with a baseline.
+
+Usage:
+    uv run python benchmarks/run_all.py [--quick] [--baseline <commit>]
+
+Without --baseline, the results are compared with the most recent other result file.
+"""
+
+import argparse
+import glob
+import os
+
+import bench_api
+import bench_database
+import bench_rule_engine
+from common import RESULTS_DIR, commit_id, print_results, save_results
+from compare_results import compare
+
+
+def latest_other_results(path: str):
+    others = [other for other in glob.glob(os.path.join(RESULTS_DIR, "*.json"))
+              if os.path.abspath(other) != os.path.abspath(path)]
+    return max(others, key=os.path.getmtime) if others else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller stores and fewer concurrency levels")
+    parser.add_argument("--baseline", help="commit whose results to compare with")
+    args = parser.parse_args()
+
+    commit = commit_id()
+    suites = {
+        "database": lambda: bench_database.run(2000 if args.quick else 10000),
+        "rule_engine": lambda: bench_rule_engine.run([10, 1000] if args.quick else bench_rule_engine.DEFAULT_ENUM_SIZES),
+        "api": lambda: bench_api.run([1000, 10000] if args.quick else bench_api.DEFAULT_SIZES,
+                                     [1, 10] if args.quick else bench_api.DEFAULT_CONCURRENCY),
+    }
+    path = None
+    for suite, run in suites.items():
+        results = run()
+        print_results(suite, results)
+        path = save_results(suite, results, commit)
+    print(f"\nSaved to {path}")
+
+    baseline = os.path.join(RESULTS_DIR, f"{args.baseline}.json") if args.baseline else latest_other_results(path)
+    if baseline:
+        compare(baseline, path)
+
+
+if __name__ == "__main__":
+    main()
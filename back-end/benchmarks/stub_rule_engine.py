@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Local stand-in for the rule engine, serving the cluster-config-demo operation.
+
+The responses are modeled on the cluster-config-demo artefacts in
+luego-config-service/: initial_payload returns the empty customer request and
+configuration, and configure echoes the submitted payload and asks for the
+CustomerRequest members that are still missing, one question per member, with
+the enum, boolean and constrained text restrictions of demo.config.
+
+The benchmarks mount the app in-process through httpx.ASGITransport. It can also be
+run as a server on the rule engine port for end-to-end runs against uvicorn:
+
+    uv run python benchmarks/stub_rule_engine.py [--port 9000] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import copy
+from typing import Any, Dict, List, Optional
+
+import common  # noqa: F401  (puts the app package on the path)
+from fastapi import FastAPI, Request
+
+from app.re_client import SERVER_STATUS_PATH
+
+APP_NAME = "cluster-config-demo"
+APP_VERSION = "1.0.0"
+OPERATION = "demo.config.configureKafkaCluster"
+
+CLOUD_PROVIDERS = [
+    {"v": "AWS", "label": "Amazon Web Services"},
+    {"v": "Azure", "label": "Microsoft Azure"},
+    {"v": "GCP", "label": "Google Cloud"},
+    {"v": "CP4", "label": "Cloud Provider 4"},
+    {"v": "CP5", "label": "Cloud Provider 5"},
+]
+
+INITIAL_PAYLOAD = {
+    "the customer request": {"LGType_": "demo.config.CustomerRequest"},
+    "the configuration": {"LGType_": "demo.config.Configuration"},
+}
+
+# Members of demo.config.CustomerRequest, in the order the questions are asked
+CUSTOMER_REQUEST_MEMBERS = [
+    ("cloudProvider", "demo.config.CloudProvider", "What is the cloud provider?",
+     "Please indicate the cloud provider chosen by the customer",
+     {"type": "enum", "possibleValues": CLOUD_PROVIDERS}),
+    ("mustHaveDedicatedEnv", "Boolean", "Does the customer need a dedicated environment?", None, None),
+    ("mustHavePrivateEndpoints", "Boolean", "Does the customer need private endpoints?", None, None),
+    ("mustHaveSubSecondLatency", "Boolean", "Does the customer need sub-second latency?", None, None),
+    ("contactEmail", "demo.config.Email", "What is the email of the customer contact?", None,
+     {"type": "text", "regex": "^[A-Za-z0-9+_.-]+@[A-Za-z0-9.-]+$", "minLength": 8, "maxLength": 36}),
+]
+
+
+def enum_values(size: int) -> List[Dict[str, str]]:
+    """possibleValues of an enum restriction with the given number of values."""
+    return [{"v": f"V{i}", "label": f"Value {i}"} for i in range(size)]
+
+
+def missing_element(member: str, member_type: str, question: str, info: Optional[str],
+                    restriction: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """One element of missingData, as returned with richResults=true."""
+    details: Dict[str, Any] = {"question": question, "info": info or question}
+    if restriction is not None:
+        details["restriction"] = restriction
+    return {"target": "the customer request", "member": member, "memberType": member_type, "details": details}
+
+
+def configure_response(payload: Dict[str, Any], questions: int = 1,
+                       enum_size: Optional[int] = None, operation: str = OPERATION) -> Dict[str, Any]:
+    """Response of configure: the payload as output and up to `questions` missing members.
+
+    With enum_size, the cloud provider enum gets that many values, to measure large enums.
+    """
+    output = copy.deepcopy(payload) or copy.deepcopy(INITIAL_PAYLOAD)
+    request = output.setdefault("the customer request", {"LGType_": "demo.config.CustomerRequest"})
+    missing = []
+    for member, member_type, question, info, restriction in CUSTOMER_REQUEST_MEMBERS:
+        if member in request:
+            continue
+        if enum_size is not None and member == "cloudProvider":
+            restriction = {"type": "enum", "possibleValues": enum_values(enum_size)}
+        missing.append(missing_element(member, member_type, question, info, restriction))
+        if len(missing) == questions:
+            break
+    return {
+        "output": output,
+        "missingData": missing,
+        "computationDetails": {"totalTime": 1.0, "appName": APP_NAME, "appVersion": APP_VERSION,
+                               "operation": operation},
+    }
+
+
+def create_stub_app(latency: float = 0.0, questions: int = 1, enum_size: Optional[int] = None) -> FastAPI:
+    """Stub rule engine app serving every operation, each call taking at least `latency` seconds."""
+    stub = FastAPI(title="Stub rule engine")
+
+    @stub.get(SERVER_STATUS_PATH)
+    async def server_status():
+        return {"status": "UP"}
+
+    @stub.get("/v1/domains/{app_path:path}/models/{operation}/initial_payload")
+    async def initial_payload(app_path: str, operation: str):
+        if latency:
+            await asyncio.sleep(latency)
+        return {"payload": INITIAL_PAYLOAD}
+
+    @stub.post("/v1/domains/{app_path:path}/models/{operation}/configure")
+    async def configure(app_path: str, operation: str, request: Request):
+        if latency:
+            await asyncio.sleep(latency)
+        return configure_response(await request.json(), questions=questions, enum_size=enum_size,
+                                  operation=operation)
+
+    return stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000, help="port to listen on (the rule engine port by default)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each operation call")
+    parser.add_argument("--questions", type=int, default=1, help="questions returned by each configure call")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_stub_app(args.latency, args.questions), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
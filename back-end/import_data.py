@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Import configurations from an NDJSON or JSON array file.
+
+The file is streamed: records are validated one by one and inserted in batches, so
+files of any size are imported with constant memory. Files ending in .gz are
+decompressed on the fly, and '-' reads from standard input.
+
+Configurations are written to the SQLite store (CONFIG_DB_PATH), or posted to the
+import endpoint of a running server with --url.
+"""
+
+import argparse
+import gzip
+import sys
+
+from app.database import CONFIG_DB_PATH, create_database
+from app.importer import IMPORT_BATCH_SIZE, import_configurations
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def read_chunks(stream):
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def open_input(path: str):
+    if path == "-":
+        return sys.stdin.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import configurations from an NDJSON or JSON array file.")
+    parser.add_argument("path", help="File to import, '-' for standard input")
+    parser.add_argument("--db-path", default=CONFIG_DB_PATH, help="SQLite database to import into")
+    parser.add_argument("--url", help="Base URL of a running server to import through, e.g. http://localhost:8000")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Configurations inserted at a time")
+    args = parser.parse_args()
+
+    with open_input(args.path) as stream:
+        if args.url:
+            import httpx
+
+            response = httpx.post(f"{args.url.rstrip('/')}/configurations/import",
+                                  params={"batch_size": args.batch_size},
+                                  content=read_chunks(stream),
+                                  headers={"Content-Type": "application/x-ndjson"},
+                                  timeout=None)
+            response.raise_for_status()
+            report = response.json()
+        else:
+            database = create_database("sqlite", args.db_path)
+            try:
+                report = import_configurations(database, read_chunks(stream), batch_size=args.batch_size).model_dump()
+            finally:
+                database.close()
+
+    print(f"Imported {report['imported']} configurations, rejected {report['failed']}")
+    for error in report["errors"]:
+        print(f"  line {error['line']}: {error['error']}", file=sys.stderr)
+    if report["errors_truncated"]:
+        print("  ... more errors not listed", file=sys.stderr)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
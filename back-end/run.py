@@ -1,14 +1,37 @@
 #!/usr/bin/env python3
-"""Run the SaaS Configurator application."""
+"""Run the SaaS Configurator application.
+
+With more than one worker (--workers or WEB_CONCURRENCY), the workers share their
+configurations through the SQLite store (CONFIG_DB_PATH), which is selected
+automatically, and auto-reload is disabled.
+"""
+
+import argparse
+import os
 
 import uvicorn
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the SaaS Configurator API.")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+                        help="Number of worker processes (default: WEB_CONCURRENCY or 1)")
+    parser.add_argument("--reload", action=argparse.BooleanOptionalAction, default=True,
+                        help="Restart on code changes, single worker only (default: on)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        if os.environ.get("CONFIG_STORE", "memory") != "sqlite":
+            print("Several workers: using the shared SQLite store "
+                  f"({os.environ.get('CONFIG_DB_PATH', 'configurations.db')})")
+            os.environ["CONFIG_STORE"] = "sqlite"
+        # Read by the workers, e.g. to warn about a process-local store
+        os.environ["WEB_CONCURRENCY"] = str(args.workers)
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=args.reload and args.workers == 1,
+        workers=args.workers,
         log_level="info"
     )
-
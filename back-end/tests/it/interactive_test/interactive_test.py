@@ -1,6 +1,13 @@
+import os
+import sys
 import requests
 import json
 
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from app.path_injection import apply_values, compile_path, missing_element_path, value_from_input
+
 class bcolors:
     RESET = "\033[0;0m"    
     PINK = '\033[95m'
@@ -14,33 +21,6 @@ class bcolors:
     UNDERLINE = '\033[4m'
 
 
-def injectValue(dictionary: dict, missing_elt, input_value: str) -> dict:
-    print(f"missing_elt={missing_elt}")
-    target = missing_elt['target']
-    legs = target.split(".")
-    print(f"legs={legs}")
-    member = missing_elt['member']
-    memberType = missing_elt['memberType']
-    print(f"memberType={memberType}")
-
-    dictionary_target = dictionary
-    for leg in legs:
-        # TODO: test if a leg contains an indexed element, e.g. container.elements[1]
-        dictionary_target = dictionary_target[leg]
-
-    if memberType == "Boolean":
-        print("injecting boolean")
-        dictionary_target[member] = True if (input_value.lower() in ['true', 't', 'y', 'yes']) else False
-    elif memberType == "Integer":
-        print("injecting integer")
-        dictionary_target[member] = int(input_value)
-    # TODO: cover more data types    
-    else:
-        print("injecting string")
-        dictionary_target[member] = input_value
-    return dictionary
-
-
 """
 curl -X 'POST' \
   'http://localhost:9000/v1/domains/Configuration/apps/cluster-config-demo/1.0.0/models/demo.config.configureKafkaCluster/configure?lang=en&richResults=true' \
@@ -77,10 +57,13 @@ def interactive_test(app_path: str, operation: str, lang: str):
     resp_json = response.json()
     num_calls = 0
     while len(resp_json['missingData']) > 0:
+        answers = []
         for missing_elt in resp_json['missingData']:
             input_val = input(f"{bcolors.YELLOW}{missing_elt['details']['question']} ")            
             print(f"{bcolors.YELLOW}answer={input_val}{bcolors.RESET}")
-            input_dict = injectValue(input_dict, missing_elt, input_val)
+            answers.append((compile_path(missing_element_path(missing_elt)), value_from_input(missing_elt, input_val)))
+        # All the answers of the round are injected in one pass
+        input_dict = apply_values(input_dict, answers)
 
         input_json_string = json.dumps(input_dict)
         response = requests.post(api_url, data=input_json_string, headers=headers)
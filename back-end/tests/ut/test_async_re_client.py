@@ -0,0 +1,236 @@
+"""Unit tests for the async rule engine client."""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.operations import Operation
+from app.re_client import (
+    AsyncRuleEngineClient,
+    OPERATION_CONFIG_PATH,
+    OPERATION_PAYLOAD_PATH,
+    RE_HEDGE_MIN_SAMPLES,
+    configure_cache,
+    invalidate_initial_payloads,
+)
+
+
+INITIAL_PAYLOAD = {
+    "the customer request": {"LGType_": "demo.config.CustomerRequest"},
+    "the configuration": {"LGType_": "demo.config.Configuration"}
+}
+
+CONFIGURE_RESPONSE = {
+    "output": INITIAL_PAYLOAD,
+    "missingData": [
+        {
+            "target": "the customer request",
+            "member": "cloudProvider",
+            "memberType": "demo.config.CloudProvider",
+            "details": {
+                "question": "What is the cloud provider?",
+                "info": "Please indicate the cloud provider chosen by the customer",
+                "restriction": {
+                    "type": "enum",
+                    "possibleValues": [
+                        {"v": "AWS", "label": "Amazon Web Services"},
+                        {"v": "GCP", "label": "Google Cloud"}
+                    ]
+                }
+            }
+        }
+    ],
+    "computationDetails": {
+        "appName": "cluster-config-demo",
+        "appVersion": "1.0.0",
+        "operation": "demo.config.configureKafkaCluster"
+    }
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Keep cached rule engine results from leaking into other tests."""
+    yield
+    configure_cache.clear()
+    invalidate_initial_payloads()
+
+
+def rule_engine_handler(request: httpx.Request) -> httpx.Response:
+    """Minimal stand-in for the rule engine API."""
+    if request.url.path == "/v1/serverStatus":
+        return httpx.Response(200, json={"status": "ok"})
+    if request.url.path == OPERATION_PAYLOAD_PATH:
+        return httpx.Response(200, json={"payload": INITIAL_PAYLOAD})
+    if request.url.path == OPERATION_CONFIG_PATH:
+        assert request.url.params["lang"] == "en"
+        assert json.loads(request.content) == INITIAL_PAYLOAD
+        return httpx.Response(200, json=CONFIGURE_RESPONSE)
+    return httpx.Response(404)
+
+
+@pytest.mark.asyncio
+async def test_configure_through_pool():
+    async with AsyncRuleEngineClient("http://rule-engine", transport=httpx.MockTransport(rule_engine_handler)) as client:
+        assert await client.check_server_status()
+        payload = await client.initial_payload()
+        assert payload == INITIAL_PAYLOAD
+
+        response = await client.configure(payload, lang="en")
+        assert response.appName == "cluster-config-demo"
+        assert response.questions[0].path == "the customer request.cloudProvider"
+        assert response.questions[0].type_info.type == "Enum"
+
+
+@pytest.mark.asyncio
+async def test_server_status_is_false_when_unreachable():
+    def unreachable(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async with AsyncRuleEngineClient("http://rule-engine", transport=httpx.MockTransport(unreachable)) as client:
+        assert not await client.check_server_status()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={"status": "ok"})
+
+    async with AsyncRuleEngineClient("http://rule-engine", max_concurrency=2,
+                                     transport=httpx.MockTransport(slow_handler)) as client:
+        await asyncio.gather(*(client.check_server_status() for _ in range(10)))
+
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_initial_payload_is_cached_and_copied():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return rule_engine_handler(request)
+
+    invalidate_initial_payloads()
+    async with AsyncRuleEngineClient("http://rule-engine", transport=httpx.MockTransport(handler)) as client:
+        first = await client.initial_payload()
+        first["the customer request"]["cloudProvider"] = "AWS"
+        second = await client.initial_payload()
+        assert calls == 1
+        assert second == INITIAL_PAYLOAD
+
+        assert invalidate_initial_payloads(app_version="0.0.1") == 0
+        assert invalidate_initial_payloads(app_path="Configuration/apps/cluster-config-demo", app_version="1.0.0") == 1
+        await client.initial_payload()
+        assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_identical_payloads_are_configured_once():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        if request.url.path == OPERATION_CONFIG_PATH:
+            calls += 1
+        return rule_engine_handler(request)
+
+    configure_cache.clear()
+    reordered = {key: INITIAL_PAYLOAD[key] for key in reversed(list(INITIAL_PAYLOAD))}
+    async with AsyncRuleEngineClient("http://rule-engine", transport=httpx.MockTransport(handler)) as client:
+        first = await client.configure(INITIAL_PAYLOAD)
+        first.payload["the customer request"]["cloudProvider"] = "AWS"
+        second = await client.configure(reordered)
+        assert calls == 1
+        assert second.payload == INITIAL_PAYLOAD
+        assert second.questions == first.questions
+
+        await client.configure(INITIAL_PAYLOAD, use_cache=False)
+        assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_operation_calls_routed_to_the_given_operation():
+    operation = Operation("Configuration/apps/cluster-config-demo", "demo.config.configureFreightCluster", "1.0.0")
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path == operation.payload_path:
+            return httpx.Response(200, json={"payload": {"freight": True}})
+        return httpx.Response(200, json=CONFIGURE_RESPONSE)
+
+    async with AsyncRuleEngineClient("http://rule-engine", transport=httpx.MockTransport(handler)) as client:
+        assert await client.initial_payload(operation=operation) == {"freight": True}
+        await client.configure(INITIAL_PAYLOAD, operation=operation)
+        # Same payload, other operation: not served from the cache of the freight operation
+        await client.configure(INITIAL_PAYLOAD)
+    assert paths == [operation.payload_path, operation.configure_path, OPERATION_CONFIG_PATH]
+
+
+@pytest.mark.asyncio
+async def test_calls_balanced_across_replicas():
+    hosts = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"status": "ok"} if request.url.path == "/v1/serverStatus" else CONFIGURE_RESPONSE)
+
+    async with AsyncRuleEngineClient("http://replica-1,http://replica-2",
+                                     transport=httpx.MockTransport(handler)) as client:
+        await asyncio.gather(*(client.configure({**INITIAL_PAYLOAD, "i": i}, use_cache=False) for i in range(4)))
+        assert sorted(hosts) == ["replica-1", "replica-1", "replica-2", "replica-2"]
+        hosts.clear()
+        assert await client.check_server_status()
+        assert sorted(hosts) == ["replica-1", "replica-2"]
+
+
+@pytest.mark.asyncio
+async def test_slow_configure_hedged_to_another_replica():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow":
+            await asyncio.sleep(5)
+        return httpx.Response(200, json=CONFIGURE_RESPONSE)
+
+    async with AsyncRuleEngineClient("http://slow,http://fast", transport=httpx.MockTransport(handler),
+                                     hedge_percentile=95) as client:
+        for _ in range(RE_HEDGE_MIN_SAMPLES):
+            client.configure_latencies.observe(0.001)
+        start = time.perf_counter()
+        response = await client.configure(INITIAL_PAYLOAD, use_cache=False)
+        assert time.perf_counter() - start < 1
+        assert response.appName == "cluster-config-demo"
+        # The slow request was cancelled
+        await asyncio.sleep(0)
+        assert [replica.outstanding for replica in client.pool.replicas] == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_are_coalesced():
+    calls = {OPERATION_PAYLOAD_PATH: 0, OPERATION_CONFIG_PATH: 0}
+
+    async def slow_handler(request: httpx.Request) -> httpx.Response:
+        calls[request.url.path] += 1
+        await asyncio.sleep(0.01)
+        return rule_engine_handler(request)
+
+    async with AsyncRuleEngineClient("http://rule-engine", transport=httpx.MockTransport(slow_handler)) as client:
+        payloads = await asyncio.gather(*(client.initial_payload() for _ in range(5)))
+        responses = await asyncio.gather(*(client.configure(payload) for payload in payloads))
+
+    assert calls == {OPERATION_PAYLOAD_PATH: 1, OPERATION_CONFIG_PATH: 1}
+    # every caller owns its copy
+    assert len({id(response.payload) for response in responses}) == 5
@@ -0,0 +1,77 @@
+"""Unit tests for the balancing of calls across rule engine replicas."""
+
+import pytest
+
+from app.balancer import LatencyWindow, ReplicaPool, split_urls
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_split_urls():
+    assert split_urls("http://a:9000/, http://b:9000") == ["http://a:9000", "http://b:9000"]
+    with pytest.raises(ValueError):
+        ReplicaPool(split_urls(" , "))
+
+
+def test_least_outstanding_then_cheapest():
+    pool = ReplicaPool(["http://a", "http://b", "http://c"])
+    a, b, c = pool.replicas
+    pool.record_success(a, 0.010)
+    pool.record_success(b, 0.050)
+    pool.record_success(c, 0.020)
+    assert pool.choose() is a
+    with pool.track(a):
+        assert pool.choose() is c
+        with pool.track(c):
+            assert pool.choose() is b
+    assert a.outstanding == c.outstanding == 0
+    assert pool.choose(exclude={a}) is c
+    assert pool.choose(exclude={a, b, c}) is None
+
+
+def test_errors_raise_the_cost():
+    pool = ReplicaPool(["http://a", "http://b"], alpha=0.5, failure_threshold=10)
+    a, b = pool.replicas
+    pool.record_success(a, 0.010)
+    pool.record_success(b, 0.015)
+    pool.record_failure(a)
+    assert a.error_rate == 0.5
+    assert pool.choose() is b
+
+
+def test_failing_replica_ejected_until_it_recovers():
+    clock = FakeClock()
+    pool = ReplicaPool(["http://a", "http://b"], failure_threshold=2, eject_time=10.0, clock=clock)
+    a, b = pool.replicas
+    with pool.track(b):
+        pool.record_failure(a)
+        assert pool.choose() is a
+        pool.record_failure(a)
+        # Ejected: b is chosen although it is busy
+        assert pool.choose() is b
+        assert not pool.any_available(exclude=(b,))
+    pool.record_failure(b)
+    pool.record_failure(b)
+    # All ejected: the one whose ejection ends first
+    assert pool.choose() is a
+    clock.now = 10.0
+    assert pool.any_available()
+    pool.record_success(b)
+    assert pool.snapshot()[1]["ejected"] is False
+
+
+def test_latency_percentile():
+    window = LatencyWindow(size=100)
+    assert window.percentile(95) is None
+    for i in range(1, 201):
+        window.observe(i / 1000)
+    assert len(window) == 100
+    assert window.percentile(50) == pytest.approx(0.150)
+    assert window.percentile(95) == pytest.approx(0.195)
+    assert window.percentile(100) == pytest.approx(0.200)
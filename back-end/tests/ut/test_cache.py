@@ -0,0 +1,103 @@
+"""Unit tests for the in-process caches."""
+
+import asyncio
+
+import pytest
+
+from app.cache import LRUCache, SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1     # "a" becomes the most recently used
+    cache.put("c", 3)              # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (2, 1, 1, 2)
+    assert stats.hit_ratio == 2 / 3
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = LRUCache(max_entries=10, ttl=5.0, clock=clock)
+    cache.put("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_size_bound():
+    cache = LRUCache(max_entries=10, max_bytes=100)
+    cache.put("a", "x", size=60)
+    cache.put("b", "y", size=30)
+    cache.put("c", "z", size=30)   # evicts "a"
+    assert "a" not in cache
+    assert cache.stats.size_bytes == 60
+
+    cache.put("huge", "w", size=101)   # larger than the whole cache, never stored
+    assert "huge" not in cache
+    assert "b" in cache
+
+
+def test_invalidate_where():
+    cache = LRUCache(max_entries=10)
+    cache.put(("app", "1.0.0"), 1)
+    cache.put(("app", "2.0.0"), 2)
+    cache.put(("other", "1.0.0"), 3)
+    assert cache.invalidate_where(lambda key: key[0] == "app") == 2
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result_and_error():
+    flight = SingleFlight()
+    calls = 0
+
+    async def slow(result):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    results = await asyncio.gather(*(flight.do("k", lambda: slow("value")) for _ in range(5)))
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert flight.coalesced == 4
+    assert len(flight) == 0
+
+    outcomes = await asyncio.gather(*(flight.do("k", lambda: slow(RuntimeError("boom"))) for _ in range(3)),
+                                    return_exceptions=True)
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_leader():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    leader = asyncio.ensure_future(flight.do("k", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("k", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "value"
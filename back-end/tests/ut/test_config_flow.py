@@ -1,13 +1,16 @@
 """Unit tests for configuration flow."""
 
+import asyncio
+import gzip
+import json
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.models import ConfigurationStatus
-from app.database import db
-from app.re_client import RuleEngineClient
+from app.models import ConfigurationCreate, ConfigurationStatus, ConfigurationUpdate
+from app.database import create_database, db
+from app.re_client import AsyncRuleEngineClient, BooleanType, ConfigResponse, QuestionInfo
 
 
 @pytest.fixture
@@ -19,16 +22,30 @@ def client():
 @pytest.fixture(autouse=True)
 def clear_db():
     """Clear database before each test."""
-    db.configurations.clear()
+    db.clear()
     yield
-    db.configurations.clear()
+    db.clear()
+
+
+@pytest.fixture
+def shared_db(tmp_path, monkeypatch):
+    """Serve the API from a SQLite store, as several workers do."""
+    store = create_database("sqlite", str(tmp_path / "configurations.db"))
+    monkeypatch.setattr("app.main.db", store)
+    yield store
+    store.close()
 
 
 @pytest.fixture(autouse=False)
 def mock_rule_engine():
     """Mock the Rule Engine client."""
-    mock_client = Mock()
+    mock_client = AsyncMock()
     mock_client.check_server_status.return_value = True
+    mock_client.health.is_open = False
+    mock_client.initial_payload.return_value = {
+        "the customer request": {"LGType_": "demo.config.CustomerRequest"},
+        "the configuration": {"LGType_": "demo.config.Configuration"}
+    }
     mock_client.configure.return_value = {
         "cluster_size": "small",
         "environment": "development",
@@ -36,7 +53,7 @@ def mock_rule_engine():
         "validated": True
     }
 
-    with patch.object(RuleEngineClient, 'get_instance', return_value=mock_client):
+    with patch.object(AsyncRuleEngineClient, 'get_instance', return_value=mock_client):
         yield mock_client
 
 
@@ -76,4 +93,284 @@ def test_create_configuration(client):
     assert "updated_at" in created_config
 
     # Verify configuration exists in database
-    assert len(db.configurations) == 1
\ No newline at end of file
+    assert len(db.configurations) == 1
+
+def test_list_configurations_with_cursor(client):
+    """Test walking the configuration list with cursors."""
+    for i in range(5):
+        db.create_configuration(ConfigurationCreate(name=f"Config {i}"))
+
+    response = client.get("/configurations/", params={"limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 5
+    assert [c["name"] for c in data["items"]] == ["Config 0", "Config 1"]
+
+    names = []
+    cursor = data["next_cursor"]
+    while cursor:
+        response = client.get("/configurations/", params={"limit": 2, "cursor": cursor, "include_total": False})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        names.extend(c["name"] for c in data["items"])
+        cursor = data["next_cursor"]
+    assert names == ["Config 2", "Config 3", "Config 4"]
+
+    response = client.get("/configurations/", params={"cursor": "garbage"})
+    assert response.status_code == 400
+
+
+def test_bulk_create_configurations(client, mock_rule_engine):
+    """Test creating configurations in bulk, with one rule engine failure."""
+    mock_rule_engine.configure.side_effect = [
+        {"validated": True},
+        ValueError("invalid payload"),
+        {"validated": True},
+    ]
+    items = [{"name": f"Bulk {i}", "tags": ["bulk"]} for i in range(3)]
+
+    response = client.post("/configurations/bulk", json={"items": items})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 1
+    assert [item["index"] for item in data["items"]] == [0, 1, 2]
+    assert [item["status_code"] for item in data["items"]] == [201, 400, 201]
+    assert "Rule Engine configuration failed" in data["items"][1]["error"]
+    assert data["items"][1]["id"] is None
+    assert db.count_configurations(tag="bulk") == 2
+
+
+def test_bulk_update_and_delete_configurations(client, mock_rule_engine):
+    """Test updating and deleting configurations in bulk, including missing IDs."""
+    first = db.create_configuration(ConfigurationCreate(name="First"))
+    second = db.create_configuration(ConfigurationCreate(name="Second"))
+    mock_rule_engine.configure.return_value = {"validated": True}
+
+    response = client.patch("/configurations/bulk", json={"items": [
+        {"id": first.id, "name": "First updated", "configuration_data": {"payload": {}}},
+        {"id": 999, "name": "Missing", "configuration_data": {"payload": {}}},
+        {"id": second.id, "status": "active", "configuration_data": {"payload": {}}},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status_code"] for item in data["items"]] == [200, 404, 200]
+    assert data["items"][0]["configuration"]["name"] == "First updated"
+    assert db.get_configuration(second.id).status == ConfigurationStatus.ACTIVE
+
+    response = client.request("DELETE", "/configurations/bulk", json={"ids": [first.id, 999, second.id]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status_code"] for item in data["items"]] == [204, 404, 204]
+    assert data["succeeded"] == 2
+    assert db.count_configurations() == 0
+
+
+def test_configurations_routed_by_cluster_type(client, mock_rule_engine):
+    """Test that each configuration is configured by the operation of its cluster type."""
+    response = client.post("/configurations/", json={"name": "Freight", "cluster_type": "freight"})
+    assert response.status_code == 201
+    operation = mock_rule_engine.configure.call_args.kwargs["operation"]
+    assert operation.operation == "demo.config.configureFreightCluster"
+    assert mock_rule_engine.initial_payload.call_args.kwargs["operation"] == operation
+
+    # Updates keep the operation of the stored cluster type
+    config_id = response.json()["id"]
+    client.put(f"/configurations/{config_id}", json={"configuration_data": {"payload": {}}})
+    assert mock_rule_engine.configure.call_args.kwargs["operation"] == operation
+
+    client.post("/configurations/", json={"name": "Other", "cluster_type": "kubernetes"})
+    assert mock_rule_engine.configure.call_args.kwargs["operation"].operation == "demo.config.configureKafkaCluster"
+
+    operations = client.get("/rule-engine/operations").json()
+    assert {"basic", "dedicated", "enterprise", "freight", "standard"} <= set(operations["operations"])
+
+
+def test_large_rule_engine_response_offloaded(client, mock_rule_engine):
+    """Test that configurations from large rule engine responses are stored and returned as from small ones."""
+    rule_response = ConfigResponse(
+        payload={"the configuration": {"LGType_": "demo.config.Configuration"}}, questions=[],
+        appName="cluster-config-demo", appVersion="1.0.0", operation="demo.config.configureKafkaCluster")
+    rule_response._source_size = 10 * 1024 * 1024
+    mock_rule_engine.configure.return_value = rule_response
+
+    response = client.post("/configurations/", json={"name": "Large"})
+    assert response.status_code == 201
+    created = response.json()
+    assert created["configuration_data"]["questions"] == []
+    assert db.get_configuration(created["id"]).configuration_data["appName"] == "cluster-config-demo"
+
+    response = client.put(f"/configurations/{created['id']}", json={"configuration_data": {"payload": {}}})
+    assert response.status_code == 200
+    assert response.headers["etag"] == client.get(f"/configurations/{created['id']}").headers["etag"]
+    assert response.json()["configuration_data"]["operation"] == "demo.config.configureKafkaCluster"
+
+
+def test_export_configurations(client):
+    """Test streaming the configurations as NDJSON, filtered and gzip compressed."""
+    for i in range(5):
+        db.create_configuration(ConfigurationCreate(name=f"Config {i}", tags=["even"] if i % 2 == 0 else []))
+
+    response = client.get("/configurations/export", params={"batch_size": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [f"Config {i}" for i in range(5)]
+
+    response = client.get("/configurations/export", params={"tag": "even", "gzip": True})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert [json.loads(line)["name"] for line in response.text.splitlines()] == ["Config 0", "Config 2", "Config 4"]
+
+
+def test_import_configurations_round_trip(client):
+    """Test importing the output of the export endpoint, gzip compressed."""
+    for i in range(3):
+        db.create_configuration(ConfigurationCreate(name=f"Config {i}"))
+    exported = client.get("/configurations/export").content
+    db.clear()
+
+    response = client.post("/configurations/import", content=gzip.compress(exported + b"{}\n"),
+                           headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 3
+    assert report["failed"] == 1
+    assert report["errors"][0]["line"] == 4
+    assert [c.name for c in db.get_configurations()] == [f"Config {i}" for i in range(3)]
+
+
+def test_conditional_reads(client):
+    """Test that unchanged configurations and lists are answered with 304."""
+    config = db.create_configuration(ConfigurationCreate(name="Polled"))
+
+    response = client.get(f"/configurations/{config.id}")
+    etag = response.headers["etag"]
+    response = client.get(f"/configurations/{config.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    list_etag = client.get("/configurations/").headers["etag"]
+    assert client.get("/configurations/", headers={"If-None-Match": list_etag}).status_code == 304
+    assert client.get("/configurations/?limit=5", headers={"If-None-Match": list_etag}).status_code == 200
+
+    db.update_configuration(config.id, ConfigurationUpdate(name="Polled again"))
+    assert client.get(f"/configurations/{config.id}", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/configurations/", headers={"If-None-Match": list_etag}).status_code == 200
+
+
+def test_if_match_guards_writes(client, mock_rule_engine):
+    """Test optimistic concurrency on update and delete."""
+    config = db.create_configuration(ConfigurationCreate(name="Shared"))
+    etag = client.get(f"/configurations/{config.id}").headers["etag"]
+    update = {"name": "Shared 2", "configuration_data": {"payload": {}}}
+
+    response = client.put(f"/configurations/{config.id}", json=update, headers={"If-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+
+    response = client.put(f"/configurations/{config.id}", json=update, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.delete(f"/configurations/{config.id}", headers={"If-Match": etag}).status_code == 412
+    assert client.delete(f"/configurations/{config.id}", headers={"If-Match": new_etag}).status_code == 204
+
+
+def test_answer_questions(client, mock_rule_engine):
+    """Test a session step: answers applied server-side, only the payload diff and new questions returned."""
+    payload = {
+        "the customer request": {"LGType_": "demo.config.CustomerRequest"},
+        "the configuration": {"LGType_": "demo.config.Configuration"}
+    }
+    question = {"path": "the customer request.cloudProvider", "text": "What is the cloud provider?",
+                "type_info": {"type": "Enum", "possible_values": [{"v": "AWS", "l": "Amazon Web Services"}]}}
+    config = db.create_configuration(ConfigurationCreate(name="Session", configuration_data={
+        "payload": payload, "questions": [question],
+        "appName": "cluster-config-demo", "appVersion": "1.0.0", "operation": "demo.config.configureKafkaCluster"}))
+
+    next_question = QuestionInfo(path="the customer request.mustHaveDedicatedEnv", text="Dedicated?",
+                                 type_info=BooleanType(type="Boolean"))
+    answered_payload = {
+        "the customer request": {"LGType_": "demo.config.CustomerRequest", "cloudProvider": "AWS"},
+        "the configuration": {"LGType_": "demo.config.Configuration", "tier": "basic"}
+    }
+    mock_rule_engine.configure.return_value = ConfigResponse(
+        payload=answered_payload, questions=[next_question],
+        appName="cluster-config-demo", appVersion="1.0.0", operation="demo.config.configureKafkaCluster")
+
+    response = client.post(f"/configurations/{config.id}/answers",
+                           json={"answers": {"the customer request.cloudProvider": "AWS"}})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["payload_diff"] == {"the customer request": {"cloudProvider": "AWS"},
+                                    "the configuration": {"tier": "basic"}}
+    assert [q["path"] for q in body["questions"]] == ["the customer request.mustHaveDedicatedEnv"]
+    assert body["complete"] is False
+    submitted = mock_rule_engine.configure.call_args.kwargs["input_dict"]
+    assert submitted["the customer request"]["cloudProvider"] == "AWS"
+
+    stored = db.get_configuration(config.id)
+    assert stored.configuration_data["payload"] == answered_payload
+    assert response.headers["etag"] == client.get(f"/configurations/{config.id}").headers["etag"]
+
+    # The answered question is no longer pending
+    response = client.post(f"/configurations/{config.id}/answers",
+                           json={"answers": {"the customer request.cloudProvider": "AWS"}})
+    assert response.status_code == 422
+    assert client.post("/configurations/999/answers", json={"answers": {"a.b": 1}}).status_code == 404
+
+
+def test_shared_store_calls_leave_the_event_loop(client, shared_db, monkeypatch):
+    """Test that calls to a shared store, which may wait for another worker, do not block the event loop."""
+    created = shared_db.create_configuration(ConfigurationCreate(name="Shared"))
+    get_stored_configuration = shared_db.get_stored_configuration
+    on_event_loop = []
+
+    def tracked(config_id):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return get_stored_configuration(config_id)
+
+    monkeypatch.setattr(shared_db, "get_stored_configuration", tracked)
+    assert client.get(f"/configurations/{created.id}").status_code == 200
+    assert on_event_loop == [False]
+
+
+def test_busy_shared_store(client, shared_db):
+    """Test that a write waiting too long for the lock of another worker is answered with 503."""
+    created = shared_db.create_configuration(ConfigurationCreate(name="Locked"))
+    other_worker = create_database("sqlite", shared_db.path)
+    try:
+        with other_worker.batch():
+            response = client.request("DELETE", "/configurations/bulk", json={"ids": [created.id]})
+    finally:
+        other_worker.close()
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert shared_db.get_configuration(created.id) is not None
+
+
+def test_import_inserts_off_the_event_loop(client, monkeypatch):
+    """Test that the import endpoint inserts each batch outside the event loop."""
+    create_configurations = db.create_configurations
+    on_event_loop = []
+
+    def tracked(configs):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return create_configurations(configs)
+
+    monkeypatch.setattr(db, "create_configurations", tracked)
+    body = "".join(json.dumps({"name": f"Config {i}"}) + "\n" for i in range(5))
+    response = client.post("/configurations/import", params={"batch_size": 2}, content=body)
+    assert response.status_code == 200
+    assert response.json()["imported"] == 5
+    assert on_event_loop == [False, False, False]
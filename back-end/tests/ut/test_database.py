@@ -0,0 +1,301 @@
+"""Unit tests for the configuration stores, run against every backend."""
+
+import base64
+import json
+import threading
+
+import pytest
+
+from app.database import ConfigurationConflictError, create_database
+from app.models import ConfigurationCreate, ConfigurationUpdate, ConfigurationStatus
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def database(request, tmp_path):
+    """Create a database holding a few configurations."""
+    database = create_database(request.param, str(tmp_path / "configurations.db"))
+    database.create_configuration(ConfigurationCreate(
+        name="Kafka prod", cluster_type="Kafka", status=ConfigurationStatus.ACTIVE, tags=["production", "kafka"]))
+    database.create_configuration(ConfigurationCreate(
+        name="Kafka dev", cluster_type="kafka", status=ConfigurationStatus.DRAFT, tags=["development", "kafka"]))
+    database.create_configuration(ConfigurationCreate(
+        name="Standard prod", cluster_type="standard", status=ConfigurationStatus.ACTIVE, tags=["production"]))
+    return database
+
+
+def test_filters_use_indexes(database):
+    assert [c.name for c in database.get_configurations(cluster_type="KAFKA")] == ["Kafka prod", "Kafka dev"]
+    assert [c.name for c in database.get_configurations(status=ConfigurationStatus.ACTIVE)] == ["Kafka prod", "Standard prod"]
+    assert [c.name for c in database.get_configurations(tag="production", cluster_type="kafka")] == ["Kafka prod"]
+    assert database.count_configurations() == 3
+    assert database.count_configurations(cluster_type="kafka") == 2
+    assert database.count_configurations(status=ConfigurationStatus.ARCHIVED) == 0
+
+
+def test_pagination_keeps_insertion_order(database):
+    assert [c.id for c in database.get_configurations(skip=1, limit=1)] == [2]
+    assert [c.id for c in database.get_configurations(skip=1, limit=5, tag="kafka")] == [2]
+
+
+def test_update_and_delete_keep_indexes_current(database):
+    database.update_configuration(1, ConfigurationUpdate(status=ConfigurationStatus.ARCHIVED, cluster_type="standard", tags=["legacy"]))
+    assert database.count_configurations(status=ConfigurationStatus.ACTIVE) == 1
+    assert database.count_configurations(status=ConfigurationStatus.ARCHIVED) == 1
+    assert database.count_configurations(cluster_type="kafka") == 1
+    assert database.count_configurations(tag="production") == 1
+    assert database.count_configurations(tag="legacy") == 1
+
+    assert database.delete_configuration(1)
+    assert database.count_configurations(cluster_type="standard") == 1
+    assert database.count_configurations(tag="legacy") == 0
+    assert not database.delete_configuration(1)
+
+
+def test_clear_resets_indexes(database):
+    database.clear()
+    assert database.count_configurations() == 0
+    assert database.count_configurations(tag="kafka") == 0
+
+
+def test_cursor_pagination_walks_all_pages(database):
+    for i in range(7):
+        database.create_configuration(ConfigurationCreate(name=f"Extra {i}", cluster_type="kafka"))
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = database.get_configurations_page(limit=3, cursor=cursor, cluster_type="kafka")
+        seen.extend(c.id for c in page)
+        if cursor is None:
+            break
+    assert seen == [1, 2] + list(range(4, 11))
+
+
+def test_cursor_pagination_by_updated_at(database):
+    database.update_configuration(1, ConfigurationUpdate(description="touched"))
+
+    page, cursor = database.get_configurations_page(limit=2, order_by="updated_at")
+    assert [c.id for c in page] == [2, 3]
+    page, cursor = database.get_configurations_page(limit=2, cursor=cursor, order_by="updated_at")
+    assert [c.id for c in page] == [1]
+    assert cursor is None
+
+
+def test_cursor_survives_deleted_anchor(database):
+    page, cursor = database.get_configurations_page(limit=1)
+    database.delete_configuration(page[0].id)
+    page, _ = database.get_configurations_page(limit=5, cursor=cursor)
+    assert [c.id for c in page] == [2, 3]
+
+
+def test_invalid_cursor_is_rejected(database):
+    _, cursor = database.get_configurations_page(limit=1)
+    with pytest.raises(ValueError):
+        database.get_configurations_page(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        database.get_configurations_page(cursor=cursor, order_by="updated_at")
+
+
+@pytest.mark.parametrize("order_by, key", [
+    ("updated_at", ["2024-01-01T00:00:00+02:00", 1]),
+    ("id", [2 ** 63]),
+    ("id", [-1]),
+])
+def test_crafted_cursor_is_rejected(database, order_by, key):
+    raw = json.dumps({"o": order_by, "k": key}).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    with pytest.raises(ValueError):
+        database.get_configurations_page(cursor=cursor, order_by=order_by)
+
+
+def test_cursor_pagination_with_sparse_filter(database):
+    for i in range(40):
+        database.create_configuration(ConfigurationCreate(name=f"Extra {i}", cluster_type="kafka"))
+
+    page, cursor = database.get_configurations_page(limit=1, tag="production")
+    assert [c.id for c in page] == [1]
+    page, cursor = database.get_configurations_page(limit=1, cursor=cursor, tag="production")
+    assert [c.id for c in page] == [3]
+    assert cursor is None
+
+
+def test_filtered_pages_follow_writes(database):
+    # Fixture: 1 Kafka prod (active), 2 Kafka dev (draft), 3 Standard prod (active)
+    def walk(**filters):
+        ids, cursor = [], None
+        while True:
+            page, cursor = database.get_configurations_page(limit=1, cursor=cursor, **filters)
+            ids.extend(c.id for c in page)
+            if cursor is None:
+                return ids
+
+    database.update_configuration(1, ConfigurationUpdate(description="touched"))
+    database.update_configuration(2, ConfigurationUpdate(status=ConfigurationStatus.ACTIVE, tags=["production"]))
+    assert walk(status=ConfigurationStatus.ACTIVE) == [1, 2, 3]
+    assert walk(status=ConfigurationStatus.ACTIVE, order_by="updated_at") == [3, 1, 2]
+    assert walk(tag="production", cluster_type="kafka", order_by="updated_at") == [1, 2]
+    assert walk(tag="kafka") == [1]
+
+    database.delete_configuration(1)
+    assert walk(status=ConfigurationStatus.ACTIVE, tag="production") == [2, 3]
+    assert database.get_configurations(skip=1, limit=5, status=ConfigurationStatus.ACTIVE,
+                                       order_by="updated_at")[0].id == 2
+
+
+def test_batch_create_and_round_trip(database):
+    created = database.create_configurations([
+        ConfigurationCreate(name=f"Batch {i}", cluster_type="Freight", tags=["batch", f"b{i}"],
+                            configuration_data={"payload": {"index": i}})
+        for i in range(3)
+    ])
+    assert [c.id for c in created] == [4, 5, 6]
+    assert database.count_configurations(tag="batch") == 3
+
+    stored = database.get_configuration(5)
+    assert stored == created[1]
+    assert stored.configuration_data == {"payload": {"index": 1}}
+    assert stored.status == ConfigurationStatus.DRAFT
+
+
+def test_batch_update_and_delete(database):
+    version = database.version
+    updated = database.update_configurations([
+        (1, ConfigurationUpdate(cluster_type="standard")),
+        (99, ConfigurationUpdate(name="Missing")),
+        (1, ConfigurationUpdate(name="Standard former Kafka")),
+    ])
+    assert updated[1] is None
+    assert updated[2].name == "Standard former Kafka" and updated[2].cluster_type == "standard"
+    assert updated[2].updated_at > updated[0].updated_at
+    assert database.version != version
+    assert [c.name for c in database.get_configurations(cluster_type="standard")] == [
+        "Standard former Kafka", "Standard prod"]
+
+    assert database.delete_configurations([2, 99, 2]) == [True, False, False]
+    assert database.count_configurations(tag="kafka") == 1
+
+
+def test_batch_create_is_all_or_nothing(database):
+    version = database.version
+    with pytest.raises(TypeError):
+        database.create_configurations([
+            ConfigurationCreate(name="Valid"),
+            ConfigurationCreate(name="Not encodable", configuration_data={"value": object()}),
+        ])
+    assert database.count_configurations() == 3
+    assert database.version == version
+
+
+def test_sqlite_persists_across_connections(tmp_path):
+    path = str(tmp_path / "configurations.db")
+    database = create_database("sqlite", path)
+    database.create_configuration(ConfigurationCreate(name="Persistent", cluster_type="kafka", tags=["keep"]))
+    database.close()
+
+    reopened = create_database("sqlite", path)
+    assert reopened.get_configuration(1).name == "Persistent"
+    assert reopened.count_configurations(tag="keep", cluster_type="KAFKA") == 1
+    assert reopened.create_configuration(ConfigurationCreate(name="Next")).id == 2
+
+
+def test_iter_configurations_streams_batches(database):
+    for i in range(4):
+        database.create_configuration(ConfigurationCreate(name=f"Extra {i}", status=ConfigurationStatus.ACTIVE))
+
+    batches = list(database.iter_configurations(status=ConfigurationStatus.ACTIVE, batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 2]
+    assert [c.name for batch in batches for c in batch] == [
+        "Kafka prod", "Standard prod", "Extra 0", "Extra 1", "Extra 2", "Extra 3"]
+    assert list(database.iter_configurations(tag="missing")) == []
+
+
+def test_version_changes_on_every_write(database):
+    versions = [database.version]
+    config = database.create_configuration(ConfigurationCreate(name="Versioned"))
+    versions.append(database.version)
+    database.update_configuration(config.id, ConfigurationUpdate(name="Versioned again"))
+    versions.append(database.version)
+    database.get_configurations()
+    assert database.version == versions[-1]
+    database.delete_configuration(config.id)
+    versions.append(database.version)
+    assert len(set(versions)) == 4
+
+
+def test_memory_versions_differ_between_runs():
+    # A restarted process must not answer a stale list ETag with 304
+    assert create_database("memory").version != create_database("memory").version
+
+
+def test_expected_updated_at_guards_writes(database):
+    config = database.create_configuration(ConfigurationCreate(name="Guarded"))
+    original = config.updated_at
+    updated = database.update_configuration(
+        config.id, ConfigurationUpdate(name="Guarded 2"), expected_updated_at=original)
+    assert updated.updated_at > original
+
+    with pytest.raises(ConfigurationConflictError):
+        database.update_configuration(config.id, ConfigurationUpdate(name="Stale"), expected_updated_at=original)
+    with pytest.raises(ConfigurationConflictError):
+        database.delete_configuration(config.id, expected_updated_at=original)
+    assert database.get_configuration(config.id).name == "Guarded 2"
+    assert database.delete_configuration(config.id, expected_updated_at=updated.updated_at)
+
+
+def test_memory_records_are_compact():
+    database = create_database("memory")
+    first = database.create_configuration(ConfigurationCreate(
+        name="a", cluster_type="kafka", tags=["shared"], configuration_data={"brokers": 3}))
+    database.create_configuration(ConfigurationCreate(name="b", cluster_type="".join(["kaf", "ka"]), tags=["shared"]))
+
+    records = list(database.configurations.values())
+    assert not hasattr(records[0], "__dict__")
+    assert isinstance(records[0].data, bytes)
+    assert records[0].cluster_type is records[1].cluster_type
+    assert records[0].tags[0] is records[1].tags[0]
+
+    # Models are built on the way out, changing them does not change the store
+    first.configuration_data["brokers"] = 5
+    first.tags.append("local")
+    config = database.get_configuration(first.id)
+    assert config.configuration_data == {"brokers": 3}
+    assert config.tags == ["shared"]
+    assert config.status == ConfigurationStatus.DRAFT
+
+
+def test_concurrent_writers_and_readers(database):
+    errors = []
+
+    def writer(worker):
+        try:
+            for i in range(50):
+                config = database.create_configuration(ConfigurationCreate(
+                    name=f"w{worker}-{i}", status=ConfigurationStatus.DRAFT, tags=[f"w{worker}"]))
+                database.update_configuration(config.id, ConfigurationUpdate(status=ConfigurationStatus.ACTIVE))
+                if i % 2:
+                    database.delete_configuration(config.id)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(50):
+                for config in database.get_configurations(limit=50, status=ConfigurationStatus.ACTIVE, order_by="updated_at"):
+                    assert config.status == ConfigurationStatus.ACTIVE
+                names = [c.name for batch in database.iter_configurations(batch_size=7) for c in batch]
+                assert len(names) == len(set(names))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    configs = database.get_configurations(limit=1000, tag="w0")
+    assert [c.name for c in configs] == [f"w0-{i}" for i in range(0, 50, 2)]
+    assert database.count_configurations(status=ConfigurationStatus.ACTIVE) == 4 * 25 + 2
+    assert len({c.id for c in database.get_configurations(limit=1000)}) == database.count_configurations()
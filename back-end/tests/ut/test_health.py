@@ -0,0 +1,84 @@
+"""Unit tests for the rule engine health monitor and circuit breaker."""
+
+import httpx
+import pytest
+
+from app.health import CircuitState, RuleEngineHealthMonitor
+from app.re_client import AsyncRuleEngineClient, RuleEngineUnavailableError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def always_down() -> bool:
+    return False
+
+
+def test_circuit_opens_after_consecutive_failures():
+    clock = FakeClock()
+    monitor = RuleEngineHealthMonitor(always_down, failure_threshold=3, reset_timeout=10.0, clock=clock)
+    monitor.record_failure()
+    monitor.record_failure()
+    assert monitor.allow_request()
+    monitor.record_failure()
+    assert monitor.state == CircuitState.OPEN
+    assert monitor.is_open
+    assert not monitor.allow_request()
+
+
+def test_half_open_lets_one_trial_through():
+    clock = FakeClock()
+    monitor = RuleEngineHealthMonitor(always_down, failure_threshold=1, reset_timeout=10.0, clock=clock)
+    monitor.record_failure()
+
+    clock.now = 10.0
+    assert not monitor.is_open
+    assert monitor.allow_request()
+    assert monitor.state == CircuitState.HALF_OPEN
+    assert not monitor.allow_request()
+
+    # a failed trial reopens the circuit, a successful one closes it
+    monitor.record_failure()
+    assert monitor.state == CircuitState.OPEN
+    clock.now = 20.0
+    assert monitor.allow_request()
+    monitor.record_success()
+    assert monitor.available
+    assert monitor.allow_request()
+
+
+@pytest.mark.asyncio
+async def test_probe_closes_the_circuit():
+    async def up() -> bool:
+        return True
+
+    monitor = RuleEngineHealthMonitor(up, failure_threshold=1)
+    monitor.record_failure()
+    assert await monitor.probe_once()
+    assert monitor.state == CircuitState.CLOSED
+    assert monitor.snapshot()["available"]
+
+
+@pytest.mark.asyncio
+async def test_client_fails_fast_when_engine_is_down():
+    calls = 0
+
+    def unreachable(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async with AsyncRuleEngineClient("http://rule-engine", transport=httpx.MockTransport(unreachable)) as client:
+        for _ in range(client.health.failure_threshold):
+            with pytest.raises(httpx.ConnectError):
+                await client.initial_payload()
+        assert client.health.is_open
+
+        with pytest.raises(RuleEngineUnavailableError):
+            await client.configure({"the configuration": {}})
+        assert calls == client.health.failure_threshold
@@ -0,0 +1,84 @@
+"""Unit tests for the streaming configuration import."""
+
+import json
+
+import pytest
+
+from app.database import InMemoryDatabase
+from app.importer import InvalidEncodingError, RecordParser, import_configurations
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def parse(data: bytes, size: int):
+    parser = RecordParser()
+    records = []
+    for chunk in chunked(data, size):
+        records.extend(parser.feed(chunk))
+    return records + parser.close()
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_ndjson_records_keep_their_line(size):
+    data = '{"name": "a"}\n\n{"name": "é"}\n{"name": "c"}'.encode("utf-8")
+    assert parse(data, size) == [(1, {"name": "a"}), (3, {"name": "é"}), (4, {"name": "c"})]
+
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_json_array_records_keep_their_line(size):
+    data = b' [\n  {"name": "a"},\n  {"name": "b", "tags": ["x"]}\n, 12\n]'
+    assert parse(data, size) == [(2, {"name": "a"}), (3, {"name": "b", "tags": ["x"]}), (4, 12)]
+
+
+def test_invalid_json_is_reported():
+    records = parse(b'{"name": "a"}\n{"name": \n{"name": "c"}\n', 4096)
+    assert [line for line, _ in records] == [1, 2, 3]
+    assert isinstance(records[1][1], json.JSONDecodeError)
+
+    records = parse(b'[{"name": "a"}, {"name": ', 3)
+    assert records[0] == (1, {"name": "a"})
+    assert isinstance(records[1][1], json.JSONDecodeError)
+
+
+@pytest.mark.parametrize("size", [1, 3, 4096])
+def test_invalid_utf8_is_reported(size):
+    records = parse(b'\xff\xfe{"name": "x"}\n{"name": "\xc3\xa9"}\n', size)
+    assert isinstance(records[0][1], InvalidEncodingError)
+    assert records[1] == (2, {"name": "é"})
+
+    records = parse(b'[{"name": "\xff"},\n{"name": "b"}]', size)
+    assert isinstance(records[0][1], InvalidEncodingError)
+    assert records[1] == (2, {"name": "b"})
+
+    report = import_configurations(InMemoryDatabase(), [b'\xff\xfe{"name":"x"}\n{"name":"y"}\n'])
+    assert (report.imported, report.failed) == (1, 1)
+    assert report.errors[0].line == 1 and report.errors[0].error == "Invalid UTF-8"
+
+
+def test_import_validates_and_inserts_in_batches():
+    database = InMemoryDatabase()
+    calls = []
+    create_configurations = database.create_configurations
+    database.create_configurations = lambda configs: calls.append(len(configs)) or create_configurations(configs)
+
+    lines = [json.dumps({"name": f"Config {i}", "tags": ["imported"]}) for i in range(5)]
+    lines.insert(2, json.dumps({"name": "Bad", "version": "not-semver"}))
+    lines.insert(4, "not json")
+    report = import_configurations(database, chunked("\n".join(lines).encode(), 10), batch_size=2)
+
+    assert report.imported == 5
+    assert report.failed == 2
+    assert [error.line for error in report.errors] == [3, 5]
+    assert report.errors[0].error.startswith("version:")
+    assert report.errors[1].error.startswith("Invalid JSON")
+    assert calls == [2, 2, 1]
+    assert [c.name for c in database.get_configurations(tag="imported")] == [f"Config {i}" for i in range(5)]
+
+
+def test_import_caps_listed_errors():
+    report = import_configurations(InMemoryDatabase(), [b"{}\n" * 5], max_errors=2)
+    assert report.failed == 5
+    assert len(report.errors) == 2
+    assert report.errors_truncated
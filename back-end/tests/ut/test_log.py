@@ -0,0 +1,73 @@
+"""Unit tests for the logging helpers."""
+
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import log
+from app.log import JsonFormatter, RequestIdFilter, RequestIdMiddleware, debug_payload, request_id_var
+from app.main import app
+
+
+def test_debug_payload_is_not_encoded_when_disabled(caplog):
+    logger = logging.getLogger("test.log.disabled")
+    caplog.set_level(logging.INFO, logger="test.log.disabled")
+    # Not JSON serializable, so encoding it would raise
+    debug_payload(logger, "Payload", object())
+    assert caplog.records == []
+
+
+def test_debug_payload_truncated(caplog, monkeypatch):
+    monkeypatch.setattr(log, "LOG_PAYLOAD_MAX_CHARS", 10)
+    logger = logging.getLogger("test.log.enabled")
+    caplog.set_level(logging.DEBUG, logger="test.log.enabled")
+    debug_payload(logger, "Payload", {"key": "a long enough value"})
+    assert caplog.messages == ['Payload: {"key":"a ... (19 more characters)']
+
+
+def test_debug_payload_sampled(caplog, monkeypatch):
+    monkeypatch.setattr(log, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    logger = logging.getLogger("test.log.sampled")
+    caplog.set_level(logging.DEBUG, logger="test.log.sampled")
+    debug_payload(logger, "Payload", {"key": "value"})
+    assert caplog.records == []
+
+
+def test_request_id_available_during_the_request():
+    echo = FastAPI()
+    echo.add_middleware(RequestIdMiddleware)
+
+    @echo.get("/")
+    async def current_request_id():
+        return {"request_id": request_id_var.get()}
+
+    client = TestClient(echo)
+    response = client.get("/", headers={"X-Request-ID": "abc-123"})
+    assert response.json() == {"request_id": "abc-123"}
+    assert response.headers["X-Request-ID"] == "abc-123"
+
+    generated = client.get("/")
+    assert len(generated.headers["X-Request-ID"]) == 32
+    assert generated.json()["request_id"] == generated.headers["X-Request-ID"]
+    assert request_id_var.get() == "-"
+
+
+def test_api_responses_carry_a_request_id():
+    response = TestClient(app).get("/health", headers={"X-Request-ID": "req-1"})
+    assert response.headers["X-Request-ID"] == "req-1"
+
+
+def test_json_format():
+    record = logging.LogRecord("app.test", logging.WARNING, __file__, 1, "Failed %s", ("call",), None)
+    token = request_id_var.set("req-2")
+    try:
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "WARNING"
+    assert entry["logger"] == "app.test"
+    assert entry["request_id"] == "req-2"
+    assert entry["message"] == "Failed call"
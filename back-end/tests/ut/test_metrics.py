@@ -0,0 +1,112 @@
+"""Unit tests for the metrics registry and the instrumentation of the API."""
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache import LRUCache
+from app.database import InMemoryDatabase
+from app.main import app, db
+from app.metrics import (
+    HTTP_REQUEST_DURATION,
+    RULE_ENGINE_ERRORS,
+    RULE_ENGINE_REQUEST_DURATION,
+    STORE_SCANNED_KEYS,
+    MetricsRegistry,
+    register_cache,
+    REGISTRY,
+)
+from app.models import ConfigurationCreate
+from app.re_client import AsyncRuleEngineClient, OPERATION_KEY, OPERATION_PAYLOAD_PATH
+
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests", "Requests.", ("method",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    requests.inc("GET")
+    requests.inc("GET", amount=2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{method="GET"} 3' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+    assert "latency_seconds_sum 5.55" in lines
+
+
+def test_render_escapes_labels_and_skips_failing_collectors():
+    registry = MetricsRegistry()
+    registry.collect("broken", "Fails.", collect=lambda: 1 / 0)
+    registry.collect("value", "Collected.", collect=lambda: [({"name": 'a "b"'}, 1.5)])
+    assert registry.render() == '# HELP value Collected.\n# TYPE value gauge\nvalue{name="a \\"b\\""} 1.5\n'
+
+
+def test_cache_statistics():
+    cache = LRUCache(max_entries=1)
+    register_cache("test", cache)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    cache.put("b", 2)
+
+    lines = REGISTRY.render().splitlines()
+    assert 'cache_hits_total{cache="test"} 1' in lines
+    assert 'cache_misses_total{cache="test"} 1' in lines
+    assert 'cache_evictions_total{cache="test"} 1' in lines
+    assert 'cache_hit_ratio{cache="test"} 0.5' in lines
+
+
+def test_request_duration_by_route_template():
+    db.clear()
+    config = db.create_configuration(ConfigurationCreate(name="Kafka prod"))
+    client = TestClient(app)
+    before = HTTP_REQUEST_DURATION.count("GET", "/configurations/{config_id}", "200")
+    client.get(f"/configurations/{config.id}")
+    client.get(f"/configurations/{config.id}")
+    client.get("/configurations/999999")
+    db.clear()
+
+    assert HTTP_REQUEST_DURATION.count("GET", "/configurations/{config_id}", "200") == before + 2
+    assert HTTP_REQUEST_DURATION.count("GET", "/configurations/{config_id}", "404") >= 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'route="/configurations/{config_id}",status="200"' in response.text
+    assert "configurations 0" in response.text.splitlines()
+
+
+def test_scanned_keys_counted():
+    database = InMemoryDatabase()
+    for i in range(5):
+        database.create_configuration(ConfigurationCreate(name=f"Config {i}"))
+    before = STORE_SCANNED_KEYS.value()
+    database.get_configurations(limit=3, order_by="updated_at")
+    assert STORE_SCANNED_KEYS.value() - before == 3
+
+
+@pytest.mark.asyncio
+async def test_rule_engine_duration_and_errors():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == OPERATION_PAYLOAD_PATH:
+            return httpx.Response(503)
+        return httpx.Response(200, json={})
+
+    operation = OPERATION_KEY[1]
+    client = AsyncRuleEngineClient(transport=httpx.MockTransport(handler))
+    status_calls = RULE_ENGINE_REQUEST_DURATION.count("status", "")
+    server_errors = RULE_ENGINE_ERRORS.value("initial_payload", operation, "server_error")
+    async with client:
+        assert await client.check_server_status()
+        with pytest.raises(Exception):
+            await client.initial_payload(use_cache=False)
+
+    assert RULE_ENGINE_REQUEST_DURATION.count("status", "") == status_calls + 1
+    assert RULE_ENGINE_ERRORS.value("initial_payload", operation, "server_error") == server_errors + 1
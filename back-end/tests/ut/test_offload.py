@@ -0,0 +1,66 @@
+"""Unit tests for the offloading of large post-processing to an executor."""
+
+import json
+import threading
+
+import pytest
+
+from app.log import request_id_var
+from app.offload import Offloader
+from app.re_client import build_config_response
+
+CONFIGURE_RESPONSE = {
+    "output": {"the customer request": {"LGType_": "demo.config.CustomerRequest"}},
+    "missingData": [{"target": "the customer request", "member": f"member{i}", "memberType": "Boolean",
+                     "details": {"question": f"Question {i}?", "info": ""}} for i in range(200)],
+    "computationDetails": {"appName": "cluster-config-demo", "appVersion": "1.0.0",
+                           "operation": "demo.config.configureEnterpriseCluster"},
+}
+
+
+def current_thread() -> str:
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_only_large_work_is_offloaded():
+    offloader = Offloader("thread", max_workers=1, threshold_bytes=1000)
+    try:
+        assert await offloader.run("test", 999, current_thread) == threading.current_thread().name
+        assert (await offloader.run("test", 1000, current_thread)).startswith("offload")
+    finally:
+        offloader.shutdown()
+
+    inline = Offloader("none", threshold_bytes=0)
+    assert not inline.should_offload(10 ** 9)
+    assert await inline.run("test", 10 ** 9, current_thread) == threading.current_thread().name
+
+
+def test_unknown_executor_rejected():
+    with pytest.raises(ValueError):
+        Offloader("gpu")
+
+
+@pytest.mark.asyncio
+async def test_config_response_built_in_a_process_pool():
+    content = json.dumps(CONFIGURE_RESPONSE).encode()
+    offloader = Offloader("process", max_workers=1, threshold_bytes=1)
+    try:
+        response = await offloader.run("build_config_response", len(content), build_config_response, content)
+    finally:
+        offloader.shutdown()
+    assert len(response.questions) == 200
+    assert response.operation == "demo.config.configureEnterpriseCluster"
+    # The size survives the trip back, it decides whether the next steps are offloaded too
+    assert response.source_size == len(content)
+
+
+@pytest.mark.asyncio
+async def test_threads_keep_the_request_id():
+    offloader = Offloader("thread", max_workers=1, threshold_bytes=1)
+    token = request_id_var.set("req-42")
+    try:
+        assert await offloader.run("test", 1, request_id_var.get) == "req-42"
+    finally:
+        request_id_var.reset(token)
+        offloader.shutdown()
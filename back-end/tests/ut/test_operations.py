@@ -0,0 +1,58 @@
+"""Unit tests for the registry of rule engine operations."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.operations import Operation, OperationRegistry, discover_operations, parse_operations, route_name
+
+ARTEFACTS_DIR = Path(__file__).resolve().parents[2] / "luego-config-service" / "artefacts"
+
+DEFAULT = Operation("Configuration/apps/cluster-config-demo", "demo.config.configureKafkaCluster", "1.0.0")
+
+
+def test_operation_paths():
+    assert DEFAULT.key == ("Configuration/apps/cluster-config-demo", "demo.config.configureKafkaCluster", "1.0.0")
+    assert DEFAULT.configure_path == ("/v1/domains/Configuration/apps/cluster-config-demo/1.0.0/models/"
+                                      "demo.config.configureKafkaCluster/configure")
+    assert DEFAULT.payload_path.endswith("/demo.config.configureKafkaCluster/initial_payload")
+
+
+def test_route_name():
+    assert route_name("demo.config.configureFreightCluster") == "freight"
+    assert route_name("smartinsure.claimdeclaration.refreshQuestionnaire") == "refreshquestionnaire"
+
+
+def test_discover_operations_from_the_deployed_spec():
+    operations = discover_operations(str(ARTEFACTS_DIR))
+    # Operations without initial_payload or configure are not configuration operations
+    assert sorted(operations) == ["basic", "dedicated", "enterprise", "freight", "kafka", "standard"]
+    assert operations["kafka"] == DEFAULT
+    assert operations["basic"].operation == "demo.config.configureBasicCluster"
+
+
+def test_configured_operations_override_discovered_ones(tmp_path):
+    config = {"freight": {"app_path": "/Configuration/apps/cluster-config-demo", "app_version": "1.0.0",
+                          "operation": "demo.config.configureFreightCluster", "url": "http://rule-engine-2:9000"}}
+    config_file = tmp_path / "operations.json"
+    config_file.write_text(json.dumps(config))
+
+    registry = OperationRegistry.load(DEFAULT, config=str(config_file), artefacts_dir=str(ARTEFACTS_DIR))
+    assert registry.resolve("Freight").url == "http://rule-engine-2:9000"
+    assert registry.resolve("freight").app_path == "Configuration/apps/cluster-config-demo"
+    assert registry.resolve("basic").url is None
+    assert registry.urls == [None, "http://rule-engine-2:9000"]
+
+
+def test_unknown_cluster_types_use_the_default_operation():
+    registry = OperationRegistry.load(DEFAULT, config="", artefacts_dir=None, default_cluster_type="kafka")
+    assert registry.operations == {}
+    assert registry.resolve(None) == DEFAULT
+    assert registry.resolve("kubernetes") == DEFAULT
+    assert registry.describe()["default"]["operation"] == "demo.config.configureKafkaCluster"
+
+
+def test_invalid_configuration_rejected():
+    with pytest.raises(ValueError):
+        parse_operations('{"basic": {"operation": "demo.config.configureBasicCluster"}}')
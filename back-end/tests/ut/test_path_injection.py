@@ -0,0 +1,76 @@
+"""Unit tests for the precompiled path injection."""
+
+import pytest
+
+from app.path_injection import (
+    PathInjectionError,
+    apply_values,
+    compile_path,
+    compiled_path_cache,
+    element_type,
+    inject_value,
+    parse_path,
+    value_from_input,
+)
+
+
+def payload():
+    return {
+        "the customer request": {"LGType_": "demo.config.CustomerRequest"},
+        "the configuration": {"LGType_": "demo.config.Configuration",
+                              "clusters": [{"LGType_": "demo.config.Cluster"}, {"LGType_": "demo.config.Cluster"}]},
+    }
+
+
+def test_parse_path():
+    assert parse_path("the customer request.cloudProvider") == ("the customer request", "cloudProvider")
+    assert parse_path("the configuration.clusters[1].size") == ("the configuration", "clusters", 1, "size")
+    assert parse_path("the configuration.clusters.1.size") == ("the configuration", "clusters", 1, "size")
+    assert parse_path("matrix[0][2]") == ("matrix", 0, 2)
+    with pytest.raises(PathInjectionError):
+        parse_path("the configuration..size")
+
+
+def test_compiled_paths_cached_per_app_version():
+    compiled_path_cache.clear()
+    first = compile_path("the customer request.cloudProvider", "cluster-config-demo", "1.0.0")
+    assert compile_path("the customer request.cloudProvider", "cluster-config-demo", "1.0.0") is first
+    assert compile_path("the customer request.cloudProvider", "cluster-config-demo", "1.1.0") is not first
+    assert first.parents == ("the customer request",)
+    assert first.member == "cloudProvider"
+
+
+def test_apply_values_in_one_pass():
+    data = payload()
+    apply_values(data, [
+        (compile_path("the customer request.cloudProvider"), "AWS"),
+        (compile_path("the customer request.mustHaveDedicatedEnv"), True),
+        (compile_path("the configuration.clusters[0].size"), "small"),
+        (compile_path("the configuration.clusters[1].size"), "large"),
+    ])
+    assert data["the customer request"]["cloudProvider"] == "AWS"
+    assert data["the customer request"]["mustHaveDedicatedEnv"] is True
+    assert [c["size"] for c in data["the configuration"]["clusters"]] == ["small", "large"]
+
+
+@pytest.mark.parametrize("path", [
+    "the missing target.size",
+    "the configuration.clusters[2].size",
+    "the configuration.clusters.size",
+    "the customer request[0]",
+])
+def test_paths_outside_the_payload_rejected(path):
+    with pytest.raises(PathInjectionError, match="not found"):
+        inject_value(payload(), path, "value")
+
+
+def test_value_from_input():
+    assert value_from_input({"memberType": "Boolean"}, "Yes") is True
+    assert value_from_input({"memberType": "Integer"}, "3") == 3
+    assert value_from_input({"memberType": "demo.config.CloudProvider"}, "AWS") == "AWS"
+    assert element_type("NEList[demo.config.Cluster]") == "demo.config.Cluster"
+    assert value_from_input({"memberType": "List[demo.config.Cluster]"}, "2") == [
+        {"LGType_": "demo.config.Cluster"}, {"LGType_": "demo.config.Cluster"}]
+    missing = {"memberType": "ObjectCollection",
+               "details": {"collection": {"possibleElementTypes": ["demo.config.Broker"], "min": 1, "max": 3}}}
+    assert value_from_input(missing, "1") == [{"LGType_": "demo.config.Broker"}]
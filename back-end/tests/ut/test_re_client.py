@@ -3,7 +3,7 @@
 import pytest
 from unittest.mock import Mock, patch
 
-from app.re_client import RuleEngineClient
+from app.re_client import RuleEngineClient, question_type_cache
 
 import json
 
@@ -47,5 +47,34 @@ def test_rule_engine(client):
                             )
 """    
 
+def test_question_type_is_memoized(client):
+    missing_elt = {
+        "target": "the customer request",
+        "member": "cloudProvider",
+        "memberType": "demo.config.CloudProvider",
+        "details": {
+            "question": "What is the cloud provider?",
+            "info": "Please indicate the cloud provider chosen by the customer",
+            "restriction": {
+                "type": "enum",
+                "possibleValues": [{"v": "AWS", "label": "Amazon Web Services"}, {"v": "GCP", "label": "Google Cloud"}]
+            }
+        }
+    }
+    question_type_cache.clear()
+    misses = question_type_cache.stats.misses
+
+    first = client.map_question(missing_elt, "cluster-config-demo", "1.0.0")
+    second = client.map_question(missing_elt, "cluster-config-demo", "1.0.0")
+    assert second.type_info is first.type_info
+    assert question_type_cache.stats.misses == misses + 1
+
+    # A different restriction (e.g. labels in another language) is a different entry
+    missing_elt["details"]["restriction"]["possibleValues"][1]["label"] = "Google Cloud Platform"
+    third = client.map_question(missing_elt, "cluster-config-demo", "1.0.0")
+    assert third.type_info is not first.type_info
+    assert third.type_info.possible_values[1].l == "Google Cloud Platform"
+
+
 if __name__ == "__main__":
-    pytest.main()
\ No newline at end of file
+    pytest.main()
@@ -0,0 +1,79 @@
+"""Unit tests for the direct JSON encoding of configurations."""
+
+import json
+
+from app.conditional import configuration_etag
+from app.database import InMemoryDatabase
+from app.export import ndjson_chunks
+from app.models import (ConfigurationCreate, ConfigurationListResponse, ConfigurationResponse, ConfigurationStatus,
+                        ConfigurationUpdate)
+from app.serialization import configuration_bytes, configuration_bytes_cache, configuration_list_bytes
+
+
+def create(database, **fields):
+    return database.create_configuration(ConfigurationCreate(**{"name": "Kafka prod", **fields}))
+
+
+def test_matches_the_response_model():
+    config = create(InMemoryDatabase(), cluster_type="kafka", version="1.2.3", tags=["production"],
+                    configuration_data={"brokers": 3, "topics": [{"name": "orders", "partitions": 12}]})
+    expected = ConfigurationResponse.model_validate(config, from_attributes=True).model_dump_json()
+    assert json.loads(configuration_bytes(config, use_cache=False)) == json.loads(expected)
+
+
+def test_list_matches_the_response_model():
+    database = InMemoryDatabase()
+    configs = [create(database, name=f"Config {i}") for i in range(3)]
+    fields = dict(total=3, page=None, size=10, pages=1, next_cursor="abc")
+    expected = ConfigurationListResponse(items=[c.model_dump() for c in configs], **fields).model_dump_json()
+    assert json.loads(configuration_list_bytes(configs, **fields)) == json.loads(expected)
+    assert json.loads(configuration_list_bytes([], total=None)) == {"items": [], "total": None}
+
+
+def test_cached_per_version():
+    configuration_bytes_cache.clear()
+    database = InMemoryDatabase()
+    config = create(database)
+    first = configuration_bytes(config)
+    assert configuration_bytes(config) is first
+
+    updated = database.update_configuration(config.id, ConfigurationUpdate(name="Kafka staging"))
+    assert json.loads(configuration_bytes(updated))["name"] == "Kafka staging"
+    assert configuration_bytes(database.get_configuration(config.id)) is configuration_bytes(updated)
+    assert len(configuration_bytes_cache) == 2
+
+
+def test_export_lines_match_the_api_encoding():
+    configuration_bytes_cache.clear()
+    database = InMemoryDatabase()
+    configs = [create(database, name=f"Config {i}") for i in range(3)]
+    chunks = list(ndjson_chunks([configs[:2], configs[2:]]))
+    # One-off reads, they do not take the place of hot entries
+    assert len(configuration_bytes_cache) == 0
+    assert b"".join(chunks).splitlines() == [configuration_bytes(config) for config in configs]
+
+
+def test_stored_reads_do_not_decode(monkeypatch):
+    database = InMemoryDatabase()
+    configs = [
+        create(database, cluster_type="kafka", status=ConfigurationStatus.ACTIVE, tags=["production"],
+               configuration_data={"brokers": 3, "owner": "équipe data", "topics": [{"name": "orders"}]}),
+        create(database, name="Empty"),
+    ]
+    expected = [configuration_bytes(config, use_cache=False) for config in configs]
+
+    def decode(_):
+        raise AssertionError("stored configuration decoded")
+    monkeypatch.setattr("app.database.loads", decode)
+
+    stored = database.get_stored_configuration(configs[0].id)
+    assert (stored.id, stored.updated_at) == (configs[0].id, configs[0].updated_at)
+    assert configuration_etag(stored) == configuration_etag(configs[0])
+    assert configuration_bytes(stored, use_cache=False) == expected[0]
+    assert [configuration_bytes(c, use_cache=False) for c in database.get_stored_configurations()] == expected
+    page, cursor = database.get_stored_configurations_page(limit=1)
+    assert [c.id for c in page] == [configs[0].id] and cursor is not None
+    assert database.get_stored_configuration(99) is None
+
+    monkeypatch.undo()
+    assert stored.configuration() == configs[0]
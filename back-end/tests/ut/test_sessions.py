@@ -0,0 +1,67 @@
+"""Unit tests for answer injection and payload deltas of configuration sessions."""
+
+import pytest
+
+from app.sessions import AnswerError, apply_answers, apply_merge_patch, coerce_answer, merge_patch
+
+PAYLOAD = {
+    "the customer request": {"LGType_": "demo.config.CustomerRequest"},
+    "the configuration": {"LGType_": "demo.config.Configuration", "clusters": [{"LGType_": "demo.config.Cluster"}]},
+}
+
+QUESTIONS = [
+    {"path": "the customer request.cloudProvider", "text": "What is the cloud provider?",
+     "type_info": {"type": "Enum", "possible_values": [{"v": "AWS", "l": "Amazon"}, {"v": "GCP", "l": "Google"}]}},
+    {"path": "the customer request.mustHaveDedicatedEnv", "text": "Dedicated?", "type_info": {"type": "Boolean"}},
+    {"path": "the customer request.brokers", "text": "Brokers?",
+     "type_info": {"type": "Number", "range": {"step": "1"}}},
+]
+
+
+def test_apply_answers_coerces_and_leaves_the_payload_untouched():
+    answered = apply_answers(PAYLOAD, QUESTIONS, {
+        "the customer request.cloudProvider": "GCP",
+        "the customer request.mustHaveDedicatedEnv": "yes",
+        "the customer request.brokers": "3",
+    })
+    assert answered["the customer request"] == {
+        "LGType_": "demo.config.CustomerRequest", "cloudProvider": "GCP", "mustHaveDedicatedEnv": True, "brokers": 3}
+    assert "cloudProvider" not in PAYLOAD["the customer request"]
+
+
+@pytest.mark.parametrize("answers", [
+    {"the customer request.region": "eu"},
+    {"the customer request.cloudProvider": "Azure"},
+    {"the customer request.mustHaveDedicatedEnv": "maybe"},
+    {"the customer request.brokers": "many"},
+])
+def test_invalid_answers_rejected(answers):
+    with pytest.raises(AnswerError):
+        apply_answers(PAYLOAD, QUESTIONS, answers)
+
+
+def test_answers_into_list_elements():
+    questions = [{"path": "the configuration.clusters[0].size", "type_info": {"type": "Text"}}]
+    answered = apply_answers(PAYLOAD, questions, {"the configuration.clusters[0].size": "small"})
+    assert answered["the configuration"]["clusters"][0]["size"] == "small"
+    with pytest.raises(AnswerError):
+        apply_answers(PAYLOAD, [{"path": "the configuration.clusters[3].size"}],
+                      {"the configuration.clusters[3].size": "small"})
+
+
+def test_coerce_object_collection():
+    question = {"path": "the configuration.clusters",
+                "type_info": {"type": "ObjectCollection", "possibleTypes": [{"v": "demo.config.Cluster", "l": "Cluster"}]}}
+    assert coerce_answer(question, 2) == [{"LGType_": "demo.config.Cluster"}] * 2
+    assert coerce_answer(question, ["demo.config.Cluster"]) == [{"LGType_": "demo.config.Cluster"}]
+    with pytest.raises(AnswerError):
+        coerce_answer(question, ["demo.config.Other"])
+
+
+def test_merge_patch_round_trip():
+    before = {"a": {"b": 1, "c": [1, 2]}, "d": "removed", "e": "same"}
+    after = {"a": {"b": 2, "c": [1, 2]}, "e": "same", "f": {"new": True}}
+    patch = merge_patch(before, after)
+    assert patch == {"a": {"b": 2}, "d": None, "f": {"new": True}}
+    assert apply_merge_patch(before, patch) == after
+    assert merge_patch(after, after) == {}
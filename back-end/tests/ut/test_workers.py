@@ -0,0 +1,40 @@
+"""Unit tests for the state shared between worker processes."""
+
+from app.database import create_database, seed_test_data
+from app.workers import StoreEventFollower
+
+
+def test_invalidations_reach_the_other_workers(tmp_path):
+    path = str(tmp_path / "configurations.db")
+    calls = {"a": [], "b": []}
+    followers = {
+        name: StoreEventFollower(create_database("sqlite", path), {"invalidate": lambda name=name, **p: calls[name].append(p)})
+        for name in ("a", "b")
+    }
+    for follower in followers.values():
+        follower.poll_once()
+
+    followers["a"].broadcast("invalidate", app_path="Configuration/apps/demo")
+    assert calls["a"] == [{"app_path": "Configuration/apps/demo"}]
+    assert followers["b"].poll_once() == 1
+    assert calls["b"] == [{"app_path": "Configuration/apps/demo"}]
+
+    # Own events are not applied twice, and events are applied once
+    assert followers["a"].poll_once() == 0
+    assert followers["b"].poll_once() == 0
+    assert len(calls["a"]) == 1
+
+
+def test_process_local_store_only_applies_locally():
+    calls = []
+    follower = StoreEventFollower(create_database("memory"), {"invalidate": lambda **p: calls.append(p) or 3})
+    assert follower.broadcast("invalidate", app_version="1.0.0") == 3
+    assert follower.poll_once() == 0
+    assert calls == [{"app_version": "1.0.0"}]
+
+
+def test_workers_seed_a_shared_store_once(tmp_path):
+    path = str(tmp_path / "configurations.db")
+    for _ in range(2):
+        seed_test_data(create_database("sqlite", path))
+    assert create_database("sqlite", path).count_configurations() == 2
@@ -46,6 +46,7 @@ export interface ConfigurationListResponse {
   page: number;
   size: number;
   pages: number;
+  next_cursor?: string | null;
 }
 
 export interface ApiError {